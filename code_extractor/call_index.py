@@ -0,0 +1,272 @@
+"""Persistent on-disk index of function call sites."""
+
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .symbol_index import get_index_dir
+
+
+# Configuration constants
+CALL_INDEX_FILENAME = "calls.sqlite3"
+CALL_SCHEMA_VERSION = 1
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_callee(text: str) -> str:
+    """
+    Normalize the source text of a call's function to a dotted name.
+
+    Whitespace (e.g. a method chain split over lines) is dropped and
+    optional chaining is read as plain member access.
+    """
+    return _WHITESPACE.sub('', text).replace('?.', '.')
+
+
+def callee_matches(callee: str, target: str) -> bool:
+    """
+    Check whether a call's callee is named by a search target.
+
+    The target matches the whole dotted callee or a dotted suffix of it, so
+    "get", "session.get" and "self.session.get" all match self.session.get().
+    """
+    return callee == target or callee.endswith('.' + target)
+
+
+@dataclass
+class CallSite:
+    """One call expression, as recorded in the call index."""
+    callee: str  # Normalized dotted callee, e.g. "self.session.get"
+    start_line: int
+    end_line: int
+    start_byte: int
+    end_byte: int
+    file_path: str = ""
+
+    @property
+    def name(self) -> str:
+        """Called name without its receiver."""
+        return self.callee.rpartition('.')[2]
+
+    @property
+    def receiver(self) -> str:
+        """Qualified receiver the name is called on, empty for plain calls."""
+        return self.callee.rpartition('.')[0]
+
+
+class CallIndex:
+    """
+    SQLite-backed store of the call sites in each file.
+
+    Calls are indexed by the called name, so "who calls X" is one indexed
+    lookup filtered by dotted suffix. Each file row records the mtime and
+    size its calls were extracted at; calls from files that changed since
+    are never returned.
+    """
+
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != CALL_SCHEMA_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS calls")
+            self._conn.execute("DROP TABLE IF EXISTS files")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS calls (
+                name TEXT NOT NULL,
+                receiver TEXT NOT NULL,
+                path TEXT NOT NULL,
+                start_line INTEGER NOT NULL,
+                end_line INTEGER NOT NULL,
+                start_byte INTEGER NOT NULL,
+                end_byte INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS calls_name ON calls (name)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS calls_path ON calls (path)")
+        self._conn.execute(f"PRAGMA user_version={CALL_SCHEMA_VERSION}")
+        self._conn.commit()
+
+    @staticmethod
+    def _key_path(file_path: Union[str, Path]) -> str:
+        return str(Path(file_path).resolve())
+
+    def store(self, file_path: Union[str, Path], calls: List[CallSite],
+              stat: Optional[os.stat_result] = None) -> None:
+        """
+        Record the call sites extracted from a file's current on-disk content.
+
+        Args:
+            file_path: Path of the file on disk
+            calls: Every call site in the file
+            stat: File status taken before the file was read, if available,
+                so an edit made while extracting leaves the entry stale
+        """
+        try:
+            stat = stat or os.stat(file_path)
+        except OSError:
+            return
+
+        key = self._key_path(file_path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size) VALUES (?, ?, ?)",
+                (key, stat.st_mtime_ns, stat.st_size)
+            )
+            self._conn.execute("DELETE FROM calls WHERE path = ?", (key,))
+            self._conn.executemany(
+                "INSERT INTO calls (name, receiver, path, start_line, end_line, start_byte, end_byte) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((c.name, c.receiver, key, c.start_line, c.end_line, c.start_byte, c.end_byte) for c in calls)
+            )
+            self._conn.commit()
+
+    def is_current(self, file_path: Union[str, Path]) -> bool:
+        """Check whether a file's entry matches its on-disk mtime and size."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime_ns, size FROM files WHERE path = ?", (self._key_path(file_path),)
+            ).fetchone()
+        return row == (stat.st_mtime_ns, stat.st_size)
+
+    def find_calls(self, target: str, file_paths: Optional[Iterable[Union[str, Path]]] = None) -> List[CallSite]:
+        """
+        Find the indexed calls of a name.
+
+        Args:
+            target: Called name, optionally qualified ("get", "session.get")
+            file_paths: Optional files to restrict the lookup to
+
+        Returns:
+            List of CallSite objects from current files, ordered by file and position
+        """
+        target = normalize_callee(target)
+        name = target.rpartition('.')[2]
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT calls.path, receiver, start_line, end_line, start_byte, end_byte, mtime_ns, size "
+                "FROM calls JOIN files ON files.path = calls.path WHERE name = ? "
+                "ORDER BY calls.path, start_byte",
+                (name,)
+            ).fetchall()
+
+        wanted = {self._key_path(p) for p in file_paths} if file_paths is not None else None
+        calls = []
+        current: Dict[str, bool] = {}
+        for path, receiver, start_line, end_line, start_byte, end_byte, mtime_ns, size in rows:
+            if wanted is not None and path not in wanted:
+                continue
+            callee = f"{receiver}.{name}" if receiver else name
+            if not callee_matches(callee, target):
+                continue
+            if path not in current:
+                current[path] = self._stat_key(path) == (mtime_ns, size)
+            if current[path]:
+                calls.append(CallSite(callee, start_line, end_line, start_byte, end_byte, path))
+        return calls
+
+    @staticmethod
+    def _stat_key(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def restamp(self, stamps: Iterable[Tuple[str, Tuple[int, int], Tuple[int, int]]]) -> None:
+        """
+        Move entries to a new (mtime_ns, size) without re-extracting them.
+
+        Args:
+            stamps: (path, recorded (mtime_ns, size), new (mtime_ns, size)) per file
+        """
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE files SET mtime_ns = ?, size = ? WHERE path = ? AND mtime_ns = ? AND size = ?",
+                ((*new, self._key_path(path), *recorded) for path, recorded, new in stamps)
+            )
+            self._conn.commit()
+
+    def relocate(self, old_root: Union[str, Path], new_root: Union[str, Path]) -> None:
+        """Rewrite the paths of entries under one directory to another, dropping any under new_root."""
+        old_prefix = os.path.join(self._key_path(old_root), '')
+        new_prefix = os.path.join(self._key_path(new_root), '')
+        if old_prefix == new_prefix:
+            return
+        with self._lock:
+            for table in ("calls", "files"):
+                self._conn.execute(f"DELETE FROM {table} WHERE substr(path, 1, ?) = ?",
+                                   (len(new_prefix), new_prefix))
+                self._conn.execute(f"UPDATE {table} SET path = ? || substr(path, ?) WHERE substr(path, 1, ?) = ?",
+                                   (new_prefix, len(old_prefix) + 1, len(old_prefix), old_prefix))
+            self._conn.commit()
+
+    def remove(self, file_path: Union[str, Path]) -> None:
+        """Drop a file from the index."""
+        key = self._key_path(file_path)
+        with self._lock:
+            self._conn.execute("DELETE FROM calls WHERE path = ?", (key,))
+            self._conn.execute("DELETE FROM files WHERE path = ?", (key,))
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """
+        Get index statistics.
+
+        Returns:
+            Dictionary with index statistics
+        """
+        with self._lock:
+            files = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            calls = self._conn.execute("SELECT COUNT(*) FROM calls").fetchone()[0]
+        return {'path': str(self.db_path), 'files': files, 'calls': calls}
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+_default_index: Optional[CallIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_call_index() -> Optional[CallIndex]:
+    """
+    Get the process-wide call index, stored next to the symbol index.
+
+    Returns:
+        CallIndex instance, or None if no index directory is configured
+    """
+    global _default_index
+    index_dir = get_index_dir()
+    if index_dir is None:
+        return None
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = CallIndex(index_dir / CALL_INDEX_FILENAME)
+        return _default_index
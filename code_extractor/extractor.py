@@ -7,15 +7,23 @@ that properly distinguishes methods from functions and extracts rich context.
 
 import os
 import re
-from typing import Dict, List, Optional, Tuple, Any
-from pathlib import Path
+import sqlite3
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple, Any, Union
 
 from .models import CodeSymbol, Parameter, SymbolKind
+from .file_reader import working_tree_path
+from .parse_cache import content_hash, parse_cache
+from .query_registry import get_query
+from .source_buffer import SourceBuffer
+from .symbol_index import SymbolIndex
+from .url_fetcher import is_url
 from .languages import (
     get_language_for_file,
     get_tree_sitter_parser,
     get_tree_sitter_language,
-    is_language_supported
+    is_language_supported,
+    query_captures
 )
 
 
@@ -27,46 +35,47 @@ class CodeExtractor:
     with full context, solving the method vs function classification problem.
     """
     
-    def __init__(self, language: str):
+    def __init__(self, language: str, symbol_index: Optional[SymbolIndex] = None):
         """
         Initialize the extractor for a specific language.
         
         Args:
             language: Programming language name
+            symbol_index: Optional on-disk index consulted before parsing files
             
         Raises:
             ValueError: If language is not supported
         """
         self.language = language
+        self.symbol_index = symbol_index
         self.parser = get_tree_sitter_parser(language)
         self.ts_language = get_tree_sitter_language(language)
         
         if not self.parser or not self.ts_language:
             raise ValueError(f"Language '{language}' is not supported")
             
-        self.query = self._load_query(language)
+        self.query = get_query(language)
     
-    def _load_query(self, language: str) -> Optional[Any]:
-        """Load tree-sitter query for the language."""
-        query_file = Path(__file__).parent / "queries" / f"{language}.scm"
-        
-        if not query_file.exists():
-            return None
-            
-        try:
-            with open(query_file, 'r') as f:
-                query_text = f.read()
-            return self.ts_language.query(query_text)
-        except Exception:
-            return None
-    
-    def extract_symbols(self, source_code: str, depth: int = 0) -> List[CodeSymbol]:
+    def extract_symbols(self, source_code: Union[str, SourceBuffer], depth: int = 0, file_path: Optional[str] = None,
+                        revision: Optional[str] = None, stat: Optional[os.stat_result] = None,
+                        include_locals: bool = False) -> List[CodeSymbol]:
         """
         Extract all symbols from source code with full context.
         
         Args:
-            source_code: Source code string
+            source_code: Source code string, or a SourceBuffer read with read_source
             depth: Symbol extraction depth (0=everything, 1=top-level only, 2=classes+methods, etc.)
+            file_path: Optional path the source was read from, used to reparse
+                incrementally when the same file is extracted again after an edit
+            revision: VCS revision the source was read at, if any. The symbol
+                index only covers working-tree content, so it is bypassed then.
+            stat: Status of file_path taken before the source was read. The
+                index entry is stamped with it, so an edit made after the read
+                leaves the entry stale; without it the file is statted here.
+            include_locals: Also return symbols defined inside function and
+                method bodies (nested functions, local variables). They are
+                always kept in the symbol index, which answers definition
+                searches.
             
         Returns:
             List of CodeSymbol objects with rich context
@@ -75,15 +84,43 @@ class CodeExtractor:
             return []
             
         try:
-            source_bytes = source_code.encode('utf-8')
-            tree = self.parser.parse(source_bytes)
-            captures = self.query.captures(tree.root_node)
+            source = source_code if isinstance(source_code, SourceBuffer) else SourceBuffer.from_text(source_code)
             
-            # Process captures into symbols
-            symbols_data = self._process_captures(captures, source_bytes)
+            use_index = (self.symbol_index is not None and file_path is not None and
+                         revision is None and not is_url(file_path))
+            source_hash = content_hash(source.data) if use_index else None
+            if use_index and stat is None:
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    use_index = False
             
-            # Build hierarchical relationships
-            symbols = self._build_symbol_hierarchy(symbols_data, source_bytes, depth=depth)
+            symbols = None
+            if use_index:
+                symbols = self.symbol_index.lookup(file_path, self.language, source_hash)
+            
+            if symbols is None:
+                cache_path = working_tree_path(file_path, revision) if file_path is not None else None
+                tree = parse_cache.parse(self.parser, self.language, source.data, path=cache_path)
+                captures = query_captures(self.query, tree.root_node)
+                
+                # Process captures into symbols
+                symbols_data = self._process_captures(captures, source)
+                
+                # Build hierarchical relationships
+                symbols = self._build_symbol_hierarchy(symbols_data, source, depth=0)
+                
+                if use_index:
+                    try:
+                        self.symbol_index.store(file_path, self.language, source_hash, symbols, stat)
+                    except sqlite3.Error as e:
+                        # The symbols are good; only the cached copy is lost
+                        print(f"Error indexing symbols for {file_path}: {e}", file=sys.stderr)
+            
+            if not include_locals:
+                symbols = self._without_function_locals(symbols)
+            if depth > 0:
+                symbols = self._filter_by_depth(symbols, depth)
             
             return symbols
             
@@ -132,13 +169,13 @@ class CodeExtractor:
                 return symbol
         return None
     
-    def _process_captures(self, captures: List[Tuple], source_bytes: bytes) -> Dict[int, Dict[str, Any]]:
+    def _process_captures(self, captures: List[Tuple], source: SourceBuffer) -> Dict[int, Dict[str, Any]]:
         """
         Process tree-sitter captures into symbol data.
         
         Args:
             captures: List of (node, capture_name) tuples
-            source_bytes: Source code as bytes
+            source: Source code buffer
             
         Returns:
             Dictionary mapping node IDs to symbol data
@@ -180,21 +217,20 @@ class CodeExtractor:
                     elif symbol_type == 'import':
                         symbol_captures[symbol_id]['kind'] = SymbolKind.IMPORT
                     
-        # Second pass: add name and other captures to existing symbols
+        # Second pass: attach name and other captures to the nearest enclosing
+        # definition of the same symbol type
         for node, capture_name in captures:
             if '.' in capture_name:
                 symbol_type, capture_type = capture_name.split('.', 1)
                 if capture_type != 'definition':
-                    # Find the symbol whose definition contains this node
-                    for symbol_id, symbol_data in symbol_captures.items():
-                        definition_node = symbol_data['definition_node']
-                        # Check if this node is within the definition node's range
-                        # and if the symbol type matches
-                        definition_capture_name = f"{symbol_type}.definition"
-                        if (definition_capture_name in symbol_data['captures'] and
-                            definition_node.start_byte <= node.start_byte < definition_node.end_byte):
+                    definition_capture_name = f"{symbol_type}.definition"
+                    ancestor = node
+                    while ancestor is not None:
+                        symbol_data = symbol_captures.get(ancestor.id)
+                        if symbol_data is not None and definition_capture_name in symbol_data['captures']:
                             symbol_data['captures'][capture_name] = node
                             break
+                        ancestor = ancestor.parent
         
         # Convert to the expected format
         for symbol_id, symbol_data in symbol_captures.items():
@@ -207,13 +243,13 @@ class CodeExtractor:
         
         return symbols_data
     
-    def _build_symbol_hierarchy(self, symbols_data: Dict[int, Dict[str, Any]], source_bytes: bytes, depth: int = 1) -> List[CodeSymbol]:
+    def _build_symbol_hierarchy(self, symbols_data: Dict[int, Dict[str, Any]], source: SourceBuffer, depth: int = 1) -> List[CodeSymbol]:
         """
         Build CodeSymbol objects with hierarchical relationships.
         
         Args:
             symbols_data: Processed symbol data
-            source_bytes: Source code as bytes
+            source: Source code buffer
             depth: Symbol extraction depth (0=everything, 1=top-level only, 2=classes+methods, etc.)
             
         Returns:
@@ -229,7 +265,7 @@ class CodeExtractor:
             captures = data['captures']
             
             # Extract basic information
-            name = self._extract_name(captures, source_bytes)
+            name = self._extract_name(captures, source)
             if not name:
                 continue
             
@@ -243,8 +279,8 @@ class CodeExtractor:
             # Use definition node if available, otherwise use the name node
             range_node = definition_node if definition_node else node
             
-            start_line = source_bytes[:range_node.start_byte].count(b'\n') + 1
-            end_line = source_bytes[:range_node.end_byte].count(b'\n') + 1
+            start_line = source.lines.line_at(range_node.start_byte)
+            end_line = source.lines.line_at(range_node.end_byte)
             
             # Create symbol
             symbol = CodeSymbol(
@@ -258,13 +294,13 @@ class CodeExtractor:
             
             # Extract detailed information based on kind
             if symbol.kind in [SymbolKind.FUNCTION, SymbolKind.METHOD]:
-                self._extract_function_details(symbol, captures, source_bytes)
+                self._extract_function_details(symbol, captures, source)
             elif symbol.kind == SymbolKind.CLASS:
-                self._extract_class_details(symbol, captures, source_bytes)
+                self._extract_class_details(symbol, captures, source)
             elif symbol.kind in [SymbolKind.VARIABLE, SymbolKind.CONSTANT]:
-                self._extract_variable_details(symbol, captures, source_bytes)
+                self._extract_variable_details(symbol, captures, source)
             elif symbol.kind == SymbolKind.IMPORT:
-                self._extract_import_details(symbol, captures, source_bytes)
+                self._extract_import_details(symbol, captures, source)
             
             symbols.append(symbol)
         
@@ -277,14 +313,14 @@ class CodeExtractor:
         
         return symbols
     
-    def _extract_name(self, captures: Dict[str, Any], source_bytes: bytes) -> Optional[str]:
+    def _extract_name(self, captures: Dict[str, Any], source: SourceBuffer) -> Optional[str]:
         """Extract symbol name from captures."""
         for capture_name, node in captures.items():
             if capture_name.endswith('.name'):
-                return source_bytes[node.start_byte:node.end_byte].decode('utf-8')
+                return source.node_text(node)
         return None
     
-    def _extract_function_details(self, symbol: CodeSymbol, captures: Dict[str, Any], source_bytes: bytes):
+    def _extract_function_details(self, symbol: CodeSymbol, captures: Dict[str, Any], source: SourceBuffer):
         """Extract function/method specific details."""
         # Check if async by looking at the function definition node
         definition_node = None
@@ -301,13 +337,13 @@ class CodeExtractor:
         # Extract parameters
         for capture_name, node in captures.items():
             if capture_name.endswith('.parameters'):
-                symbol.parameters = self._parse_parameters(node, source_bytes)
+                symbol.parameters = self._parse_parameters(node, source)
                 break
         
         # Extract return type
         for capture_name, node in captures.items():
             if capture_name.endswith('.return_type'):
-                symbol.return_type = source_bytes[node.start_byte:node.end_byte].decode('utf-8')
+                symbol.return_type = source.node_text(node)
                 break
         
         # Extract docstring from function body if present
@@ -319,22 +355,22 @@ class CodeExtractor:
                     if (first_stmt.type == 'expression_statement' and 
                         first_stmt.children and 
                         first_stmt.children[0].type == 'string'):
-                        docstring = source_bytes[first_stmt.children[0].start_byte:first_stmt.children[0].end_byte].decode('utf-8')
+                        docstring = source.node_text(first_stmt.children[0])
                         symbol.docstring = docstring.strip('"\'').strip()
                         break
     
-    def _extract_class_details(self, symbol: CodeSymbol, captures: Dict[str, Any], source_bytes: bytes):
+    def _extract_class_details(self, symbol: CodeSymbol, captures: Dict[str, Any], source: SourceBuffer):
         """Extract class specific details."""
         # Extract docstring
         for capture_name, node in captures.items():
             if capture_name.endswith('.docstring'):
-                docstring = source_bytes[node.start_byte:node.end_byte].decode('utf-8')
+                docstring = source.node_text(node)
                 docstring = docstring.strip('"\'').strip()
                 if docstring:
                     symbol.docstring = docstring
                 break
     
-    def _extract_variable_details(self, symbol: CodeSymbol, captures: Dict[str, Any], source_bytes: bytes):
+    def _extract_variable_details(self, symbol: CodeSymbol, captures: Dict[str, Any], source: SourceBuffer):
         """Extract variable/constant specific details."""
         # Determine if this is a constant (uppercase name)
         if symbol.name.isupper():
@@ -343,28 +379,28 @@ class CodeExtractor:
         # Extract type annotation
         for capture_name, node in captures.items():
             if capture_name.endswith('.type'):
-                symbol.type_annotation = source_bytes[node.start_byte:node.end_byte].decode('utf-8')
+                symbol.type_annotation = source.node_text(node)
                 break
         
         # Extract value
         for capture_name, node in captures.items():
             if capture_name.endswith('.value'):
-                value = source_bytes[node.start_byte:node.end_byte].decode('utf-8')
+                value = source.node_text(node)
                 # Truncate long values
                 symbol.value = value[:100] + "..." if len(value) > 100 else value
                 break
     
-    def _extract_import_details(self, symbol: CodeSymbol, captures: Dict[str, Any], source_bytes: bytes):
+    def _extract_import_details(self, symbol: CodeSymbol, captures: Dict[str, Any], source: SourceBuffer):
         """Extract import specific details."""
         # This would be implemented for import handling
         pass
     
-    def _parse_parameters(self, params_node: Any, source_bytes: bytes) -> List[Parameter]:
+    def _parse_parameters(self, params_node: Any, source: SourceBuffer) -> List[Parameter]:
         """Parse function parameters from parameters node."""
         parameters = []
         
         # Simple parameter extraction - this could be enhanced with more sophisticated parsing
-        params_text = source_bytes[params_node.start_byte:params_node.end_byte].decode('utf-8')
+        params_text = source.node_text(params_node)
         
         # Remove parentheses and split by comma
         params_text = params_text.strip('()')
@@ -402,24 +438,42 @@ class CodeExtractor:
         return parameters
     
     def _add_parent_relationships(self, symbols: List[CodeSymbol]):
-        """Add parent relationships for methods inside classes."""
+        """
+        Add parent relationships for methods and nested classes inside classes,
+        and qualify every name with the classes and functions enclosing it.
+        """
         # Sort by start position to enable proper nesting detection
-        symbols.sort(key=lambda s: s.start_byte)
-        
-        class_stack = []
+        symbols.sort(key=_position_key)
+        scopes: List[CodeSymbol] = []  # Enclosing classes and functions, innermost last
         
-        for symbol in symbols:
-            # Pop classes that this symbol is outside of
-            while class_stack and class_stack[-1].end_byte < symbol.start_byte:
-                class_stack.pop()
+        for symbol, enclosing_class, _ in self._walk_nesting(symbols):
+            # If we're inside a class and this is a method or class, set parent
+            if enclosing_class and symbol.kind in (SymbolKind.METHOD, SymbolKind.CLASS):
+                symbol.parent = enclosing_class.name
             
-            # If we're inside a class and this is a method, set parent
-            if class_stack and symbol.kind == SymbolKind.METHOD:
-                symbol.parent = class_stack[-1].name
-            
-            # Push classes onto stack
-            if symbol.kind == SymbolKind.CLASS:
-                class_stack.append(symbol)
+            while scopes and scopes[-1].end_byte < symbol.end_byte:
+                scopes.pop()
+            symbol.qualified_name = f"{scopes[-1].qualified_name}.{symbol.name}" if scopes else symbol.name
+            if symbol.kind in (SymbolKind.CLASS, SymbolKind.FUNCTION, SymbolKind.METHOD):
+                scopes.append(symbol)
+    
+    def _without_function_locals(self, symbols: List[CodeSymbol]) -> List[CodeSymbol]:
+        """
+        Drop symbols defined inside a function or method body.
+        
+        Nested functions and local variables belong to their function, not
+        to the file's symbol table. Ranges nest, so skipping everything that
+        starts before the last kept function ends removes exactly those.
+        """
+        kept = []
+        function_end = -1
+        for symbol in sorted(symbols, key=_position_key):
+            if symbol.start_byte < function_end:
+                continue
+            kept.append(symbol)
+            if symbol.kind in (SymbolKind.FUNCTION, SymbolKind.METHOD):
+                function_end = symbol.end_byte
+        return kept
     
     def _filter_by_depth(self, symbols: List[CodeSymbol], depth: int) -> List[CodeSymbol]:
         """Filter symbols by nesting depth.
@@ -433,51 +487,50 @@ class CodeExtractor:
         """
         if depth == 0:
             return symbols
-            
-        # Calculate nesting depth for each symbol
-        # Sort by start position to enable proper nesting detection
-        sorted_symbols = sorted(symbols, key=lambda s: s.start_byte)
         
-        filtered_symbols = []
-        
-        for symbol in sorted_symbols:
-            symbol_depth = self._calculate_symbol_depth(symbol, sorted_symbols)
-            
-            if symbol_depth <= depth:
-                filtered_symbols.append(symbol)
-        
-        return filtered_symbols
+        return [symbol for symbol, _, symbol_depth in self._walk_nesting(symbols) if symbol_depth <= depth]
     
-    def _calculate_symbol_depth(self, symbol: CodeSymbol, sorted_symbols: List[CodeSymbol]) -> int:
-        """Calculate the nesting depth of a symbol.
+    def _walk_nesting(self, symbols: List[CodeSymbol]) -> Iterator[Tuple[CodeSymbol, Optional[CodeSymbol], int]]:
+        """
+        Sweep symbols in position order, tracking the classes that enclose each one.
+        
+        Symbols come from a syntax tree, so their ranges nest properly and a
+        stack of open classes is enough to find every container in one pass.
         
         Args:
-            symbol: Symbol to calculate depth for
-            sorted_symbols: All symbols sorted by start position
+            symbols: Symbols to walk
             
-        Returns:
-            Nesting depth (1=top-level, 2=inside class, etc.)
+        Yields:
+            (symbol, innermost enclosing class or None, nesting depth) tuples,
+            where depth is 1 for top-level symbols and grows by one per
+            enclosing class
         """
-        depth = 1  # Start at depth 1 for top-level symbols
-        
-        # Count how many class symbols contain this symbol
-        # Only classes count as depth-increasing containers for this use case
-        for other in sorted_symbols:
-            if (other != symbol and 
-                other.start_byte <= symbol.start_byte and 
-                other.end_byte >= symbol.end_byte and
-                other.kind == SymbolKind.CLASS):
-                depth += 1
-        
-        return depth
+        class_stack = []
+        
+        for symbol in sorted(symbols, key=_position_key):
+            # Pop classes that don't contain this symbol
+            while class_stack and class_stack[-1].end_byte < symbol.end_byte:
+                class_stack.pop()
+            
+            yield symbol, (class_stack[-1] if class_stack else None), len(class_stack) + 1
+            
+            # Only classes count as depth-increasing containers
+            if symbol.kind == SymbolKind.CLASS:
+                class_stack.append(symbol)
+
+
+def _position_key(symbol: CodeSymbol) -> Tuple[int, int]:
+    """Sort key placing enclosing symbols before the symbols they contain."""
+    return (symbol.start_byte, -symbol.end_byte)
 
 
-def create_extractor(file_path: str) -> CodeExtractor:
+def create_extractor(file_path: str, symbol_index: Optional[SymbolIndex] = None) -> CodeExtractor:
     """
     Create a CodeExtractor for a file.
     
     Args:
         file_path: Path to the source file
+        symbol_index: Optional on-disk symbol index for the extractor to use
         
     Returns:
         CodeExtractor instance
@@ -486,4 +539,4 @@ def create_extractor(file_path: str) -> CodeExtractor:
         ValueError: If file language is not supported
     """
     language = get_language_for_file(file_path)
-    return CodeExtractor(language)
\ No newline at end of file
+    return CodeExtractor(language, symbol_index=symbol_index)
\ No newline at end of file
@@ -3,6 +3,7 @@
 from pathlib import Path
 from typing import Optional, Union
 
+from .source_buffer import SourceBuffer
 from .vcs.factory import detect_vcs_provider
 from .url_fetcher import is_url, fetch_url_content
 
@@ -42,4 +43,79 @@ def get_file_content(path_or_url: Union[str, Path], revision: Optional[str] = No
     if not vcs_provider:
         raise ValueError(f"No VCS found for {path_obj}")
     
-    return vcs_provider.get_file_content(path_obj, revision)
\ No newline at end of file
+    return vcs_provider.get_file_content(path_obj, revision)
+
+
+def read_source(path_or_url: Union[str, Path], revision: Optional[str] = None) -> SourceBuffer:
+    """
+    Get file content as a SourceBuffer for parsing.
+    
+    Local files are read as bytes and never decoded as a whole. They are
+    not memory-mapped: a file truncated while its buffer is alive would kill
+    the server with SIGBUS, and the parse cache keeps its own copy of any
+    source it caches anyway. URL and VCS content is encoded once.
+    
+    Line endings are normalized to '\n' as get_file_content does, so both
+    report the same lines and offsets.
+    
+    Args:
+        path_or_url: Path to file, or URL to fetch (GitHub raw, GitLab raw, direct file URL)
+        revision: Optional VCS revision (commit, branch, tag, etc.) - not supported for URLs
+    
+    Returns:
+        SourceBuffer over the file content
+        
+    Raises:
+        ValueError: If revision is specified with URL, or if no VCS found for path
+        URLFetchError: For URL-related errors (network, timeout, content issues)
+    """
+    if revision is not None or is_url(str(path_or_url)):
+        return SourceBuffer.from_text(get_file_content(path_or_url, revision))
+    
+    with open(path_or_url, 'rb') as f:
+        data = f.read()
+    
+    if b'\r' in data:
+        data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    return SourceBuffer(data)
+
+
+def working_tree_path(path_or_url: Union[str, Path], revision: Optional[str] = None) -> Optional[str]:
+    """
+    Get the path under which a read should be tracked for incremental reparsing.
+    
+    Only reads of a local file's working-tree content have a stable identity;
+    content at a revision or from a URL is a different version of the file
+    and must not take over the path's slot in the parse cache.
+    
+    Returns:
+        The path as a string, or None for revision and URL reads
+    """
+    if revision is not None or is_url(str(path_or_url)):
+        return None
+    return str(path_or_url)
+
+
+def resolve_revision(path: Union[str, Path], revision: str) -> str:
+    """
+    Resolve a symbolic VCS revision (HEAD~1, branch, tag) to an immutable one.
+    
+    Resolving once and reading every file at the result gives a batch of
+    reads a consistent snapshot and lets them share immutable caches.
+    
+    Args:
+        path: Any path inside the repository
+        revision: VCS revision to resolve
+    
+    Returns:
+        Immutable revision identifier (a commit SHA for git)
+        
+    Raises:
+        ValueError: If no VCS found for path
+    """
+    path_obj = Path(path)
+    vcs_provider = detect_vcs_provider(path_obj)
+    if not vcs_provider:
+        raise ValueError(f"No VCS found for {path_obj}")
+    
+    return vcs_provider.resolve_revision(path_obj, revision)
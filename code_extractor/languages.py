@@ -3,8 +3,8 @@ Language detection and parser management for tree-sitter.
 """
 
 import os
-from typing import Dict, Optional
-from tree_sitter import Language, Parser
+from typing import Dict, List, Optional, Tuple
+from tree_sitter import Language, Node, Parser, Query
 from tree_sitter_language_pack import get_language, get_parser
 
 
@@ -124,3 +124,49 @@ def is_language_supported(language: str) -> bool:
         True if supported, False otherwise
     """
     return get_tree_sitter_parser(language) is not None
+
+
+def query_captures(query: Query, node: Node) -> List[Tuple[Node, str]]:
+    """
+    Run a query and return its captures as (node, capture_name) tuples.
+    
+    py-tree-sitter 0.23 returns captures grouped by name in a dict, where
+    earlier releases returned a flat list in document order. This flattens
+    either form into the list shape, ordered by position in the source.
+    
+    Args:
+        query: Compiled tree-sitter query
+        node: Node to run the query on
+        
+    Returns:
+        List of (node, capture_name) tuples
+    """
+    captures = query.captures(node)
+    if not isinstance(captures, dict):
+        return captures
+    
+    flattened = [(captured, name) for name, nodes in captures.items() for captured in nodes]
+    flattened.sort(key=lambda capture: capture[0].start_byte)
+    return flattened
+
+
+def query_matches(query: Query, node: Node) -> List[Dict[str, Node]]:
+    """
+    Run a query and return each pattern match as a capture_name -> node dict.
+    
+    Unlike query_captures this keeps the captures of one match together, e.g.
+    a definition and its name. py-tree-sitter 0.23 gives a list of nodes per
+    capture name where earlier releases gave a single node; quantified
+    captures are not used in the bundled queries, so the first node is kept.
+    
+    Args:
+        query: Compiled tree-sitter query
+        node: Node to run the query on
+        
+    Returns:
+        List of dicts mapping capture name to node, one per match
+    """
+    return [
+        {name: nodes[0] if isinstance(nodes, list) else nodes for name, nodes in captures.items()}
+        for _, captures in query.matches(node)
+    ]
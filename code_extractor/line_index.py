@@ -0,0 +1,87 @@
+"""Line/byte offset conversion for source buffers."""
+
+from bisect import bisect_right
+from itertools import accumulate
+from typing import List, Tuple
+
+
+class LineIndex:
+    """
+    Table of line start byte offsets for one source buffer.
+
+    Built once per source in a single C-level pass, after which converting a
+    byte offset to a line number is a binary search instead of counting the
+    newlines in the prefix. Lines are separated by '\\n' only, matching the
+    rows tree-sitter reports in node points. Line numbers are 1-based.
+    """
+
+    def __init__(self, source_bytes: bytes):
+        self.source_bytes = source_bytes
+        # Each line starts one byte past the end of the previous one
+        lengths = map(len, source_bytes.split(b'\n')[:-1])
+        self.line_starts: List[int] = list(accumulate(map((1).__add__, lengths), initial=0))
+
+    @property
+    def line_count(self) -> int:
+        """Number of lines, not counting the empty line after a trailing newline."""
+        if self.line_starts[-1] == len(self.source_bytes):
+            return len(self.line_starts) - 1
+        return len(self.line_starts)
+
+    def line_at(self, byte_offset: int) -> int:
+        """
+        Get the line containing a byte offset.
+
+        Args:
+            byte_offset: Offset into the source buffer
+
+        Returns:
+            1-based line number
+        """
+        return bisect_right(self.line_starts, byte_offset)
+
+    def line_start(self, line: int) -> int:
+        """Byte offset where a 1-based line starts, clamped to the buffer."""
+        if line < 1:
+            return 0
+        if line > len(self.line_starts):
+            return len(self.source_bytes)
+        return self.line_starts[line - 1]
+
+    def byte_range(self, start_line: int, end_line: int) -> Tuple[int, int]:
+        """
+        Get the byte range covering an inclusive range of lines.
+
+        Args:
+            start_line: First line (1-based)
+            end_line: Last line (inclusive), including its line ending
+
+        Returns:
+            (start_byte, end_byte) tuple
+        """
+        return self.line_start(start_line), self.line_start(end_line + 1)
+
+    def get_text(self, start_line: int, end_line: int) -> str:
+        """Text of an inclusive range of lines, line endings included."""
+        start, end = self.byte_range(start_line, end_line)
+        return self.source_bytes[start:end].decode('utf-8')
+
+    def get_lines(self, start_line: int, end_line: int) -> List[str]:
+        """
+        Get an inclusive range of lines without their line endings.
+
+        Lines outside the buffer are ignored, so callers can ask for context
+        around a match without clamping first.
+
+        Args:
+            start_line: First line (1-based)
+            end_line: Last line (inclusive)
+
+        Returns:
+            List of line strings
+        """
+        start_line = max(1, start_line)
+        end_line = min(self.line_count, end_line)
+        if start_line > end_line:
+            return []
+        return [line.rstrip('\r') for line in self.get_text(start_line, end_line).split('\n')[:end_line - start_line + 1]]
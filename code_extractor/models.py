@@ -53,6 +53,7 @@ class CodeSymbol:
     
     # Hierarchical context
     parent: Optional[str] = None  # Class name for methods, module for top-level
+    qualified_name: Optional[str] = None  # Dotted path through enclosing definitions, e.g. "Outer.method"
     
     # Function/method details
     parameters: List[Parameter] = field(default_factory=list)
@@ -108,6 +109,8 @@ class CodeSymbol:
         # Add rich context if available
         if self.parent:
             result["parent"] = self.parent
+        if self.qualified_name and self.qualified_name != self.name:
+            result["qualified_name"] = self.qualified_name
         if self.parameters:
             result["parameters"] = [str(p) for p in self.parameters]
         if self.return_type:
@@ -192,4 +195,33 @@ class SearchParameters:
     file_patterns: List[str] = field(default_factory=lambda: ["*"])
     exclude_patterns: List[str] = field(default_factory=lambda: ["*.pyc", "*.pyo", "*.pyd", "__pycache__/*", ".git/*", ".svn/*", "node_modules/*", "*.min.js"])
     max_files: int = 1000
-    follow_symlinks: bool = False
\ No newline at end of file
+    follow_symlinks: bool = False
+    respect_gitignore: bool = True  # Enumerate work-tree files via git when inside a repository
+    workers: int = 1  # Worker processes for directory search (1=serial, 0=one per CPU)
+    
+    # Search budget
+    deadline: Optional[float] = None  # time.time() after which no more files are searched
+    max_bytes: Optional[int] = None  # Source bytes to parse before the search stops
+
+
+@dataclass
+class SearchStats:
+    """Counters for one file or directory search, filled in while it runs."""
+    files_total: int = 0
+    files_searched: int = 0
+    bytes_searched: int = 0
+    matches: int = 0
+    
+    # Why the search stopped early: "max_files", "max_results", "max_bytes",
+    # "deadline" or "cancelled"; None if every matching file was searched
+    truncated: Optional[str] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for MCP compatibility."""
+        return {
+            "truncated": self.truncated,
+            "files_total": self.files_total,
+            "files_searched": self.files_searched,
+            "bytes_searched": self.bytes_searched,
+            "matches": self.matches
+        }
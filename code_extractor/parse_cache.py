@@ -0,0 +1,243 @@
+"""Content-addressed cache of tree-sitter parse trees."""
+
+import hashlib
+import os
+import threading
+from typing import Any, Optional, Tuple
+
+from cachetools import LRUCache
+
+
+# Configuration constants
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024  # 64MB of source
+DEFAULT_TRACKED_PATHS = 1024
+_COMPARE_CHUNK = 4096
+
+# Environment variable overrides
+CACHE_BYTES = int(os.environ.get('MCP_PARSE_CACHE_BYTES', DEFAULT_CACHE_BYTES))
+
+
+def content_hash(source_bytes: bytes) -> str:
+    """
+    Hash source content for use as a cache key.
+
+    Args:
+        source_bytes: Source code as bytes
+
+    Returns:
+        Hex digest identifying the content
+    """
+    return hashlib.blake2b(source_bytes, digest_size=16).hexdigest()
+
+
+def _common_prefix_length(a: bytes, b: bytes) -> int:
+    """Length of the common prefix of two byte strings."""
+    limit = min(len(a), len(b))
+    view_a, view_b = memoryview(a), memoryview(b)
+    pos = 0
+    # Compare whole chunks first so the byte-by-byte scan only covers one chunk
+    while pos + _COMPARE_CHUNK <= limit and view_a[pos:pos + _COMPARE_CHUNK] == view_b[pos:pos + _COMPARE_CHUNK]:
+        pos += _COMPARE_CHUNK
+    while pos < limit and a[pos] == b[pos]:
+        pos += 1
+    return pos
+
+
+def _common_suffix_length(a: bytes, b: bytes, limit: int) -> int:
+    """Length of the common suffix of two byte strings, at most ``limit``."""
+    len_a, len_b = len(a), len(b)
+    view_a, view_b = memoryview(a), memoryview(b)
+    n = 0
+    while (n + _COMPARE_CHUNK <= limit and
+           view_a[len_a - n - _COMPARE_CHUNK:len_a - n] == view_b[len_b - n - _COMPARE_CHUNK:len_b - n]):
+        n += _COMPARE_CHUNK
+    while n < limit and a[len_a - n - 1] == b[len_b - n - 1]:
+        n += 1
+    return n
+
+
+def _point_at(source_bytes: bytes, offset: int) -> Tuple[int, int]:
+    """Tree-sitter (row, byte column) point for a byte offset."""
+    row = source_bytes.count(b'\n', 0, offset)
+    column = offset - (source_bytes.rfind(b'\n', 0, offset) + 1)
+    return (row, column)
+
+
+class _CacheEntry:
+    """A parsed tree together with the source it was parsed from."""
+
+    __slots__ = ('tree', 'source_bytes')
+
+    def __init__(self, tree: Any, source_bytes: bytes):
+        self.tree = tree
+        self.source_bytes = source_bytes
+
+    @property
+    def size(self) -> int:
+        # Tree memory is not exposed by tree-sitter; it scales with the source
+        return max(1, len(self.source_bytes))
+
+
+class ParseCache:
+    """
+    Bounded LRU cache of parse trees keyed by (language, content hash).
+
+    The cache is bounded by the total size of the cached sources, so a few
+    very large files cannot crowd out memory the way an entry count would allow.
+
+    When a path is given, the cache also remembers which content was last
+    parsed for it. If that path comes back with different content, the old
+    tree is edited to match and handed to tree-sitter so unchanged subtrees
+    are reused instead of reparsing the whole file.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_BYTES, max_paths: int = DEFAULT_TRACKED_PATHS):
+        self._cache: LRUCache = LRUCache(maxsize=max_bytes, getsizeof=lambda entry: entry.size)
+        self._paths: LRUCache = LRUCache(maxsize=max_paths)  # path -> (lang, content_hash)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.incremental = 0
+
+    def parse(self, parser: Any, language: str, source_bytes: bytes, path: Optional[str] = None) -> Any:
+        """
+        Parse source code, reusing a cached tree for identical content.
+
+        Args:
+            parser: tree-sitter parser for the language
+            language: Language name, part of the cache key
+            source_bytes: Source code as bytes or any buffer (e.g. a bytearray)
+            path: Optional file path, enables incremental reparsing when the
+                file's content changes between calls
+
+        Returns:
+            tree-sitter Tree for the source
+        """
+        if not isinstance(source_bytes, bytes) and len(source_bytes) <= self._cache.maxsize:
+            # Cached sources outlive the caller's buffer, which may be
+            # mutated after this call returns; keep a private copy
+            source_bytes = bytes(source_bytes)
+        key = (language, content_hash(source_bytes))
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self.hits += 1
+                if path is not None:
+                    self._paths[path] = key
+                return entry.tree
+            self.misses += 1
+            previous = None
+            if path is not None and isinstance(source_bytes, bytes):
+                previous = self._previous(path, language)
+
+        if previous is not None:
+            tree = parser.parse(source_bytes, self._edit_tree(parser, previous, source_bytes))
+        else:
+            tree = parser.parse(source_bytes)
+
+        self._store(key, _CacheEntry(tree, source_bytes))
+        with self._lock:
+            if previous is not None:
+                self.incremental += 1
+            if path is not None:
+                self._paths[path] = key
+        return tree
+
+    def _previous(self, path: str, language: str) -> Optional[_CacheEntry]:
+        """
+        Get the entry last parsed for a path, to use as an incremental base.
+
+        The entry stays cached for its own content: only a clone of its tree
+        is edited, and the same content may come back (e.g. a file read both
+        from the work tree and at a revision). Caller must hold the lock.
+        """
+        previous_key = self._paths.get(path)
+        if previous_key is None or previous_key[0] != language:
+            return None
+        return self._cache.get(previous_key)
+
+    @staticmethod
+    def _edit_tree(parser: Any, previous: _CacheEntry, source_bytes: bytes) -> Any:
+        """
+        Return a copy of the previous tree with the single edit that turns the
+        previous source into the new one applied.
+
+        Tree.edit mutates in place and another thread may still be walking the
+        tree it got from the cache, so the edit goes to a clone. Reparsing
+        unchanged content against its own tree reuses every node, which makes
+        it a cheap copy; shared subtrees are then copied on write by the edit.
+        """
+        old = previous.source_bytes
+        base = parser.parse(old, previous.tree)
+        start = _common_prefix_length(old, source_bytes)
+        suffix = _common_suffix_length(old, source_bytes, min(len(old), len(source_bytes)) - start)
+        old_end = len(old) - suffix
+        new_end = len(source_bytes) - suffix
+
+        base.edit(
+            start_byte=start,
+            old_end_byte=old_end,
+            new_end_byte=new_end,
+            start_point=_point_at(old, start),
+            old_end_point=_point_at(old, old_end),
+            new_end_point=_point_at(source_bytes, new_end),
+        )
+        return base
+
+    def _store(self, key: Tuple[str, str], entry: _CacheEntry) -> None:
+        with self._lock:
+            try:
+                self._cache[key] = entry
+            except ValueError:
+                pass  # Larger than the whole budget; don't cache it
+
+    def forget(self, path: str) -> None:
+        """
+        Stop tracking a path, e.g. after the file was deleted.
+
+        Its tree stays cached: entries are keyed by content, which other
+        paths may share, and the LRU budget evicts it if nothing does.
+        """
+        with self._lock:
+            self._paths.pop(path, None)
+
+    def clear(self) -> None:
+        """Drop all cached trees and reset statistics."""
+        with self._lock:
+            self._cache.clear()
+            self._paths.clear()
+            self.hits = 0
+            self.misses = 0
+            self.incremental = 0
+
+    def stats(self) -> dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with cache statistics
+        """
+        with self._lock:
+            return {
+                'entries': len(self._cache),
+                'bytes': self._cache.currsize,
+                'max_bytes': self._cache.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'incremental': self.incremental,
+            }
+
+
+# Process-wide cache shared by the extractor, search engine and server tools
+parse_cache = ParseCache()
+
+
+def clear_parse_cache() -> None:
+    """Clear the shared parse cache."""
+    parse_cache.clear()
+
+
+def get_parse_cache_stats() -> dict:
+    """Get statistics for the shared parse cache."""
+    return parse_cache.stats()
@@ -0,0 +1,189 @@
+"""Building an index directory ahead of time and adopting it at server startup."""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from .call_index import CALL_INDEX_FILENAME, CallIndex
+from .file_reader import read_source
+from .parse_cache import content_hash
+from .search_engine import ProgressCallback, SearchEngine
+from .symbol_index import INDEX_FILENAME, SymbolIndex
+from .trigram_index import TRIGRAM_INDEX_FILENAME, TrigramIndex
+
+
+# Configuration constants
+MANIFEST_FILENAME = "manifest.json"
+_RESTAMP_BATCH = 256  # Files checked per write, so adopted entries are served as they're found
+
+# Environment variable overrides; where the indexed tree is checked out now,
+# if not where the index was built
+INDEX_ROOT = os.environ.get('MCP_INDEX_ROOT')
+
+
+def build_index(directory: Union[str, Path], index_dir: Union[str, Path], workers: int = 0,
+                progress: Optional[ProgressCallback] = None) -> dict:
+    """
+    Parse a whole tree and write its symbol, call and trigram indexes.
+
+    A manifest recording the tree's root is written next to the indexes, so
+    the directory can be shipped with a checkout and adopted by load_index
+    wherever that checkout ends up.
+
+    Args:
+        directory: Root of the tree to index
+        index_dir: Directory to write the indexes to
+        workers: Worker processes (1=serial, 0=one per CPU)
+        progress: Optional callback with (files_done, files_total, symbols_found)
+
+    Returns:
+        Dictionary with build statistics
+    """
+    root = Path(directory).resolve()
+    index_dir = Path(index_dir).expanduser()
+    started = time.perf_counter()
+
+    symbols = SymbolIndex(index_dir / INDEX_FILENAME)
+    calls = CallIndex(index_dir / CALL_INDEX_FILENAME)
+    trigrams = TrigramIndex(index_dir / TRIGRAM_INDEX_FILENAME)
+    engine = SearchEngine(trigram_index=trigrams, symbol_index=symbols, call_index=calls)
+    try:
+        totals = engine.index_directory(str(root), workers=workers, progress=progress)
+    finally:
+        engine.shutdown()
+        for index in (symbols, calls, trigrams):
+            index.close()
+
+    _write_manifest(index_dir, root)
+    return {**totals, 'root': str(root), 'index_dir': str(index_dir),
+            'seconds': round(time.perf_counter() - started, 3)}
+
+
+def load_index(index_dir: Union[str, Path], root: Optional[Union[str, Path]] = INDEX_ROOT) -> dict:
+    """
+    Adopt a prebuilt index directory for the tree as it is on disk now.
+
+    Runs relocate_index and then adopt_index. Adopting reads and hashes
+    every file whose mtime changed, which after a fresh checkout is the
+    whole tree, so the server runs the two steps separately and adopts in
+    the background.
+
+    Args:
+        index_dir: Directory holding the indexes and their manifest
+        root: Where the indexed tree is checked out now, default its build location
+
+    Returns:
+        Dictionary with the number of current, adopted and stale files, or
+        an empty dictionary if the directory has no manifest
+    """
+    root = relocate_index(index_dir, root)
+    if root is None:
+        return {}
+    return adopt_index(index_dir, root)
+
+
+def relocate_index(index_dir: Union[str, Path], root: Optional[Union[str, Path]] = INDEX_ROOT) -> Optional[str]:
+    """
+    Move a prebuilt index's entries to where its tree is checked out now.
+
+    Only paths are rewritten and no file is read, so this is cheap enough to
+    run before the server starts serving. Directories without a manifest
+    (indexes the server filled in itself) are left alone.
+
+    Args:
+        index_dir: Directory holding the indexes and their manifest
+        root: Where the indexed tree is checked out now, default its build location
+
+    Returns:
+        The tree's root, or None if the directory has no manifest
+    """
+    index_dir = Path(index_dir).expanduser()
+    manifest_path = index_dir / MANIFEST_FILENAME
+    if not manifest_path.is_file():
+        return None
+    built_root = json.loads(manifest_path.read_text(encoding='utf-8'))['root']
+    root = Path(root).resolve() if root else Path(built_root)
+
+    if str(root) != built_root:
+        indexes = _open_indexes(index_dir)
+        try:
+            for index in indexes:
+                index.relocate(built_root, root)
+        finally:
+            for index in indexes:
+                index.close()
+        _write_manifest(index_dir, root)
+    return str(root)
+
+
+def adopt_index(index_dir: Union[str, Path], root: Union[str, Path]) -> dict:
+    """
+    Re-stamp prebuilt entries whose file changed mtime but not content.
+
+    A fresh checkout gives every file a new mtime. Entries whose file has
+    the same size and content hash as when it was indexed are re-stamped
+    rather than left stale; only files that really changed are parsed
+    again, on first use. Files in languages the symbol extractor has no
+    query for have no symbol entry to vouch for them, so they are
+    re-parsed too.
+
+    Every file whose mtime changed is read and hashed, so this takes time
+    in proportion to the tree. Entries are re-stamped in batches as they
+    are confirmed, and searches running meanwhile simply re-parse files
+    not confirmed yet: a re-stamp only applies to an entry that still has
+    the stamp it was built with.
+
+    Args:
+        index_dir: Directory holding the indexes
+        root: Where the indexed tree is checked out now
+
+    Returns:
+        Dictionary with the number of current, adopted and stale files
+    """
+    indexes = _open_indexes(Path(index_dir).expanduser())
+    symbols = indexes[0]
+    try:
+        stats = {'current': 0, 'adopted': 0, 'stale': 0}
+        stamps: List[Tuple[str, Tuple[int, int], Tuple[int, int]]] = []
+        for path, (mtime_ns, size, digest) in symbols.file_stamps().items():
+            try:
+                stat = os.stat(path)
+                if (stat.st_mtime_ns, stat.st_size) == (mtime_ns, size):
+                    stats['current'] += 1
+                    continue
+                unchanged = stat.st_size == size and content_hash(read_source(path).data) == digest
+            except OSError:
+                unchanged = False
+            if unchanged:
+                stamps.append((path, (mtime_ns, size), (stat.st_mtime_ns, stat.st_size)))
+                stats['adopted'] += 1
+            else:
+                stats['stale'] += 1
+            if len(stamps) >= _RESTAMP_BATCH:
+                _restamp(indexes, stamps)
+                stamps = []
+        _restamp(indexes, stamps)
+    finally:
+        for index in indexes:
+            index.close()
+    return {**stats, 'root': str(root)}
+
+
+def _open_indexes(index_dir: Path) -> Tuple[SymbolIndex, CallIndex, TrigramIndex]:
+    return (SymbolIndex(index_dir / INDEX_FILENAME), CallIndex(index_dir / CALL_INDEX_FILENAME),
+            TrigramIndex(index_dir / TRIGRAM_INDEX_FILENAME))
+
+
+def _restamp(indexes: Tuple[SymbolIndex, CallIndex, TrigramIndex],
+             stamps: List[Tuple[str, Tuple[int, int], Tuple[int, int]]]) -> None:
+    # All three were built from the same content, so the symbol index's
+    # content hash vouches for the call and trigram entries too
+    for index in indexes:
+        index.restamp(stamps)
+
+
+def _write_manifest(index_dir: Path, root: Path) -> None:
+    manifest = {'root': str(root)}
+    (index_dir / MANIFEST_FILENAME).write_text(json.dumps(manifest, indent=2) + "\n", encoding='utf-8')
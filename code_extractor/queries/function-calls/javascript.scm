@@ -0,0 +1,6 @@
+; Tree-sitter query for JavaScript function call search
+
+; Calls like func(), obj.method() and obj.prop.method()
+(call_expression
+  function: [(identifier) (member_expression)] @callee
+) @call
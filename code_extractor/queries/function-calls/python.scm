@@ -0,0 +1,6 @@
+; Tree-sitter query for Python function call search
+
+; Calls like func(), obj.method() and obj.attr.method()
+(call
+  function: [(identifier) (attribute)] @callee
+) @call
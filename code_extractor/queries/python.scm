@@ -45,7 +45,8 @@
     parameters: (parameters) @decorated_function.parameters
     return_type: (type)? @decorated_function.return_type) @decorated_function.definition)
 
-; Variables and constants (simple assignments)
+; Variables and constants (simple assignments, and annotations without a value)
 (assignment
   left: (identifier) @variable.name
-  right: (_) @variable.value) @variable.definition
\ No newline at end of file
+  type: (type)? @variable.type
+  right: (_)? @variable.value) @variable.definition
\ No newline at end of file
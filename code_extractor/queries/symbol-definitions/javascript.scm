@@ -0,0 +1,25 @@
+; Tree-sitter query for JavaScript symbol definition search
+
+; Function declarations
+(function_declaration
+  name: (identifier) @function_name
+) @function_def
+
+; Class declarations
+(class_declaration
+  name: (identifier) @class_name
+) @class_def
+
+; Variable declarations
+(variable_declaration
+  (variable_declarator
+    name: (identifier) @variable_name
+  )
+) @variable_def
+
+; Const declarations
+(lexical_declaration
+  (variable_declarator
+    name: (identifier) @variable_name
+  )
+) @const_def
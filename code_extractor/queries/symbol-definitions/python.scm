@@ -0,0 +1,16 @@
+; Tree-sitter query for Python symbol definition search
+
+; Function definitions
+(function_definition
+  name: (identifier) @function_name
+) @function_def
+
+; Class definitions
+(class_definition
+  name: (identifier) @class_name
+) @class_def
+
+; Variable assignments
+(assignment
+  left: (identifier) @variable_name
+) @variable_def
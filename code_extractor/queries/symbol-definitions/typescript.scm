@@ -0,0 +1,35 @@
+; Tree-sitter query for TypeScript symbol definition search
+
+; Function declarations
+(function_declaration
+  name: (identifier) @function_name
+) @function_def
+
+; Class declarations
+(class_declaration
+  name: (identifier) @class_name
+) @class_def
+
+; Interface declarations
+(interface_declaration
+  name: (type_identifier) @interface_name
+) @interface_def
+
+; Type alias declarations
+(type_alias_declaration
+  name: (type_identifier) @type_name
+) @type_def
+
+; Variable declarations
+(variable_declaration
+  (variable_declarator
+    name: (identifier) @variable_name
+  )
+) @variable_def
+
+; Const declarations
+(lexical_declaration
+  (variable_declarator
+    name: (identifier) @variable_name
+  )
+) @const_def
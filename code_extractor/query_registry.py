@@ -0,0 +1,122 @@
+"""Process-wide registry of compiled tree-sitter queries."""
+
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from tree_sitter import Query
+
+from .languages import get_tree_sitter_language
+
+
+# Configuration constants
+QUERY_DIR = Path(__file__).parent / "queries"
+SYMBOLS_QUERY = "symbols"
+
+
+class QueryRegistry:
+    """
+    Lazily compiled tree-sitter queries, one per (language, query type).
+
+    Symbol extraction queries live in ``queries/<language>.scm``; every other
+    query type lives in ``queries/<query type>/<language>.scm`` (e.g. the
+    ``function-calls`` search). Each file is read once and compiled the first
+    time it is asked for. Missing or invalid query files are remembered as
+    None so they are not retried on every call.
+
+    A compiled query carries its own cursor state, so compiled queries are
+    kept per thread; tool calls running on different executor threads never
+    share one.
+    """
+
+    def __init__(self, query_dir: Path = QUERY_DIR):
+        self.query_dir = Path(query_dir)
+        self._sources: Dict[Tuple[str, str], Optional[str]] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def query_path(self, language: str, query_type: str = SYMBOLS_QUERY) -> Path:
+        """Path of the .scm file for a language and query type."""
+        if query_type == SYMBOLS_QUERY:
+            return self.query_dir / f"{language}.scm"
+        return self.query_dir / query_type / f"{language}.scm"
+
+    def get(self, language: str, query_type: str = SYMBOLS_QUERY) -> Optional[Query]:
+        """
+        Get the compiled query for a language.
+
+        Args:
+            language: Language name
+            query_type: SYMBOLS_QUERY, or a search type such as "function-calls"
+
+        Returns:
+            Compiled Query, or None if the language has no such query
+        """
+        key = (language, query_type)
+        compiled = self._compiled()
+        try:
+            return compiled[key]
+        except KeyError:
+            compiled[key] = self._compile(language, query_type)
+            return compiled[key]
+
+    def _compiled(self) -> Dict[Tuple[str, str], Optional[Query]]:
+        """This thread's compiled queries."""
+        try:
+            return self._local.queries
+        except AttributeError:
+            self._local.queries = {}
+            return self._local.queries
+
+    def _read_source(self, language: str, query_type: str) -> Optional[str]:
+        key = (language, query_type)
+        with self._lock:
+            if key not in self._sources:
+                query_file = self.query_path(language, query_type)
+                self._sources[key] = query_file.read_text(encoding='utf-8') if query_file.exists() else None
+            return self._sources[key]
+
+    def _compile(self, language: str, query_type: str) -> Optional[Query]:
+        source = self._read_source(language, query_type)
+        ts_language = get_tree_sitter_language(language)
+        if ts_language is None or source is None:
+            return None
+
+        try:
+            return ts_language.query(source)
+        except Exception:
+            return None
+
+    def clear(self) -> None:
+        """Drop all loaded and compiled queries."""
+        with self._lock:
+            self._sources.clear()
+            self._local = threading.local()
+
+    def stats(self) -> dict:
+        """
+        Get registry statistics.
+
+        Returns:
+            Dictionary with registry statistics
+        """
+        with self._lock:
+            loaded = len(self._sources)
+        return {
+            'queries': loaded,
+            'compiled': sum(1 for q in self._compiled().values() if q is not None),
+        }
+
+
+# Process-wide registry shared by the extractor and search engine
+query_registry = QueryRegistry()
+
+
+def get_query(language: str, query_type: str = SYMBOLS_QUERY) -> Optional[Query]:
+    """Get a compiled query from the shared registry."""
+    return query_registry.get(language, query_type)
+
+
+def clear_query_registry() -> None:
+    """Clear the shared query registry."""
+    query_registry.clear()
@@ -5,16 +5,116 @@ Provides sophisticated pattern matching beyond simple text search,
 leveraging syntax tree structure for accurate code understanding.
 """
 
-from typing import List, Optional, Dict, Any, Set, Tuple
+from typing import List, Optional, Dict, Any, Set, Tuple, Iterator, Callable, Union
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, replace
+from itertools import islice
 import os
 import fnmatch
-from tree_sitter import Node, Query
-from tree_sitter_language_pack import get_parser, get_language
+import functools
+import multiprocessing
+import sys
+import threading
+import time
+from tree_sitter import Node
+from tree_sitter_language_pack import get_parser
 
-from .models import SearchResult, SearchParameters
-from .file_reader import get_file_content
-from .languages import get_language_for_file
+from .models import CodeSymbol, SearchResult, SearchParameters, SearchStats, SymbolKind
+from .file_reader import read_source, resolve_revision, working_tree_path
+from .languages import get_language_for_file, query_matches
+from .extractor import CodeExtractor
+from .vcs.factory import detect_vcs_provider
+from .parse_cache import ParseCache, content_hash, parse_cache
+from .query_registry import get_query
+from .source_buffer import SourceBuffer
+from .symbol_index import SymbolIndex, SymbolLocation
+from .trigram_index import TrigramIndex, word_trigrams
+from .call_index import CallIndex, CallSite, callee_matches, normalize_callee
+
+
+# Configuration constants
+DEFAULT_WORKERS = 1
+
+# Environment variable overrides
+SEARCH_WORKERS = int(os.environ.get('MCP_SEARCH_WORKERS', DEFAULT_WORKERS))
+
+# Called with (files_done, files_total, matches_found) as a search advances
+ProgressCallback = Callable[[int, int, int], None]
+
+# symbol_type reported for indexed symbols, matching the symbol-definitions
+# query captures; kinds left out (imports) are not definitions
+INDEXED_SYMBOL_TYPES = {
+    SymbolKind.CLASS: "class",
+    SymbolKind.FUNCTION: "function",
+    SymbolKind.METHOD: "function",
+    SymbolKind.VARIABLE: "variable",
+    SymbolKind.CONSTANT: "variable",
+    SymbolKind.INTERFACE: "interface",
+    SymbolKind.TYPE_ALIAS: "type",
+    SymbolKind.ENUM: "enum",
+}
+
+
+@dataclass
+class IndexedFile:
+    """Everything the on-disk indexes record for one file, as extracted by an index build."""
+    path: str
+    language: str
+    stat: os.stat_result  # Taken before the file was read
+    content_hash: str
+    symbols: Optional[List[CodeSymbol]]  # None if the language has no symbol query
+    calls: List[CallSite]
+    trigrams: Set[int]
+
+
+def _call_sites(query: Any, source: SourceBuffer, tree: Any) -> Iterator[Tuple[Node, str]]:
+    """Yield (call node, normalized callee) for each call a function-calls query matches."""
+    for match in query_matches(query, tree.root_node):
+        call, callee = match.get('call'), match.get('callee')
+        if call is not None and callee is not None:
+            yield call, normalize_callee(source.node_text(callee))
+
+
+def _prefilter_needle(params: SearchParameters) -> bytes:
+    """
+    Bytes every file with a match must contain.
+    
+    A call matches on its callee's dotted name, which may be split by
+    whitespace in the source, so only the final name is certain to appear.
+    """
+    if params.search_type == "function-calls":
+        return normalize_callee(params.target).rpartition('.')[2].encode('utf-8')
+    return params.target.encode('utf-8')
+
+
+# Worker processes must not be forked: the server is multi-threaded, and a
+# fork taken while another thread holds a lock (parse cache, index, query
+# registry) leaves that lock held forever in the child
+_POOL_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# Per-process engine used by pool workers, so parsers and compiled
+# queries are built once per worker rather than once per file
+_worker_engine: Optional["SearchEngine"] = None
+
+
+def _search_file_in_worker(file_path: str, params: SearchParameters) -> Tuple[List[SearchResult], SearchStats]:
+    """Search one file inside a worker process, returning its results and stats."""
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = SearchEngine()
+    stats = SearchStats()
+    return _worker_engine.search_file(file_path, params, stats), stats
+
+
+def _extract_file_in_worker(file_path: str) -> Optional[IndexedFile]:
+    """Extract one file's index entries inside a worker process."""
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = SearchEngine()
+    return _worker_engine.extract_file(file_path)
 
 
 class SearchEngine:
@@ -22,277 +122,637 @@ class SearchEngine:
     Core search engine that executes tree-sitter queries against code files.
     
     Supports caching of parsed ASTs and compiled queries for performance.
+    Files that don't contain the search target as raw bytes are skipped
+    before parsing, and an optional trigram index lets directory searches
+    skip them without reading them at all. With a symbol or call index,
+    symbol-definitions and function-calls searches are answered from the
+    index and only files that changed since they were indexed are parsed.
     """
     
-    def __init__(self):
-        self._ast_cache: Dict[str, Any] = {}  # file_hash -> parsed_tree
-        self._query_cache: Dict[str, Query] = {}  # (lang, pattern) -> compiled_query
+    def __init__(self, ast_cache: Optional[ParseCache] = None,
+                 trigram_index: Optional[TrigramIndex] = None,
+                 symbol_index: Optional[SymbolIndex] = None,
+                 call_index: Optional[CallIndex] = None):
+        self._ast_cache = ast_cache or parse_cache  # (lang, content_hash) -> parsed_tree
+        self.trigram_index = trigram_index
+        self.symbol_index = symbol_index
+        self.call_index = call_index
+        self._local = threading.local()  # per-thread lang -> parser
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_workers = 0
+        self._executor_lock = threading.Lock()
     
-    def search_file(self, file_path: str, params: SearchParameters) -> List[SearchResult]:
-        """Search a single file for the specified pattern."""
+    def search_file(self, file_path: str, params: SearchParameters,
+                    stats: Optional[SearchStats] = None) -> List[SearchResult]:
+        """
+        Search a single file for the specified pattern.
+        
+        Args:
+            file_path: File (or URL) to search
+            params: Search parameters
+            stats: Optional SearchStats to fill in for this file, including
+                "deadline" or "max_bytes" as the reason if the budget stopped
+                the file from being searched
+        """
+        stats = stats if stats is not None else SearchStats()
+        stats.files_total += 1
         try:
+            # Out of time: don't start on another file
+            if params.deadline is not None and time.time() >= params.deadline:
+                stats.truncated = "deadline"
+                return []
+            
             # Get language
             lang_name = params.language or get_language_for_file(file_path)
             if lang_name == 'text':
                 return []  # Skip unsupported languages
             
             # Get file content
-            source_code = get_file_content(file_path, params.git_revision)
-            if not source_code.strip():
+            source = read_source(file_path, params.git_revision)
+            if source.is_blank():
+                return []
+            
+            # A file without the target's name as raw bytes can't match
+            # and isn't worth parsing
+            if _prefilter_needle(params) not in source:
+                return []
+            if params.max_bytes is not None and len(source) > params.max_bytes:
+                stats.truncated = "max_bytes"  # Larger than the whole parse budget
                 return []
             
             # Get or create parser
-            parser = get_parser(lang_name)
-            tree = parser.parse(source_code.encode('utf-8'))
+            parser = self._get_parser(lang_name)
+            tree = self._ast_cache.parse(parser, lang_name, source.data,
+                                         path=working_tree_path(file_path, params.git_revision))
+            stats.files_searched += 1
+            stats.bytes_searched += len(source)
             
             # Route to appropriate search method
+            results = []
             if params.search_type == "function-calls":
-                return self._search_function_calls(file_path, source_code, tree, params, lang_name)
+                results = self._search_function_calls(file_path, source, tree, params, lang_name)
             elif params.search_type == "symbol-definitions":
-                return self._search_symbol_definitions(file_path, source_code, tree, params, lang_name)
+                results = self._search_symbol_definitions(file_path, source, tree, params, lang_name)
             
-            return []
+            stats.matches += len(results)
+            return results
             
         except Exception as e:
             # Log error but don't crash
             print(f"Error searching {file_path}: {e}")
             return []
     
-    def search_directory(self, directory_path: str, params: SearchParameters) -> List[SearchResult]:
-        """Search all matching files in a directory tree."""
-        try:
-            dir_path = Path(directory_path)
-            if not dir_path.exists() or not dir_path.is_dir():
-                print(f"Directory not found or not a directory: {directory_path}")
-                return []
+    def search_directory(self, directory_path: str, params: SearchParameters,
+                         cancel_event: Optional[threading.Event] = None,
+                         progress: Optional[ProgressCallback] = None,
+                         stats: Optional[SearchStats] = None) -> List[SearchResult]:
+        """
+        Search all matching files in a directory tree.
+        
+        Args:
+            directory_path: Directory to search
+            params: Search parameters
+            cancel_event: Optional event that stops the search between files
+                once set; results found so far are returned
+            progress: Optional callback called with (files_done, files_total,
+                matches_found) after each file
+            stats: Optional SearchStats to fill in with counters and the
+                reason the search stopped early, if it did
             
-            # Get all matching files
-            matching_files = self._find_matching_files(dir_path, params)
+        Returns:
+            List of search results
+        """
+        all_results = []
+        try:
+            for result in self.iter_search_directory(directory_path, params, cancel_event, progress, stats):
+                all_results.append(result)
+        except Exception as e:
+            print(f"Error searching directory {directory_path}: {e}")
+            return []
+        
+        # Deduplicate and sort results
+        return self._deduplicate_results(all_results)
+    
+    def iter_search_directory(self, directory_path: str, params: SearchParameters,
+                              cancel_event: Optional[threading.Event] = None,
+                              progress: Optional[ProgressCallback] = None,
+                              stats: Optional[SearchStats] = None) -> Iterator[SearchResult]:
+        """
+        Search a directory tree, yielding results as each file is finished.
+        
+        Files are yielded in walk order whether or not the search runs on the
+        worker pool, so a search limited by max_results, max_files or
+        max_bytes returns the same results either way. Results are not
+        deduplicated; search_directory does that.
+        
+        Args:
+            directory_path: Directory to search
+            params: Search parameters
+            cancel_event: Optional event that stops the search between files
+            progress: Optional callback called with (files_done, files_total,
+                matches_found) after each file
+            stats: Optional SearchStats to fill in as the search runs
             
-            if len(matching_files) > params.max_files:
-                print(f"Found {len(matching_files)} files, limiting to {params.max_files}")
-                matching_files = matching_files[:params.max_files]
+        Yields:
+            Search results, at most params.max_results of them
+        """
+        stats = stats if stats is not None else SearchStats()
+        dir_path = Path(directory_path)
+        if not dir_path.exists() or not dir_path.is_dir():
+            print(f"Directory not found or not a directory: {directory_path}")
+            return
+        
+        # Pin a symbolic revision once so every file is read from the same commit
+        if params.git_revision is not None:
+            params = replace(params, git_revision=resolve_revision(dir_path, params.git_revision))
+        
+        # Walk only as far as needed: one file past the limit tells us we truncated
+        matching_files = list(islice(self._iter_matching_files(dir_path, params), params.max_files + 1))
+        
+        if len(matching_files) > params.max_files:
+            print(f"Found more than {params.max_files} files, limiting to {params.max_files}")
+            matching_files = matching_files[:params.max_files]
+            stats.truncated = "max_files"
+        
+        # The index describes the working tree, not other revisions
+        if self.trigram_index is not None and params.git_revision is None:
+            matching_files = self.trigram_index.candidates(matching_files, _prefilter_needle(params))
+        
+        stats.files_total = len(matching_files)
+        
+        workers = params.workers if params.workers > 0 else (os.cpu_count() or 1)
+        if self._index_for(params) is not None:
+            file_results = self._iter_files_indexed(matching_files, params, cancel_event, stats)
+        elif workers > 1 and len(matching_files) > 1:
+            file_results = self._iter_files_parallel(matching_files, params, workers, cancel_event, stats)
+        else:
+            file_results = self._iter_files_serial(matching_files, params, cancel_event, stats)
+        
+        try:
+            for index, results, file_stats in file_results:
+                # The byte budget is charged in file order with what each file
+                # really parsed, so the same files are searched serially or on
+                # the pool; pool workers only know the whole budget
+                if file_stats.truncated is not None:
+                    stats.truncated = file_stats.truncated
+                    break
+                if params.max_bytes is not None and \
+                        stats.bytes_searched + file_stats.bytes_searched > params.max_bytes:
+                    stats.truncated = "max_bytes"
+                    break
+                stats.files_searched += 1
+                stats.bytes_searched += file_stats.bytes_searched
+                if len(results) > params.max_results - stats.matches:
+                    results = results[:params.max_results - stats.matches]
+                    stats.truncated = "max_results"
+                stats.matches += len(results)
+                if progress is not None:
+                    progress(stats.files_searched, stats.files_total, stats.matches)
+                yield from results
+                
+                # Check if we've hit the max results limit
+                if stats.matches >= params.max_results:
+                    if stats.files_searched < stats.files_total:
+                        stats.truncated = "max_results"
+                    break
+        finally:
+            # Stops the pool's queued files if the caller stops early
+            file_results.close()
+    
+    @staticmethod
+    def _remaining_budget(params: SearchParameters, spent: int) -> SearchParameters:
+        """Parameters for the next file, so it is skipped before parsing if it would overrun max_bytes."""
+        if params.max_bytes is None:
+            return params
+        return replace(params, max_bytes=params.max_bytes - spent)
+    
+    def _stop_reason(self, params: SearchParameters,
+                     cancel_event: Optional[threading.Event]) -> Optional[str]:
+        """Why a directory search should stop before its next file, if it should."""
+        if cancel_event is not None and cancel_event.is_set():
+            return "cancelled"
+        if params.deadline is not None and time.time() >= params.deadline:
+            return "deadline"
+        return None
+    
+    def _iter_files_serial(self, files: List[Path], params: SearchParameters,
+                           cancel_event: Optional[threading.Event],
+                           stats: SearchStats) -> Iterator[Tuple[int, List[SearchResult]]]:
+        """Search files one after another in this process, yielding (index, results, file stats) per file."""
+        spent = 0
+        for index, file_path in enumerate(files):
+            reason = self._stop_reason(params, cancel_event)
+            if reason is not None:
+                stats.truncated = reason
+                return
+            file_stats = SearchStats()
+            try:
+                results = self.search_file(str(file_path), self._remaining_budget(params, spent), file_stats)
+            except Exception as e:
+                print(f"Error searching file {file_path}: {e}")
+                results = []
+            spent += file_stats.bytes_searched
+            yield index, results, file_stats
+    
+    def _iter_files_parallel(self, files: List[Path], params: SearchParameters, workers: int,
+                             cancel_event: Optional[threading.Event],
+                             stats: SearchStats) -> Iterator[Tuple[int, List[SearchResult]]]:
+        """Fan files out over the worker pool, yielding (index, results, file stats) per file in file order."""
+        executor = self._get_executor(workers)
+        futures = {
+            executor.submit(_search_file_in_worker, str(file_path), params): index
+            for index, file_path in enumerate(files)
+        }
+        
+        # Files finished ahead of an earlier, slower file wait here
+        pending: Dict[int, Tuple[List[SearchResult], SearchStats]] = {}
+        next_index = 0
+        try:
+            for future in as_completed(futures):
+                try:
+                    pending[futures[future]] = future.result()
+                except Exception as e:
+                    print(f"Error searching file {files[futures[future]]}: {e}")
+                    pending[futures[future]] = [], SearchStats()
+                while next_index in pending:
+                    yield (next_index, *pending.pop(next_index))
+                    next_index += 1
+                
+                reason = self._stop_reason(params, cancel_event) if next_index < len(files) else None
+                if reason is not None:
+                    stats.truncated = reason
+                    # Keep what already finished rather than waiting on the gaps
+                    for index in sorted(pending):
+                        yield (index, *pending[index])
+                    return
+        finally:
+            # Drop queued files once we have enough (or on cancellation or error)
+            for future in futures:
+                future.cancel()
+    
+    def _index_for(self, params: SearchParameters) -> Optional[Union[SymbolIndex, CallIndex]]:
+        """The index that can answer a search, if the engine has one."""
+        if params.git_revision is not None:
+            return None  # Indexes describe the working tree, not other revisions
+        if params.search_type == "symbol-definitions":
+            return self.symbol_index
+        if params.search_type == "function-calls":
+            return self.call_index
+        return None
+    
+    def _iter_files_indexed(self, files: List[Path], params: SearchParameters,
+                            cancel_event: Optional[threading.Event],
+                            stats: SearchStats) -> Iterator[Tuple[int, List[SearchResult]]]:
+        """Answer a search from the symbol or call index, yielding (index, results, file stats) per file."""
+        index = self._index_for(params)
+        
+        # Languages the symbol extractor has no query for never reach the
+        # symbol index; their files are parsed and searched as usual
+        scanned: Set[int] = set()
+        parsed: Dict[int, int] = {}  # position -> bytes parsed bringing the file up to date
+        spent = 0
+        
+        # Bring changed and unseen files up to date; unchanged files aren't read
+        for position, file_path in enumerate(files):
+            lang_name = params.language or get_language_for_file(str(file_path))
+            if lang_name == 'text':
+                continue
+            if params.search_type == "symbol-definitions" and self._get_extractor(lang_name) is None:
+                scanned.add(position)
+                continue
+            if index.is_current(file_path):
+                continue
             
-            # Search each file and aggregate results
-            all_results = []
-            for file_path in matching_files:
+            reason = self._stop_reason(params, cancel_event)
+            if reason is not None:
+                stats.truncated = reason
+                files = files[:position]
+                break
+            file_stats = SearchStats()
+            try:
+                self._update_index(file_path, lang_name, self._remaining_budget(params, spent), file_stats)
+            except Exception as e:
+                print(f"Error indexing file {file_path}: {e}", file=sys.stderr)
+            if file_stats.truncated is not None:
+                stats.truncated = file_stats.truncated
+                files = files[:position]
+                break
+            spent += file_stats.bytes_searched
+            parsed[position] = file_stats.bytes_searched
+        
+        indexed_files = [file_path for position, file_path in enumerate(files) if position not in scanned]
+        if params.search_type == "symbol-definitions":
+            locations = [location for location in self.symbol_index.find_definitions(params.target, indexed_files)
+                         if location.kind in INDEXED_SYMBOL_TYPES]
+        else:
+            locations = self.call_index.find_calls(params.target, indexed_files)
+        
+        locations_by_file: Dict[str, List[Union[SymbolLocation, CallSite]]] = {}
+        for location in locations:
+            locations_by_file.setdefault(location.file_path, []).append(location)
+        
+        for position, file_path in enumerate(files):
+            if position in scanned:
+                reason = self._stop_reason(params, cancel_event)
+                if reason is not None:
+                    stats.truncated = reason
+                    return
+                file_stats = SearchStats()
                 try:
-                    file_results = self.search_file(str(file_path), params)
-                    all_results.extend(file_results)
-                    
-                    # Check if we've hit the max results limit
-                    if len(all_results) >= params.max_results:
-                        all_results = all_results[:params.max_results]
-                        break
-                        
+                    results = self.search_file(str(file_path), self._remaining_budget(params, spent), file_stats)
                 except Exception as e:
                     print(f"Error searching file {file_path}: {e}")
-                    continue
-            
-            # Deduplicate and sort results
-            return self._deduplicate_results(all_results)
+                    results = []
+                spent += file_stats.bytes_searched
+                yield position, results, file_stats
+                continue
             
-        except Exception as e:
-            print(f"Error searching directory {directory_path}: {e}")
-            return []
+            file_stats = SearchStats(bytes_searched=parsed.get(position, 0))
+            file_locations = locations_by_file.get(str(file_path.resolve()))
+            if not file_locations:
+                yield position, [], file_stats
+                continue
+            try:
+                yield position, self._results_from_locations(str(file_path), file_locations, params), file_stats
+            except Exception as e:
+                print(f"Error searching file {file_path}: {e}")
+                yield position, [], file_stats
     
-    def _search_function_calls(self, file_path: str, source_code: str, tree: Any, 
-                             params: SearchParameters, lang_name: str) -> List[SearchResult]:
-        """Search for function calls in the parsed tree."""
-        results = []
+    def _update_index(self, file_path: Path, lang_name: str, params: SearchParameters,
+                      stats: SearchStats) -> None:
+        """
+        Re-extract one file into the index answering this kind of search.
         
-        # Define query patterns for different languages
-        patterns = {
-            'python': '''
-                ; Method calls like obj.method()
-                (call
-                  function: (attribute
-                    (identifier) @module
-                    (identifier) @function
-                  )
-                ) @call
-                
-                ; Simple function calls like func()
-                (call
-                  function: (identifier) @simple_function
-                ) @simple_call
-            ''',
-            'javascript': '''
-                ; Method calls like obj.method()
-                (call_expression
-                  function: (member_expression
-                    object: (identifier) @module  
-                    property: (property_identifier) @function
-                  )
-                ) @call
-                
-                ; Simple function calls like func()
-                (call_expression
-                  function: (identifier) @simple_function
-                ) @simple_call
-            ''',
-            'typescript': '''
-                ; Method calls like obj.method()
-                (call_expression
-                  function: (member_expression
-                    object: (identifier) @module  
-                    property: (property_identifier) @function
-                  )
-                ) @call
-                
-                ; Simple function calls like func()
-                (call_expression
-                  function: (identifier) @simple_function
-                ) @simple_call
-            '''
-        }
+        The bytes parsed are added to stats. A file larger than max_bytes is
+        left stale, with stats.truncated set, as search_file would skip it.
+        """
+        # Stat before reading, so an edit made meanwhile leaves the entry stale
+        stat = os.stat(file_path)
+        extractor = None
+        if params.search_type == "symbol-definitions":
+            extractor = self._get_extractor(lang_name)
+            if extractor is None:
+                return
+        elif get_query(lang_name, params.search_type) is None:
+            self.call_index.store(file_path, [], stat)
+            return
         
-        pattern = patterns.get(lang_name)
-        if not pattern:
+        source = read_source(str(file_path))
+        if params.max_bytes is not None and len(source) > params.max_bytes:
+            stats.truncated = "max_bytes"
+            return
+        if extractor is not None:
+            extractor.extract_symbols(source, file_path=str(file_path), stat=stat)
+        else:
+            tree = self._ast_cache.parse(self._get_parser(lang_name), lang_name, source.data, path=str(file_path))
+            self._store_calls(file_path, lang_name, source, tree, stat)
+        stats.bytes_searched += len(source)
+    
+    def _store_calls(self, file_path: Path, lang_name: str, source: SourceBuffer, tree: Any,
+                     stat: os.stat_result) -> None:
+        """Record a parsed file's call sites in the call index."""
+        self.call_index.store(file_path, self._file_calls(lang_name, source, tree), stat)
+    
+    def _file_calls(self, lang_name: str, source: SourceBuffer, tree: Any) -> List[CallSite]:
+        """Every call site in a parsed file, as stored in the call index."""
+        query = get_query(lang_name, "function-calls")
+        if query is None:
             return []
+        return [
+            CallSite(callee, node.start_point[0] + 1, node.end_point[0] + 1, node.start_byte, node.end_byte)
+            for node, callee in _call_sites(query, source, tree)
+        ]
+    
+    def refresh_file(self, file_path: Union[str, Path]) -> None:
+        """
+        Re-parse a changed file and bring every index the engine has up to date.
         
-        # Compile and execute query
-        query = self._get_compiled_query(lang_name, pattern)
-        captures = query.captures(tree.root_node)
+        The new tree lands in the parse cache, so the next tool call on the
+        file doesn't pay for a cold parse.
         
-        source_lines = source_code.splitlines()
+        Args:
+            file_path: Path of the file on disk
+        """
+        file_path = Path(file_path)
+        lang_name = get_language_for_file(str(file_path))
+        if lang_name == 'text':
+            return
         
-        for node, capture_name in captures:
-            if capture_name in ['call', 'simple_call']:
-                # Check if this matches our target
-                call_text = source_code[node.start_byte:node.end_byte]
-                if params.target in call_text:
-                    start_line = node.start_point[0] + 1
-                    end_line = node.end_point[0] + 1
-                    
-                    # Get context lines
-                    context_before = []
-                    context_after = []
-                    if params.include_context:
-                        start_ctx = max(0, start_line - 1 - params.context_lines)
-                        end_ctx = min(len(source_lines), end_line + params.context_lines)
-                        context_before = source_lines[start_ctx:start_line-1]
-                        context_after = source_lines[end_line:end_ctx]
-                    
-                    result = SearchResult(
-                        file_path=file_path,
-                        start_line=start_line,
-                        end_line=end_line,
-                        match_text=call_text,
-                        context_before=context_before,
-                        context_after=context_after,
-                        metadata={"search_type": params.search_type, "target": params.target},
-                        language=lang_name
-                    )
-                    results.append(result)
-                    
-                    if len(results) >= params.max_results:
-                        break
+        stat = os.stat(file_path)
+        source = read_source(str(file_path))
+        tree = self._ast_cache.parse(self._get_parser(lang_name), lang_name, source.data, path=str(file_path))
+        
+        if self.trigram_index is not None:
+            self.trigram_index.store(file_path, word_trigrams(source.data), stat)
+        if self.symbol_index is not None:
+            extractor = self._get_extractor(lang_name)
+            if extractor is not None:
+                extractor.extract_symbols(source, file_path=str(file_path), stat=stat)
+        if self.call_index is not None:
+            self._store_calls(file_path, lang_name, source, tree, stat)
+    
+    def forget_file(self, file_path: Union[str, Path]) -> None:
+        """Drop a deleted file from the parse cache and every index the engine has."""
+        self._ast_cache.forget(str(file_path))
+        for index in (self.trigram_index, self.symbol_index, self.call_index):
+            if index is not None:
+                index.remove(file_path)
+    
+    def extract_file(self, file_path: Union[str, Path]) -> Optional[IndexedFile]:
+        """
+        Parse a file once and extract everything the indexes record for it.
+        
+        Nothing is written to the engine's own indexes, so this can run in
+        pool workers while one process stores the results.
+        
+        Args:
+            file_path: Path of the file on disk
+            
+        Returns:
+            IndexedFile, or None if the file isn't in a supported language
+        """
+        file_path = str(file_path)
+        lang_name = get_language_for_file(file_path)
+        if lang_name == 'text':
+            return None
         
+        stat = os.stat(file_path)
+        source = read_source(file_path)
+        tree = self._ast_cache.parse(self._get_parser(lang_name), lang_name, source.data, path=file_path)
+        
+        # No file_path: the engine's own symbol index must not be written here.
+        # The extractor finds the tree just parsed in the shared parse cache.
+        extractor = self._get_extractor(lang_name)
+        symbols = extractor.extract_symbols(source, include_locals=True) if extractor is not None else None
+        
+        return IndexedFile(file_path, lang_name, stat, content_hash(source.data), symbols,
+                           self._file_calls(lang_name, source, tree), word_trigrams(source.data))
+    
+    def index_directory(self, directory_path: str, workers: int = 0,
+                        progress: Optional[ProgressCallback] = None) -> Dict[str, int]:
+        """
+        Parse every source file under a directory into the engine's indexes.
+        
+        Files are chosen the way a directory search chooses them (honoring
+        .gitignore and the default exclusions) and parsed on the worker
+        pool; this process writes the results, so each index has a single
+        writer.
+        
+        Args:
+            directory_path: Root of the tree to index
+            workers: Worker processes (1=serial, 0=one per CPU)
+            progress: Optional callback with (files_done, files_total, symbols_found)
+            
+        Returns:
+            Dictionary with the number of files, symbols, calls and errors
+        """
+        dir_path = Path(directory_path)
+        params = SearchParameters(search_type="symbol-definitions", target="", scope=directory_path)
+        files = [str(f) for f in self._iter_matching_files(dir_path, params)
+                 if get_language_for_file(str(f)) != 'text']
+        
+        workers = workers if workers > 0 else (os.cpu_count() or 1)
+        if workers > 1 and len(files) > 1:
+            executor = self._get_executor(workers)
+            futures = {executor.submit(_extract_file_in_worker, file_path): file_path for file_path in files}
+            extractions = ((futures[future], future.result) for future in as_completed(futures))
+        else:
+            extractions = ((file_path, functools.partial(self.extract_file, file_path)) for file_path in files)
+        
+        totals = {'files': 0, 'symbols': 0, 'calls': 0, 'errors': 0}
+        for done, (file_path, extract) in enumerate(extractions, 1):
+            try:
+                entry = extract()
+                if entry is not None:
+                    self._store_indexed_file(entry)
+                    totals['files'] += 1
+                    totals['symbols'] += len(entry.symbols or [])
+                    totals['calls'] += len(entry.calls)
+            except Exception as e:
+                print(f"Error indexing file {file_path}: {e}", file=sys.stderr)
+                totals['errors'] += 1
+            if progress is not None:
+                progress(done, len(files), totals['symbols'])
+        return totals
+    
+    def _store_indexed_file(self, entry: IndexedFile) -> None:
+        """Write one extracted file to every index the engine has."""
+        if self.symbol_index is not None and entry.symbols is not None:
+            self.symbol_index.store(entry.path, entry.language, entry.content_hash, entry.symbols, entry.stat)
+        if self.call_index is not None:
+            self.call_index.store(entry.path, entry.calls, entry.stat)
+        if self.trigram_index is not None:
+            self.trigram_index.store(entry.path, entry.trigrams, entry.stat)
+    
+    def _results_from_locations(self, file_path: str, locations: List[Union[SymbolLocation, CallSite]],
+                                params: SearchParameters) -> List[SearchResult]:
+        """Build search results for indexed definitions or calls, reading only their file."""
+        source = read_source(file_path)
+        lang_name = params.language or get_language_for_file(file_path)
+        results = []
+        for location in locations[:params.max_results]:
+            context_before = []
+            context_after = []
+            if params.include_context:
+                context_before = source.lines.get_lines(location.start_line - params.context_lines, location.start_line - 1)
+                context_after = source.lines.get_lines(location.end_line + 1, location.end_line + params.context_lines)
+            
+            metadata = {"search_type": params.search_type, "target": params.target}
+            if isinstance(location, SymbolLocation):
+                metadata["symbol_type"] = INDEXED_SYMBOL_TYPES[location.kind]
+            
+            results.append(SearchResult(
+                file_path=file_path,
+                start_line=location.start_line,
+                end_line=location.end_line,
+                match_text=source.text(location.start_byte, location.end_byte),
+                context_before=context_before,
+                context_after=context_after,
+                metadata=metadata,
+                language=lang_name
+            ))
         return results
     
-    def _search_symbol_definitions(self, file_path: str, source_code: str, tree: Any, 
-                                 params: SearchParameters, lang_name: str) -> List[SearchResult]:
-        """Search for symbol definitions (classes, functions, variables) in the parsed tree."""
+    def _get_executor(self, workers: int) -> ProcessPoolExecutor:
+        """Get the worker pool, recreating it if the requested size changed."""
+        with self._executor_lock:
+            if self._executor is None or self._executor_workers != workers:
+                self._shutdown_executor()
+                self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=_POOL_CONTEXT)
+                self._executor_workers = workers
+            return self._executor
+    
+    def shutdown(self) -> None:
+        """Shut down the worker pool, if one was started."""
+        with self._executor_lock:
+            self._shutdown_executor()
+    
+    def _shutdown_executor(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._executor_workers = 0
+    
+    def _search_function_calls(self, file_path: str, source: SourceBuffer, tree: Any, 
+                             params: SearchParameters, lang_name: str) -> List[SearchResult]:
+        """Search for function calls in the parsed tree."""
         results = []
         
-        # Define query patterns for different languages
-        patterns = {
-            'python': '''
-                ; Function definitions
-                (function_definition
-                  name: (identifier) @function_name
-                ) @function_def
-                
-                ; Class definitions
-                (class_definition
-                  name: (identifier) @class_name
-                ) @class_def
-                
-                ; Variable assignments
-                (assignment
-                  left: (identifier) @variable_name
-                ) @variable_def
-            ''',
-            'javascript': '''
-                ; Function declarations
-                (function_declaration
-                  name: (identifier) @function_name
-                ) @function_def
-                
-                ; Class declarations
-                (class_declaration
-                  name: (identifier) @class_name
-                ) @class_def
-                
-                ; Variable declarations
-                (variable_declaration
-                  (variable_declarator
-                    name: (identifier) @variable_name
-                  )
-                ) @variable_def
-                
-                ; Const declarations
-                (lexical_declaration
-                  (variable_declarator
-                    name: (identifier) @variable_name
-                  )
-                ) @const_def
-            ''',
-            'typescript': '''
-                ; Function declarations
-                (function_declaration
-                  name: (identifier) @function_name
-                ) @function_def
-                
-                ; Class declarations
-                (class_declaration
-                  name: (identifier) @class_name
-                ) @class_def
-                
-                ; Interface declarations
-                (interface_declaration
-                  name: (type_identifier) @interface_name
-                ) @interface_def
+        query = get_query(lang_name, params.search_type)
+        if query is None:
+            return []
+        
+        target = normalize_callee(params.target)
+        
+        for node, callee in _call_sites(query, source, tree):
+            # Match on the called name, not on text in the arguments
+            if callee_matches(callee, target):
+                call_text = source.node_text(node)
+                start_line = node.start_point[0] + 1
+                end_line = node.end_point[0] + 1
                 
-                ; Type alias declarations
-                (type_alias_declaration
-                  name: (type_identifier) @type_name
-                ) @type_def
+                # Get context lines
+                context_before = []
+                context_after = []
+                if params.include_context:
+                    context_before = source.lines.get_lines(start_line - params.context_lines, start_line - 1)
+                    context_after = source.lines.get_lines(end_line + 1, end_line + params.context_lines)
                 
-                ; Variable declarations
-                (variable_declaration
-                  (variable_declarator
-                    name: (identifier) @variable_name
-                  )
-                ) @variable_def
+                result = SearchResult(
+                    file_path=file_path,
+                    start_line=start_line,
+                    end_line=end_line,
+                    match_text=call_text,
+                    context_before=context_before,
+                    context_after=context_after,
+                    metadata={"search_type": params.search_type, "target": params.target},
+                    language=lang_name
+                )
+                results.append(result)
                 
-                ; Const declarations
-                (lexical_declaration
-                  (variable_declarator
-                    name: (identifier) @variable_name
-                  )
-                ) @const_def
-            '''
-        }
+                if len(results) >= params.max_results:
+                    break
         
-        pattern = patterns.get(lang_name)
-        if not pattern:
-            return []
-        
-        # Compile and execute query
-        query = self._get_compiled_query(lang_name, pattern)
-        captures = query.captures(tree.root_node)
+        return results
+    
+    def _search_symbol_definitions(self, file_path: str, source: SourceBuffer, tree: Any, 
+                                 params: SearchParameters, lang_name: str) -> List[SearchResult]:
+        """Search for symbol definitions (classes, functions, variables) in the parsed tree."""
+        results = []
         
-        source_lines = source_code.splitlines()
+        query = get_query(lang_name, params.search_type)
+        if query is None:
+            return []
         
-        for node, capture_name in captures:
-            if capture_name.endswith('_def'):
-                # Check if this symbol name matches our target
-                symbol_text = source_code[node.start_byte:node.end_byte]
+        for match in query_matches(query, tree.root_node):
+            for capture_name, node in match.items():
+                if not capture_name.endswith('_def'):
+                    continue
                 
-                # For symbol definitions, we want to check if the target appears in the symbol
-                if params.target in symbol_text:
+                # Match the defined name itself, not any text inside the definition
+                names = [source.node_text(n) for c, n in match.items() if c.endswith('_name')]
+                if params.target in names:
+                    symbol_text = source.node_text(node)
                     start_line = node.start_point[0] + 1
                     end_line = node.end_point[0] + 1
                     
@@ -300,10 +760,8 @@ class SearchEngine:
                     context_before = []
                     context_after = []
                     if params.include_context:
-                        start_ctx = max(0, start_line - 1 - params.context_lines)
-                        end_ctx = min(len(source_lines), end_line + params.context_lines)
-                        context_before = source_lines[start_ctx:start_line-1]
-                        context_after = source_lines[end_line:end_ctx]
+                        context_before = source.lines.get_lines(start_line - params.context_lines, start_line - 1)
+                        context_after = source.lines.get_lines(end_line + 1, end_line + params.context_lines)
                     
                     # Determine symbol type from capture name
                     symbol_type = capture_name.replace('_def', '').replace('_name', '')
@@ -325,50 +783,144 @@ class SearchEngine:
                     results.append(result)
                     
                     if len(results) >= params.max_results:
-                        break
+                        return results
         
         return results
     
-    def _get_compiled_query(self, language: str, pattern: str) -> Query:
-        """Get or compile a tree-sitter query."""
-        cache_key = f"{language}:{hash(pattern)}"
-        if cache_key not in self._query_cache:
-            language_obj = get_language(language)
-            self._query_cache[cache_key] = language_obj.query(pattern)
-        return self._query_cache[cache_key]
+    def _get_extractor(self, language: str) -> Optional[CodeExtractor]:
+        """Get this thread's extractor feeding the symbol index, or None if the language has none."""
+        extractors = getattr(self._local, 'extractors', None)
+        if extractors is None:
+            extractors = self._local.extractors = {}
+        if language not in extractors:
+            try:
+                extractor = CodeExtractor(language, symbol_index=self.symbol_index)
+            except ValueError:
+                extractor = None
+            extractors[language] = extractor if extractor is not None and extractor.query else None
+        return extractors[language]
+    
+    def _get_parser(self, language: str) -> Any:
+        """Get or create this thread's tree-sitter parser for a language."""
+        parsers = getattr(self._local, 'parsers', None)
+        if parsers is None:
+            parsers = self._local.parsers = {}
+        if language not in parsers:
+            parsers[language] = get_parser(language)
+        return parsers[language]
     
     def _find_matching_files(self, dir_path: Path, params: SearchParameters) -> List[Path]:
         """Find all files in directory that match the search criteria."""
-        matching_files = []
+        return list(self._iter_matching_files(dir_path, params))
+    
+    def _iter_matching_files(self, dir_path: Path, params: SearchParameters) -> Iterator[Path]:
+        """
+        Yield files that match the search criteria.
         
+        Revision searches enumerate the files in that revision's tree, and
+        work-tree searches inside a git repository enumerate git's file list
+        (honoring .gitignore) unless respect_gitignore is off. Everything else
+        walks the filesystem.
+        """
+        if params.git_revision is not None or params.respect_gitignore:
+            vcs_files = self._list_vcs_files(dir_path, params)
+            if vcs_files is not None:
+                return self._iter_vcs_files(dir_path, vcs_files, params)
+        return self._walk_matching_files(dir_path, params)
+    
+    def _list_vcs_files(self, dir_path: Path, params: SearchParameters) -> Optional[List[str]]:
+        """List candidate files from the VCS, or None to fall back to walking."""
+        provider = detect_vcs_provider(dir_path)
+        if provider is None:
+            return None
         try:
-            # Use rglob to recursively find files
-            if params.follow_symlinks:
-                all_files = [f for f in dir_path.rglob("*") if f.is_file()]
-            else:
-                all_files = [f for f in dir_path.rglob("*") if f.is_file() and not f.is_symlink()]
+            return provider.list_files(dir_path, params.git_revision)
+        except Exception as e:
+            print(f"Error listing files in {dir_path}: {e}")
+            return None
+    
+    def _iter_vcs_files(self, dir_path: Path, rel_paths: List[str], params: SearchParameters) -> Iterator[Path]:
+        """Filter a VCS file list, relative to dir_path, by the search criteria."""
+        for rel_path in rel_paths:
+            # Check if file matches include patterns
+            if not self._matches_patterns(rel_path.rsplit('/', 1)[-1], params.file_patterns):
+                continue
             
-            for file_path in all_files:
+            # Check if file matches exclude patterns
+            if self._matches_patterns(rel_path, params.exclude_patterns):
+                continue
+            
+            file_path = dir_path / rel_path
+            
+            # Files at a revision are read from git, not from disk
+            if params.git_revision is None:
+                if file_path.is_symlink() and not params.follow_symlinks:
+                    continue
+                if not file_path.is_file() or self._is_binary_file(file_path):
+                    continue
+            
+            yield file_path
+    
+    def _walk_matching_files(self, dir_path: Path, params: SearchParameters) -> Iterator[Path]:
+        """
+        Lazily walk a directory tree, yielding files that match the search criteria.
+        
+        Directories whose whole contents are excluded (e.g. ``node_modules/*``)
+        are pruned before descending, and the cheap name-pattern check runs
+        before any per-file exclusion or binary sniffing.
+        """
+        prune_patterns = [p[:-2] for p in params.exclude_patterns if p.endswith('/*')]
+        stack: List[Tuple[str, str]] = [(str(dir_path), "")]
+        
+        while stack:
+            current, rel_dir = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except PermissionError as e:
+                if not rel_dir:
+                    print(f"Permission denied accessing {dir_path}: {e}")
+                continue
+            except Exception as e:
+                if not rel_dir:
+                    print(f"Error finding files in {dir_path}: {e}")
+                continue
+            
+            subdirs = []
+            for entry in entries:
+                rel_path = f"{rel_dir}{entry.name}"
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not self._matches_patterns(rel_path, prune_patterns):
+                            subdirs.append((entry.path, rel_path + "/"))
+                        continue
+                    
+                    is_link = entry.is_symlink()
+                    if is_link and not params.follow_symlinks:
+                        continue
+                    if not entry.is_file(follow_symlinks=is_link):
+                        continue
+                except OSError:
+                    continue
+                
                 # Check if file matches include patterns
-                if not self._matches_patterns(file_path.name, params.file_patterns):
+                if not self._matches_patterns(entry.name, params.file_patterns):
                     continue
                 
                 # Check if file matches exclude patterns
-                if self._matches_patterns(str(file_path.relative_to(dir_path)), params.exclude_patterns):
+                if self._matches_patterns(rel_path, params.exclude_patterns):
                     continue
                 
+                file_path = Path(entry.path)
+                
                 # Skip binary files
                 if self._is_binary_file(file_path):
                     continue
                 
-                matching_files.append(file_path)
-                
-        except PermissionError as e:
-            print(f"Permission denied accessing {dir_path}: {e}")
-        except Exception as e:
-            print(f"Error finding files in {dir_path}: {e}")
-        
-        return matching_files
+                yield file_path
+            
+            # Depth-first, visiting subdirectories in name order
+            stack.extend(reversed(subdirs))
     
     def _matches_patterns(self, file_path: str, patterns: List[str]) -> bool:
         """Check if file path matches any of the given patterns."""
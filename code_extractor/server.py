@@ -5,13 +5,18 @@ MCP Code Extractor Server
 A Model Context Protocol server that provides precise code extraction using tree-sitter.
 """
 
+import asyncio
+import functools
 import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional, Union
 
 try:
-    from mcp.server.fastmcp import FastMCP
+    from mcp.server.fastmcp import Context, FastMCP
 except ImportError:
     print("Error: MCP not installed. Install with: pip install mcp[cli]", file=sys.stderr)
     sys.exit(1)
@@ -23,11 +28,211 @@ except ImportError:
     sys.exit(1)
 
 # Local imports
-from .extractor import create_extractor
-from .languages import get_language_for_file
-from .file_reader import get_file_content
-from .search_engine import SearchEngine
-from .models import SearchParameters
+from .extractor import CodeExtractor, create_extractor
+from . import languages
+from .file_reader import read_source, working_tree_path
+from .search_engine import ProgressCallback, SearchEngine, SEARCH_WORKERS
+from .models import SearchParameters, SearchStats
+from .parse_cache import parse_cache
+from .source_buffer import SourceBuffer
+from .symbol_index import get_index_dir, get_symbol_index, set_index_dir
+from .trigram_index import get_trigram_index
+from .call_index import get_call_index
+from .url_fetcher import is_url
+from .watcher import FileWatcher
+from .prebuilt_index import INDEX_ROOT, adopt_index, build_index, relocate_index
+
+
+# Configuration constants
+DEFAULT_TOOL_WORKERS = 8
+DEFAULT_PROGRESS_INTERVAL = 0.5  # seconds between search progress notifications
+DEFAULT_SEARCH_TIMEOUT = 0.0  # seconds, 0 = searches have no default time limit
+DEFAULT_WATCH_INTERVAL = 0.0  # seconds between file watcher polls, 0 = no watcher
+
+# Environment variable overrides
+TOOL_WORKERS = int(os.environ.get('MCP_TOOL_WORKERS', DEFAULT_TOOL_WORKERS))
+PROGRESS_INTERVAL = float(os.environ.get('MCP_PROGRESS_INTERVAL', DEFAULT_PROGRESS_INTERVAL))
+SEARCH_TIMEOUT = float(os.environ.get('MCP_SEARCH_TIMEOUT', DEFAULT_SEARCH_TIMEOUT))
+WATCH_INTERVAL = float(os.environ.get('MCP_WATCH_INTERVAL', DEFAULT_WATCH_INTERVAL))
+
+
+# Long-lived per-language state, shared across tool invocations so that
+# parsers, compiled queries and caches are built once per server process.
+# tree-sitter parsers and queries must not be used from two threads at once,
+# so parsers and extractors are kept per executor thread.
+_thread_state = threading.local()
+_search_engine: Optional[SearchEngine] = None
+_tool_executor: Optional[ThreadPoolExecutor] = None
+_watcher: Optional[FileWatcher] = None
+_registry_lock = threading.Lock()
+
+
+def _thread_registry(name: str) -> Dict[str, Any]:
+    """Get one of this thread's registries, creating it on first use."""
+    registry = getattr(_thread_state, name, None)
+    if registry is None:
+        registry = {}
+        setattr(_thread_state, name, registry)
+    return registry
+
+
+def get_cached_parser(lang_name: str) -> Any:
+    """Get this thread's tree-sitter parser for a language."""
+    parsers = _thread_registry('parsers')
+    parser = parsers.get(lang_name)
+    if parser is None:
+        parser = get_parser(lang_name)
+        parsers[lang_name] = parser
+    return parser
+
+
+def get_cached_extractor(path_or_url: str) -> CodeExtractor:
+    """Get this thread's CodeExtractor for a file's language."""
+    language = languages.get_language_for_file(path_or_url)
+    extractors = _thread_registry('extractors')
+    extractor = extractors.get(language)
+    if extractor is None:
+        extractor = create_extractor(path_or_url, symbol_index=get_symbol_index())
+        extractors[language] = extractor
+    return extractor
+
+
+def get_search_engine() -> SearchEngine:
+    """Get the shared SearchEngine."""
+    global _search_engine
+    with _registry_lock:
+        if _search_engine is None:
+            _search_engine = SearchEngine(trigram_index=get_trigram_index(), symbol_index=get_symbol_index(),
+                                          call_index=get_call_index())
+        return _search_engine
+
+
+def get_tool_executor() -> ThreadPoolExecutor:
+    """Get the bounded thread pool that tool calls run on."""
+    global _tool_executor
+    with _registry_lock:
+        if _tool_executor is None:
+            _tool_executor = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="mcp-tool")
+        return _tool_executor
+
+
+async def run_tool(func, *args, **kwargs) -> Any:
+    """
+    Run a blocking tool implementation on the tool executor.
+    
+    Keeps the event loop free while files are read, fetched and parsed, so
+    concurrent tool calls from a client proceed in parallel. If the request
+    is cancelled before the call starts, the queued call is dropped.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_tool_executor(), functools.partial(func, *args, **kwargs))
+
+
+def make_progress_reporter(ctx: Context, loop: asyncio.AbstractEventLoop) -> ProgressCallback:
+    """
+    Forward search progress from a tool thread as MCP progress notifications.
+    
+    Notifications are scheduled on the server's event loop without waiting
+    for them, and are sent at most once per PROGRESS_INTERVAL apart from the
+    last one, so a search over many small files doesn't flood the client.
+    
+    Args:
+        ctx: Request context of the tool call
+        loop: Event loop the request is being served on
+        
+    Returns:
+        Callback for SearchEngine.search_directory's progress argument
+    """
+    last_sent = float('-inf')
+    
+    def report(files_done: int, files_total: int, matches_found: int) -> None:
+        nonlocal last_sent
+        now = time.monotonic()
+        if files_done < files_total and now - last_sent < PROGRESS_INTERVAL:
+            return
+        last_sent = now
+        
+        message = f"Searched {files_done}/{files_total} files, {matches_found} matches"
+        notification = ctx.report_progress(files_done, files_total, message)
+        try:
+            asyncio.run_coroutine_threadsafe(notification, loop)
+        except RuntimeError:
+            # The loop has shut down; there is no one left to tell
+            notification.close()
+    
+    return report
+
+
+def get_watcher() -> Optional[FileWatcher]:
+    """
+    Get the background file watcher, starting it on first use.
+    
+    Returns:
+        FileWatcher instance, or None if MCP_WATCH_INTERVAL is not set
+    """
+    global _watcher
+    if WATCH_INTERVAL <= 0:
+        return None
+    with _registry_lock:
+        if _watcher is None:
+            _watcher = FileWatcher(refresh_paths, interval=WATCH_INTERVAL)
+            _watcher.start()
+        return _watcher
+
+
+def watch_scope(path_or_url: str, git_revision: Optional[str] = None) -> None:
+    """Keep caches and indexes warm for a local file or directory a tool was asked about."""
+    watcher = get_watcher()
+    if watcher is None or git_revision is not None or is_url(path_or_url):
+        return
+    if os.path.exists(path_or_url):
+        watcher.watch(path_or_url)
+
+
+def refresh_paths(changed: List[Path], removed: List[Path]) -> None:
+    """
+    Watcher callback: re-parse and re-index changed files, forget removed ones.
+    
+    Runs on the watcher thread, so the next tool call on an edited file finds
+    its tree cached and its index entries current.
+    """
+    engine = get_search_engine()
+    for path in removed:
+        engine.forget_file(path)
+    for path in changed:
+        try:
+            engine.refresh_file(path)
+        except Exception as e:
+            print(f"Error refreshing {path}: {e}", file=sys.stderr)
+
+
+def adopt_prebuilt_index(index_dir: Union[str, Path], root: str) -> None:
+    """Re-stamp a prebuilt index's unchanged files, reporting on stderr (stdout belongs to the MCP transport)."""
+    try:
+        loaded = adopt_index(index_dir, root)
+    except Exception as e:
+        print(f"Error adopting prebuilt index for {root}: {e}", file=sys.stderr)
+        return
+    print(f"Loaded prebuilt index for {loaded['root']}: {loaded['current'] + loaded['adopted']} "
+          f"files current, {loaded['stale']} to re-parse", file=sys.stderr)
+
+
+def clear_registries() -> None:
+    """Drop all shared parsers, extractors, the search engine, the tool executor and the watcher."""
+    global _search_engine, _thread_state, _tool_executor, _watcher
+    with _registry_lock:
+        _thread_state = threading.local()
+        if _search_engine is not None:
+            _search_engine.shutdown()
+        _search_engine = None
+        if _tool_executor is not None:
+            _tool_executor.shutdown(wait=False, cancel_futures=True)
+        _tool_executor = None
+        watcher, _watcher = _watcher, None
+    
+    # Outside the lock: a poll in progress may be waiting on get_search_engine()
+    if watcher is not None:
+        watcher.stop()
 
 
 # Language mapping for file extensions
@@ -130,6 +335,43 @@ LANG_MAP = {
 }
 
 
+# Function node types for different languages
+FUNCTION_NODE_TYPES = {
+    'python': ['function_definition', 'async_function_definition'],
+    'javascript': ['function_declaration', 'function_expression', 
+                  'arrow_function', 'method_definition'],
+    'typescript': ['function_declaration', 'function_expression', 
+                  'arrow_function', 'method_definition', 'method_signature'],
+    'java': ['method_declaration', 'constructor_declaration'],
+    'cpp': ['function_definition', 'function_declarator'],
+    'c': ['function_definition', 'function_declarator'],
+    'go': ['function_declaration', 'method_declaration'],
+    'rust': ['function_item'],
+    'ruby': ['method', 'singleton_method'],
+    'php': ['function_definition', 'method_declaration'],
+}
+DEFAULT_FUNCTION_NODE_TYPES = ['function_definition', 'function_declaration']
+
+# Class node types for different languages
+CLASS_NODE_TYPES = {
+    'python': ['class_definition'],
+    'javascript': ['class_declaration'],
+    'typescript': ['class_declaration'],
+    'java': ['class_declaration'],
+    'cpp': ['class_specifier'],
+    'c': ['struct_specifier'],
+    'go': ['type_declaration'],
+    'rust': ['struct_item', 'enum_item', 'impl_item'],
+    'ruby': ['class'],
+    'php': ['class_declaration'],
+    'swift': ['class_declaration'],
+    'kotlin': ['class_declaration'],
+    'scala': ['class_definition'],
+    'csharp': ['class_declaration'],
+}
+DEFAULT_CLASS_NODE_TYPES = ['class_declaration', 'class_definition']
+
+
 def get_language_for_file(path_or_url: str) -> str:
     """Get the language name for a file or URL."""
     # For URLs, extract file extension from the path component
@@ -157,83 +399,24 @@ def find_function(node) -> dict:
             
             # Get tree-sitter parser
             try:
-                parser = get_parser(lang_name)
+                parser = get_cached_parser(lang_name)
             except Exception:
                 return {"error": f"Language '{lang_name}' not supported"}
             
-            source = get_file_content(path_or_url, git_revision)
-            source_bytes = source.encode('utf-8') if isinstance(source, str) else source
-            
-            tree = parser.parse(source_bytes)
-            
-            # Define function node types for different languages
-            func_types = {
-                'python': ['function_definition', 'async_function_definition'],
-                'javascript': ['function_declaration', 'function_expression', 
-                              'arrow_function', 'method_definition'],
-                'typescript': ['function_declaration', 'function_expression', 
-                              'arrow_function', 'method_definition', 'method_signature'],
-                'java': ['method_declaration', 'constructor_declaration'],
-                'cpp': ['function_definition', 'function_declarator'],
-                'c': ['function_definition', 'function_declarator'],
-                'go': ['function_declaration', 'method_declaration'],
-                'rust': ['function_item'],
-                'ruby': ['method', 'singleton_method'],
-                'php': ['function_definition', 'method_declaration'],
-            }
-            
-            types = func_types.get(
-                lang_name, ['function_definition', 'function_declaration'])
+            source = read_source(path_or_url, git_revision)
+            tree = parse_cache.parse(parser, lang_name, source.data, path=working_tree_path(path_or_url, git_revision))
             
-            def find_function(node):
-                if node.type in types:
-                    # Extract function name
-                    name = None
-                    for child in node.children:
-                        if child.type == 'identifier':
-                            if isinstance(source, str):
-                                name = source[child.start_byte:child.end_byte]
-                            else:
-                                name = source[child.start_byte:child.end_byte].decode('utf-8') if isinstance(source, bytes) else source[child.start_byte:child.end_byte]
-                            break
-                        elif hasattr(child, 'children'):
-                            for grandchild in child.children:
-                                if grandchild.type == 'identifier':
-                                    if isinstance(source, str):
-                                        name = source[grandchild.start_byte:grandchild.end_byte]
-                                    else:
-                                        name = source[grandchild.start_byte:grandchild.end_byte].decode('utf-8') if isinstance(source, bytes) else source[grandchild.start_byte:grandchild.end_byte]
-                                    break
-                            if name:
-                                break
-                    
-                    # Use field name if available (more reliable)
-                    name_node = node.child_by_field_name('name')
-                    if name_node:
-                        if isinstance(source, str):
-                            name = source[name_node.start_byte:name_node.end_byte]
-                        else:
-                            name = source[name_node.start_byte:name_node.end_byte].decode('utf-8') if isinstance(source, bytes) else source[name_node.start_byte:name_node.end_byte]
-                    
-                    if name == function_name:
-                        return node
-                
-                for child in node.children:
-                    result = find_function(child)
-                    if result:
-                        return result
-                return None
+            types = FUNCTION_NODE_TYPES.get(lang_name, DEFAULT_FUNCTION_NODE_TYPES)
             
-            func_node = find_function(tree.root_node)
+            func_node = find_definition(tree.root_node, types, function_name, source)
             
             if not func_node:
                 return {"error": f"Function '{function_name}' not found in {path_or_url}"}
             
             # Extract the function code
-            source_bytes = source.encode('utf-8') if isinstance(source, str) else source
-            code = source[func_node.start_byte:func_node.end_byte]
-            start_line = source[:func_node.start_byte].count('\n') + 1 if isinstance(source, str) else source_bytes[:func_node.start_byte].count(b'\n') + 1
-            end_line = source[:func_node.end_byte].count('\n') + 1 if isinstance(source, str) else source_bytes[:func_node.end_byte].count(b'\n') + 1
+            code = source.node_text(func_node)
+            start_line = source.lines.line_at(func_node.start_byte)
+            end_line = source.lines.line_at(func_node.end_byte)
             
             return {
                 "code": code,
@@ -266,74 +449,24 @@ def find_class(node) -> dict:
             
             # Get tree-sitter parser
             try:
-                parser = get_parser(lang_name)
+                parser = get_cached_parser(lang_name)
             except Exception:
                 return {"error": f"Language '{lang_name}' not supported"}
             
-            source = get_file_content(path_or_url, git_revision)
-            source_bytes = source.encode('utf-8') if isinstance(source, str) else source
+            source = read_source(path_or_url, git_revision)
+            tree = parse_cache.parse(parser, lang_name, source.data, path=working_tree_path(path_or_url, git_revision))
             
-            tree = parser.parse(source_bytes)
+            types = CLASS_NODE_TYPES.get(lang_name, DEFAULT_CLASS_NODE_TYPES)
             
-            # Define class node types for different languages
-            class_types = {
-                'python': ['class_definition'],
-                'javascript': ['class_declaration'],
-                'typescript': ['class_declaration'],
-                'java': ['class_declaration'],
-                'cpp': ['class_specifier'],
-                'c': ['struct_specifier'],
-                'go': ['type_declaration'],
-                'rust': ['struct_item', 'enum_item', 'impl_item'],
-                'ruby': ['class'],
-                'php': ['class_declaration'],
-                'swift': ['class_declaration'],
-                'kotlin': ['class_declaration'],
-                'scala': ['class_definition'],
-                'csharp': ['class_declaration'],
-            }
-            
-            types = class_types.get(
-                lang_name, ['class_declaration', 'class_definition'])
-            
-            def find_class(node):
-                if node.type in types:
-                    # Extract class name
-                    for child in node.children:
-                        if child.type == 'identifier':
-                            if isinstance(source, str):
-                                name = source[child.start_byte:child.end_byte]
-                            else:
-                                name = source[child.start_byte:child.end_byte].decode('utf-8') if isinstance(source, bytes) else source[child.start_byte:child.end_byte]
-                            if name == class_name:
-                                return node
-                    
-                    # Use field name if available (more reliable)
-                    name_node = node.child_by_field_name('name')
-                    if name_node:
-                        if isinstance(source, str):
-                            name = source[name_node.start_byte:name_node.end_byte]
-                        else:
-                            name = source[name_node.start_byte:name_node.end_byte].decode('utf-8') if isinstance(source, bytes) else source[name_node.start_byte:name_node.end_byte]
-                        if name == class_name:
-                            return node
-                
-                for child in node.children:
-                    result = find_class(child)
-                    if result:
-                        return result
-                return None
-            
-            class_node = find_class(tree.root_node)
+            class_node = find_definition(tree.root_node, types, class_name, source)
             
             if not class_node:
                 return {"error": f"Class '{class_name}' not found in {path_or_url}"}
             
             # Extract the class code
-            source_bytes = source.encode('utf-8') if isinstance(source, str) else source
-            code = source[class_node.start_byte:class_node.end_byte]
-            start_line = source[:class_node.start_byte].count('\n') + 1 if isinstance(source, str) else source_bytes[:class_node.start_byte].count(b'\n') + 1
-            end_line = source[:class_node.end_byte].count('\n') + 1 if isinstance(source, str) else source_bytes[:class_node.end_byte].count(b'\n') + 1
+            code = source.node_text(class_node)
+            start_line = source.lines.line_at(class_node.start_byte)
+            end_line = source.lines.line_at(class_node.end_byte)
             
             return {
                 "code": code,
@@ -351,6 +484,133 @@ def find_class(node) -> dict:
     return get_class
 
 
+def walk_tree(root) -> Iterator[Any]:
+    """Yield every node under root in document (pre-)order, without recursion."""
+    cursor = root.walk()
+    while True:
+        yield cursor.node
+        if cursor.goto_first_child():
+            continue
+        while not cursor.goto_next_sibling():
+            if not cursor.goto_parent():
+                return
+
+
+def get_node_name(node, source: SourceBuffer) -> Optional[str]:
+    """Name of a definition node: its name field, else its first identifier child or grandchild."""
+    name_node = node.child_by_field_name('name')
+    if name_node is None:
+        for child in node.children:
+            if child.type == 'identifier':
+                name_node = child
+                break
+            name_node = next((g for g in child.children if g.type == 'identifier'), None)
+            if name_node is not None:
+                break
+    if name_node is None:
+        return None
+    return source.node_text(name_node)
+
+
+def find_definition(root, types, name: str, source: SourceBuffer):
+    """
+    Find the first definition node of one of the given types with the given name.
+    
+    Walks the tree iteratively with a TreeCursor, so deeply nested code cannot
+    hit the recursion limit. Files that don't contain the name at all are
+    rejected without walking the tree.
+    
+    Args:
+        root: Node to search under
+        types: Node types that count as definitions
+        name: Definition name to look for
+        source: Source the tree was parsed from
+        
+    Returns:
+        Matching node, or None if not found
+    """
+    if name.encode('utf-8') not in source:
+        return None
+    
+    types = frozenset(types)
+    for node in walk_tree(root):
+        if node.type in types and get_node_name(node, source) == name:
+            return node
+    return None
+
+
+def get_symbols_code(path_or_url: str, names: List[str], git_revision: Optional[str] = None) -> dict:
+    """
+    Extract several functions and classes from one file in a single pass.
+    
+    The file is read and parsed once and its tree walked once, stopping as soon
+    as every requested name has been found. The first definition of each name
+    in document order wins, as with find_function/find_class.
+    """
+    
+    try:
+        lang_name = get_language_for_file(path_or_url)
+        
+        try:
+            parser = get_cached_parser(lang_name)
+        except Exception:
+            return {"error": f"Language '{lang_name}' not supported"}
+        
+        source = read_source(path_or_url, git_revision)
+        tree = parse_cache.parse(parser, lang_name, source.data, path=working_tree_path(path_or_url, git_revision))
+        
+        kinds = {t: "class" for t in CLASS_NODE_TYPES.get(lang_name, DEFAULT_CLASS_NODE_TYPES)}
+        kinds.update({t: "function" for t in FUNCTION_NODE_TYPES.get(lang_name, DEFAULT_FUNCTION_NODE_TYPES)})
+        
+        wanted = set(names)
+        found: Dict[str, Any] = {}
+        for node in walk_tree(tree.root_node):
+            kind = kinds.get(node.type)
+            if kind is None:
+                continue
+            name = get_node_name(node, source)
+            if name in wanted and name not in found:
+                found[name] = (node, kind)
+                if len(found) == len(wanted):
+                    break
+        
+        symbols = []
+        for name in dict.fromkeys(names):
+            if name not in found:
+                symbols.append({"name": name, "error": f"Symbol '{name}' not found in {path_or_url}"})
+                continue
+            node, kind = found[name]
+            start_line = source.lines.line_at(node.start_byte)
+            end_line = source.lines.line_at(node.end_byte)
+            symbols.append({
+                "name": name,
+                "kind": kind,
+                "code": source.node_text(node),
+                "start_line": start_line,
+                "end_line": end_line,
+                "lines": f"{start_line}-{end_line}",
+            })
+        
+        return {
+            "symbols": symbols,
+            "file": path_or_url,
+            "language": lang_name
+        }
+        
+    except Exception as e:
+        return {"error": f"Failed to parse '{path_or_url}': {str(e)}"}
+
+
+def _stat_before_read(path_or_url: str, git_revision: Optional[str] = None) -> Optional[os.stat_result]:
+    """Stat a work-tree file about to be read, for stamping its symbol index entry."""
+    if working_tree_path(path_or_url, git_revision) is None:
+        return None
+    try:
+        return os.stat(path_or_url)
+    except OSError:
+        return None
+
+
 def get_symbols(path_or_url: str, git_revision: Optional[str] = None, depth: int = 1) -> list:
     """
     List all functions, classes, and symbols with line numbers using tree-sitter parsing.
@@ -360,9 +620,11 @@ def get_symbols(path_or_url: str, git_revision: Optional[str] = None, depth: int
     """
     
     try:
-        extractor = create_extractor(path_or_url)
-        source_code = get_file_content(path_or_url, git_revision)
-        symbols = extractor.extract_symbols(source_code, depth=depth)
+        extractor = get_cached_extractor(path_or_url)
+        stat = _stat_before_read(path_or_url, git_revision)
+        source = read_source(path_or_url, git_revision)
+        symbols = extractor.extract_symbols(source, depth=depth, file_path=path_or_url,
+                                             revision=git_revision, stat=stat)
         
         # Convert to dict format for MCP compatibility
         result = []
@@ -390,20 +652,14 @@ def get_lines(path_or_url: str, start_line: int, end_line: int, git_revision: Op
         if end_line < start_line:
             return {"error": "end_line must be >= start_line"}
         
-        source_code = get_file_content(path_or_url, git_revision)
-        lines = source_code.splitlines(keepends=True)
-        
-        # Convert to 0-based indexing
-        start_idx = max(0, start_line - 1)
-        end_idx = min(len(lines), end_line)
-        
-        extracted = lines[start_idx:end_idx]
+        source = read_source(path_or_url, git_revision)
+        last_line = min(end_line, source.lines.line_count)
         
         return {
-            "code": "".join(extracted),
+            "code": source.text(*source.lines.byte_range(start_line, last_line)) if start_line <= last_line else "",
             "start_line": start_line,
-            "end_line": min(end_line, len(lines)),
-            "lines": f"{start_line}-{min(end_line, len(lines))}",
+            "end_line": last_line,
+            "lines": f"{start_line}-{last_line}",
             "file": path_or_url
         }
         
@@ -436,6 +692,79 @@ def get_signature(path_or_url: str, function_name: str, git_revision: Optional[s
     }
 
 
+def search_code(search_type: str, target: str, scope: str, language: Optional[str] = None,
+                git_revision: Optional[str] = None, max_results: int = 100, include_context: bool = True,
+                file_patterns: Optional[List[str]] = None, exclude_patterns: Optional[List[str]] = None,
+                max_files: int = 1000, follow_symlinks: bool = False, respect_gitignore: bool = True,
+                timeout: Optional[float] = None, max_bytes: Optional[int] = None,
+                cancel_event: Optional[threading.Event] = None,
+                progress: Optional[ProgressCallback] = None) -> List[Dict[str, Any]]:
+    """
+    Search a file, directory or URL for function calls or symbol definitions.
+    
+    Parameters are those of search_code_tool; cancel_event stops a directory
+    search between files once set, returning the results found so far, and
+    progress is called after each file of a directory search.
+    
+    A search cut short by timeout or max_bytes returns the results found so
+    far followed by a marker entry, {"truncated": reason, ...}, with the
+    search's file, byte and match counters. For a single file or URL that
+    means the file wasn't searched at all.
+    """
+    try:
+        if timeout is None and SEARCH_TIMEOUT > 0:
+            timeout = SEARCH_TIMEOUT
+        
+        # Validate search type
+        supported_types = ["function-calls", "symbol-definitions"]
+        if search_type not in supported_types:
+            return [{"error": f"Unsupported search type '{search_type}'. Supported: {supported_types}"}]
+        
+        # Set up search parameters with defaults for directory-specific options
+        params = SearchParameters(
+            search_type=search_type,
+            target=target,
+            scope=scope,
+            language=language,
+            git_revision=git_revision,
+            max_results=max_results,
+            include_context=include_context,
+            file_patterns=file_patterns or ["*"],
+            exclude_patterns=exclude_patterns or ["*.pyc", "*.pyo", "*.pyd", "__pycache__/*", ".git/*", ".svn/*", "node_modules/*", "*.min.js"],
+            max_files=max_files,
+            follow_symlinks=follow_symlinks,
+            respect_gitignore=respect_gitignore,
+            workers=SEARCH_WORKERS,
+            deadline=time.time() + timeout if timeout is not None else None,
+            max_bytes=max_bytes
+        )
+        
+        search_engine = get_search_engine()
+        
+        # Auto-detect file vs directory scope and route accordingly
+        stats = SearchStats()
+        if os.path.isfile(scope):
+            # Single file search
+            results = search_engine.search_file(scope, params, stats=stats)
+        elif os.path.isdir(scope):
+            # Directory search
+            results = search_engine.search_directory(scope, params, cancel_event=cancel_event,
+                                                     progress=progress, stats=stats)
+        elif scope.startswith(('http://', 'https://')):
+            # Single file search for URLs
+            results = search_engine.search_file(scope, params, stats=stats)
+        else:
+            return [{"error": f"Scope '{scope}' is not a valid file, directory, or URL"}]
+        
+        output = [result.to_dict() for result in results]
+        if stats.truncated in ("deadline", "max_bytes"):
+            output.append(stats.to_dict())
+        return output
+    
+    except Exception as e:
+        return [{"error": f"Search failed: {str(e)}"}]
+
+
 def main():
     """Main entry point for the MCP server."""
     import argparse
@@ -451,15 +780,67 @@ def main():
         action="version", 
         version="mcp-server-code-extractor 0.4.2"
     )
+    parser.add_argument(
+        "--index-dir",
+        help="Directory for the on-disk symbol, call and trigram indexes (default: $MCP_INDEX_DIR)"
+    )
+    parser.add_argument(
+        "--index-root",
+        default=INDEX_ROOT,
+        help="Where the tree a prebuilt index was built from is checked out now (default: $MCP_INDEX_ROOT)"
+    )
+    commands = parser.add_subparsers(dest="command")
+    index_parser = commands.add_parser("index", help="Manage the on-disk indexes")
+    index_commands = index_parser.add_subparsers(dest="index_command", required=True)
+    build_parser = index_commands.add_parser(
+        "build", help="Parse a whole tree in parallel and write its indexes, e.g. in CI"
+    )
+    build_parser.add_argument("directory", help="Root of the tree to index")
+    build_parser.add_argument(
+        "--index-dir",
+        default=argparse.SUPPRESS,
+        help="Directory to write the indexes to (default: $MCP_INDEX_DIR)"
+    )
+    build_parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Worker processes (default: one per CPU)"
+    )
     
-    # Parse args but ignore them for MCP server mode
     args = parser.parse_args()
+    if args.index_dir:
+        set_index_dir(args.index_dir)
+    
+    index_dir = get_index_dir()
+    
+    if args.command == "index":
+        if index_dir is None:
+            parser.error("index build needs --index-dir or MCP_INDEX_DIR")
+        if not os.path.isdir(args.directory):
+            parser.error(f"not a directory: {args.directory}")
+        stats = build_index(args.directory, index_dir, workers=args.workers)
+        print(f"Indexed {stats['files']} files ({stats['symbols']} symbols, {stats['calls']} calls, "
+              f"{stats['errors']} errors) from {stats['root']} into {stats['index_dir']} "
+              f"in {stats['seconds']:.1f}s")
+        return
+    
+    # Move a prebuilt index to this checkout before anything opens it. Adopting
+    # its entries reads every file whose mtime changed, i.e. the whole tree
+    # after a fresh checkout, so that runs in the background while serving
+    if index_dir is not None:
+        index_root = relocate_index(index_dir, args.index_root)
+        if index_root is not None:
+            get_tool_executor().submit(adopt_prebuilt_index, index_dir, index_root)
     
     # Initialize FastMCP server
     mcp = FastMCP("extract")
     
+    # Build the shared search engine up front; it lives as long as the server
+    get_search_engine()
+    
     @mcp.tool()
-    def get_symbols_tool(path_or_url: str, git_revision: Optional[str] = None, depth: int = 1) -> list:
+    async def get_symbols_tool(path_or_url: str, git_revision: Optional[str] = None, depth: int = 1) -> list:
         """
         AST-precise symbol table generator for files/directories/URLs. Enumerates every function, class, 
         variable with byte-accurate boundaries and line numbers using tree-sitter parsing. Zero regex 
@@ -471,10 +852,11 @@ def main():
             git_revision: Optional git revision (commit, branch, tag, HEAD~1, etc.) - not supported for URLs
             depth: Symbol extraction depth (0=everything, 1=top-level only, 2=classes+methods, etc.)
         """
-        return get_symbols(path_or_url, git_revision, depth)
+        watch_scope(path_or_url, git_revision)
+        return await run_tool(get_symbols, path_or_url, git_revision, depth)
     
     @mcp.tool()
-    def get_function_tool(path_or_url: str, function_name: str, git_revision: Optional[str] = None) -> dict:
+    async def get_function_tool(path_or_url: str, function_name: str, git_revision: Optional[str] = None) -> dict:
         """
         Tree-sitter function extractor that pinpoints exact function/method boundaries with zero false positives.
         Returns complete definition including signature, parameters, body, and precise line ranges. Handles 
@@ -486,10 +868,11 @@ def main():
             function_name: Name of the function to extract
             git_revision: Optional git revision (commit, branch, tag, HEAD~1, etc.) - not supported for URLs
         """
-        return find_function(None)(path_or_url, function_name, git_revision)
+        watch_scope(path_or_url, git_revision)
+        return await run_tool(find_function(None), path_or_url, function_name, git_revision)
     
     @mcp.tool()
-    def get_class_tool(path_or_url: str, class_name: str, git_revision: Optional[str] = None) -> dict:
+    async def get_class_tool(path_or_url: str, class_name: str, git_revision: Optional[str] = None) -> dict:
         """
         AST-aware class/type extractor that guarantees complete definition boundaries including inheritance, 
         generics, nested classes, and all methods. Language-aware parsing handles OOP patterns across 
@@ -501,10 +884,27 @@ def main():
             class_name: Name of the class to extract
             git_revision: Optional git revision (commit, branch, tag, HEAD~1, etc.) - not supported for URLs
         """
-        return find_class(None)(path_or_url, class_name, git_revision)
+        watch_scope(path_or_url, git_revision)
+        return await run_tool(find_class(None), path_or_url, class_name, git_revision)
+    
+    @mcp.tool()
+    async def get_symbols_code_tool(path_or_url: str, names: List[str], git_revision: Optional[str] = None) -> dict:
+        """
+        Batch function/class extractor: returns the complete code of several named functions, methods 
+        or classes from one file with a single parse. Each entry has kind, code and precise line ranges; 
+        names that are not found come back with an error instead of failing the call. Prefer over 
+        repeated get_function_tool/get_class_tool calls on the same file.
+        
+        Args:
+            path_or_url: Path to source file or URL (GitHub raw, GitLab raw, direct file URL)
+            names: Names of the functions and classes to extract
+            git_revision: Optional git revision (commit, branch, tag, HEAD~1, etc.) - not supported for URLs
+        """
+        watch_scope(path_or_url, git_revision)
+        return await run_tool(get_symbols_code, path_or_url, names, git_revision)
     
     @mcp.tool()
-    def get_lines_tool(path_or_url: str, start_line: int, end_line: int, git_revision: Optional[str] = None) -> dict:
+    async def get_lines_tool(path_or_url: str, start_line: int, end_line: int, git_revision: Optional[str] = None) -> dict:
         """
         Precise line range extractor with git-revision support. Returns exact line spans from any commit, 
         branch, or URL without reading entire files. Handles line numbering consistently across file 
@@ -517,10 +917,11 @@ def main():
             end_line: Ending line number (1-based, inclusive)
             git_revision: Optional git revision (commit, branch, tag, HEAD~1, etc.) - not supported for URLs
         """
-        return get_lines(path_or_url, start_line, end_line, git_revision)
+        watch_scope(path_or_url, git_revision)
+        return await run_tool(get_lines, path_or_url, start_line, end_line, git_revision)
     
     @mcp.tool()
-    def get_signature_tool(path_or_url: str, function_name: str, git_revision: Optional[str] = None) -> dict:
+    async def get_signature_tool(path_or_url: str, function_name: str, git_revision: Optional[str] = None) -> dict:
         """
         Function signature extractor that returns only the header/declaration without implementation body. 
         Preserves exact parameter types, decorators, async/static modifiers, and return annotations. 
@@ -532,10 +933,11 @@ def main():
             function_name: Name of the function to get signature for
             git_revision: Optional git revision (commit, branch, tag, HEAD~1, etc.) - not supported for URLs
         """
-        return get_signature(path_or_url, function_name, git_revision)
+        watch_scope(path_or_url, git_revision)
+        return await run_tool(get_signature, path_or_url, function_name, git_revision)
     
     @mcp.tool()
-    def search_code_tool(
+    async def search_code_tool(
         search_type: str,
         target: str, 
         scope: str,
@@ -546,13 +948,19 @@ def main():
         file_patterns: Optional[List[str]] = None,
         exclude_patterns: Optional[List[str]] = None,
         max_files: int = 1000,
-        follow_symlinks: bool = False
+        follow_symlinks: bool = False,
+        respect_gitignore: bool = True,
+        timeout: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        ctx: Context = None
     ) -> List[Dict[str, Any]]:
         """
         Tree-sitter semantic code search that understands language structure, not just text patterns. 
         Finds function calls, symbol definitions, and references with AST precision across files/directories/repos. 
         Zero false positives from string matches in comments or strings. Supports git revisions for 
         historical analysis. Use instead of grep/text search when semantic accuracy matters.
+        Directory searches send progress notifications (files searched, matches found) when the
+        request carries a progress token.
         
         Search Types:
         - "function-calls": Locate where functions/methods are invoked (not just string matches)
@@ -566,7 +974,8 @@ def main():
         
         Args:
             search_type: Type of search ("function-calls", "symbol-definitions") 
-            target: What to search for (symbol name or call pattern)
+            target: What to search for: a symbol name, or a called name optionally qualified by
+                its receiver ("get" and "session.get" both match self.session.get())
             scope: File path, directory path, or URL to search in
             language: Programming language (auto-detected if not specified)
             git_revision: Optional git revision (commit, branch, tag) - not supported for URLs
@@ -576,54 +985,30 @@ def main():
             exclude_patterns: File patterns to exclude (e.g., ["*.pyc", "node_modules/*"])
             max_files: Maximum number of files to search in directory mode
             follow_symlinks: Whether to follow symbolic links in directory search
+            respect_gitignore: Inside a git repository, search only files git knows about
+                (tracked or untracked-but-not-ignored) instead of walking the filesystem
+            timeout: Stop a directory search after this many seconds
+            max_bytes: Stop a directory search once this many bytes of source would be parsed
             
         Returns:
             List of search results with file paths, line numbers, matched text, context,
-            and metadata including symbol_type for definitions.
+            and metadata including symbol_type for definitions. A directory search stopped
+            by timeout or max_bytes ends with a {"truncated": reason, ...} entry holding
+            files_total, files_searched, bytes_searched and matches counters.
         """
+        watch_scope(scope, git_revision)
+        cancel_event = threading.Event()
+        progress = make_progress_reporter(ctx, asyncio.get_running_loop()) if ctx is not None else None
         try:
-            # Validate search type
-            supported_types = ["function-calls", "symbol-definitions"]
-            if search_type not in supported_types:
-                return [{"error": f"Unsupported search type '{search_type}'. Supported: {supported_types}"}]
-            
-            # Set up search parameters with defaults for directory-specific options
-            params = SearchParameters(
-                search_type=search_type,
-                target=target,
-                scope=scope,
-                language=language,
-                git_revision=git_revision,
-                max_results=max_results,
-                include_context=include_context,
-                file_patterns=file_patterns or ["*"],
-                exclude_patterns=exclude_patterns or ["*.pyc", "*.pyo", "*.pyd", "__pycache__/*", ".git/*", ".svn/*", "node_modules/*", "*.min.js"],
-                max_files=max_files,
-                follow_symlinks=follow_symlinks
+            return await run_tool(
+                search_code, search_type, target, scope, language, git_revision, max_results,
+                include_context, file_patterns, exclude_patterns, max_files, follow_symlinks,
+                respect_gitignore, timeout, max_bytes, cancel_event=cancel_event, progress=progress
             )
-            
-            search_engine = SearchEngine()
-            
-            # Auto-detect file vs directory scope and route accordingly
-            if os.path.isfile(scope):
-                # Single file search
-                results = search_engine.search_file(scope, params)
-                return [result.to_dict() for result in results]
-            elif os.path.isdir(scope):
-                # Directory search
-                results = search_engine.search_directory(scope, params)
-                return [result.to_dict() for result in results]
-            else:
-                # Check if it's a URL
-                if scope.startswith(('http://', 'https://')):
-                    # Single file search for URLs
-                    results = search_engine.search_file(scope, params)
-                    return [result.to_dict() for result in results]
-                else:
-                    return [{"error": f"Scope '{scope}' is not a valid file, directory, or URL"}]
-                
-        except Exception as e:
-            return [{"error": f"Search failed: {str(e)}"}]
+        except asyncio.CancelledError:
+            # The worker thread can't be interrupted; tell the search to stop
+            cancel_event.set()
+            raise
     
     # Run the server
     mcp.run()
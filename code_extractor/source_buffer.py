@@ -0,0 +1,66 @@
+"""Bytes-first source representation shared by the extraction tools."""
+
+import re
+from typing import Any, Optional, Union
+
+from .line_index import LineIndex
+
+
+_NON_WHITESPACE = re.compile(rb'\S')
+
+
+class SourceBuffer:
+    """
+    Source file content kept as UTF-8 bytes.
+
+    tree-sitter reports byte offsets, so the content is parsed and sliced as
+    bytes and only the spans handed back to callers are decoded. Spans are
+    sliced through a memoryview, so nothing is copied until it is decoded.
+    """
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview]):
+        self.data = data
+        self._view = memoryview(data)
+        self._lines: Optional[LineIndex] = None
+
+    @classmethod
+    def from_text(cls, text: str) -> 'SourceBuffer':
+        """Create a buffer from already decoded text."""
+        return cls(text.encode('utf-8'))
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    def __contains__(self, needle: bytes) -> bool:
+        return self.data.find(needle) != -1
+
+    @property
+    def lines(self) -> LineIndex:
+        """Line offset table, built on first use."""
+        if self._lines is None:
+            self._lines = LineIndex(self.data)
+        return self._lines
+
+    def is_blank(self) -> bool:
+        """Check whether the source is empty or whitespace only."""
+        return _NON_WHITESPACE.search(self._view) is None
+
+    def text(self, start_byte: int = 0, end_byte: Optional[int] = None) -> str:
+        """
+        Decode a byte span of the source.
+
+        Invalid UTF-8 is replaced rather than raised, so one bad byte in a
+        file doesn't hide the rest of it.
+
+        Args:
+            start_byte: Start of the span
+            end_byte: End of the span (exclusive), defaults to the end of the source
+
+        Returns:
+            Decoded text of the span
+        """
+        return str(self._view[start_byte:end_byte], 'utf-8', 'replace')
+
+    def node_text(self, node: Any) -> str:
+        """Decode the span covered by a tree-sitter node."""
+        return self.text(node.start_byte, node.end_byte)
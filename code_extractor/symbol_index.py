@@ -0,0 +1,329 @@
+"""Persistent on-disk index of extracted symbols."""
+
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .models import CodeSymbol, Parameter, SymbolKind
+
+
+# Configuration constants
+INDEX_FILENAME = "symbols.sqlite3"
+SCHEMA_VERSION = 5
+
+# Environment variable overrides; the index is disabled unless a directory is set
+INDEX_DIR = os.environ.get('MCP_INDEX_DIR')
+
+
+@dataclass
+class SymbolLocation:
+    """Where a symbol is defined, as recorded in the name index."""
+    name: str
+    kind: SymbolKind
+    file_path: str
+    start_line: int
+    end_line: int
+    start_byte: int
+    end_byte: int
+    parent: Optional[str] = None
+
+
+def symbol_to_record(symbol: CodeSymbol) -> Dict[str, Any]:
+    """Convert a CodeSymbol to a JSON-serializable record."""
+    record = asdict(symbol)
+    record['kind'] = symbol.kind.value
+    return record
+
+
+def symbol_from_record(record: Dict[str, Any]) -> CodeSymbol:
+    """Rebuild a CodeSymbol from a record produced by symbol_to_record."""
+    data = dict(record)
+    data['kind'] = SymbolKind(data['kind'])
+    data['parameters'] = [Parameter(**p) for p in data.get('parameters', [])]
+    return CodeSymbol(**data)
+
+
+class SymbolIndex:
+    """
+    SQLite-backed store of extracted symbols per file.
+
+    Each file row is keyed by path and records the mtime, size and content
+    hash it was built from; a lookup only succeeds when all of them still
+    match, so stale rows are never served.
+
+    Every stored symbol is also entered in an inverted name index, so the
+    files defining a name can be found without reading any of them.
+    """
+
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS names")
+            self._conn.execute("DROP TABLE IF EXISTS files")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                language TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                symbols TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS names (
+                name TEXT NOT NULL,
+                path TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                parent TEXT,
+                start_line INTEGER NOT NULL,
+                end_line INTEGER NOT NULL,
+                start_byte INTEGER NOT NULL,
+                end_byte INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS names_name ON names (name)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS names_path ON names (path)")
+        self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self._conn.commit()
+
+    @staticmethod
+    def _key_path(file_path: Union[str, Path]) -> str:
+        return str(Path(file_path).resolve())
+
+    def lookup(self, file_path: Union[str, Path], language: str, content_hash: str) -> Optional[List[CodeSymbol]]:
+        """
+        Get indexed symbols for a file if the index entry is still current.
+
+        Args:
+            file_path: Path of the file on disk
+            language: Language the symbols were extracted with
+            content_hash: Hash of the content about to be parsed
+
+        Returns:
+            List of CodeSymbol objects, or None if not indexed or stale
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT language, mtime_ns, size, content_hash, symbols FROM files WHERE path = ?",
+                (self._key_path(file_path),)
+            ).fetchone()
+
+        if row is None:
+            return None
+        if row[:4] != (language, stat.st_mtime_ns, stat.st_size, content_hash):
+            return None
+        return [symbol_from_record(r) for r in json.loads(row[4])]
+
+    def store(self, file_path: Union[str, Path], language: str, content_hash: str,
+              symbols: List[CodeSymbol], stat: Optional[os.stat_result] = None) -> None:
+        """
+        Record the symbols extracted from a file's current on-disk content.
+
+        Args:
+            file_path: Path of the file on disk
+            language: Language the symbols were extracted with
+            content_hash: Hash of the content the symbols came from
+            symbols: Complete (depth 0) list of extracted symbols
+            stat: File status taken before the file was read, if available
+        """
+        try:
+            stat = stat or os.stat(file_path)
+        except OSError:
+            return
+
+        key = self._key_path(file_path)
+        payload = json.dumps([symbol_to_record(s) for s in symbols], separators=(',', ':'))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (path, language, mtime_ns, size, content_hash, symbols) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, language, stat.st_mtime_ns, stat.st_size, content_hash, payload)
+            )
+            self._conn.execute("DELETE FROM names WHERE path = ?", (key,))
+            self._conn.executemany(
+                "INSERT INTO names (name, path, kind, parent, start_line, end_line, start_byte, end_byte) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                ((s.name, key, s.kind.value, s.parent, s.start_line, s.end_line, s.start_byte, s.end_byte)
+                 for s in symbols)
+            )
+            self._conn.commit()
+
+    def is_current(self, file_path: Union[str, Path]) -> bool:
+        """
+        Check whether a file's entry matches its on-disk mtime and size.
+
+        Unlike lookup this doesn't need the content hash, so the file isn't
+        read; it is the check used before trusting the name index for a file.
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime_ns, size FROM files WHERE path = ?", (self._key_path(file_path),)
+            ).fetchone()
+        return row == (stat.st_mtime_ns, stat.st_size)
+
+    def find_definitions(self, name: str, file_paths: Optional[Iterable[Union[str, Path]]] = None
+                         ) -> List[SymbolLocation]:
+        """
+        Find the indexed definitions of a symbol name.
+
+        Only entries whose file is still current are returned.
+
+        Args:
+            name: Exact symbol name
+            file_paths: Optional files to restrict the lookup to
+
+        Returns:
+            List of SymbolLocation objects, ordered by file and position
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT names.path, kind, parent, start_line, end_line, start_byte, end_byte, mtime_ns, size "
+                "FROM names JOIN files ON files.path = names.path WHERE name = ? "
+                "ORDER BY names.path, start_byte",
+                (name,)
+            ).fetchall()
+
+        wanted = {self._key_path(p) for p in file_paths} if file_paths is not None else None
+        locations = []
+        current: Dict[str, bool] = {}
+        for path, kind, parent, start_line, end_line, start_byte, end_byte, mtime_ns, size in rows:
+            if wanted is not None and path not in wanted:
+                continue
+            if path not in current:
+                try:
+                    stat = os.stat(path)
+                    current[path] = (stat.st_mtime_ns, stat.st_size) == (mtime_ns, size)
+                except OSError:
+                    current[path] = False
+            if current[path]:
+                locations.append(SymbolLocation(name, SymbolKind(kind), path, start_line, end_line,
+                                                start_byte, end_byte, parent))
+        return locations
+
+    def file_stamps(self) -> Dict[str, Tuple[int, int, str]]:
+        """Map of every indexed path -> (mtime_ns, size, content_hash) it was indexed at."""
+        with self._lock:
+            rows = self._conn.execute("SELECT path, mtime_ns, size, content_hash FROM files").fetchall()
+        return {path: (mtime_ns, size, digest) for path, mtime_ns, size, digest in rows}
+
+    def restamp(self, stamps: Iterable[Tuple[str, Tuple[int, int], Tuple[int, int]]]) -> None:
+        """
+        Move entries to a new (mtime_ns, size) without re-extracting them.
+
+        Used when a file's content is known to be unchanged although its
+        mtime moved, e.g. after a fresh checkout. An entry is only updated
+        if it still has the recorded stamp.
+
+        Args:
+            stamps: (path, recorded (mtime_ns, size), new (mtime_ns, size)) per file
+        """
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE files SET mtime_ns = ?, size = ? WHERE path = ? AND mtime_ns = ? AND size = ?",
+                ((*new, self._key_path(path), *recorded) for path, recorded, new in stamps)
+            )
+            self._conn.commit()
+
+    def relocate(self, old_root: Union[str, Path], new_root: Union[str, Path]) -> None:
+        """
+        Rewrite the paths of entries under one directory to another.
+
+        Lets an index built from a checkout at one path serve the same tree
+        checked out elsewhere. Entries already under new_root are dropped.
+        """
+        old_prefix = os.path.join(self._key_path(old_root), '')
+        new_prefix = os.path.join(self._key_path(new_root), '')
+        if old_prefix == new_prefix:
+            return
+        with self._lock:
+            for table in ("names", "files"):
+                self._conn.execute(f"DELETE FROM {table} WHERE substr(path, 1, ?) = ?",
+                                   (len(new_prefix), new_prefix))
+                self._conn.execute(f"UPDATE {table} SET path = ? || substr(path, ?) WHERE substr(path, 1, ?) = ?",
+                                   (new_prefix, len(old_prefix) + 1, len(old_prefix), old_prefix))
+            self._conn.commit()
+
+    def remove(self, file_path: Union[str, Path]) -> None:
+        """Drop a file from the index."""
+        key = self._key_path(file_path)
+        with self._lock:
+            self._conn.execute("DELETE FROM names WHERE path = ?", (key,))
+            self._conn.execute("DELETE FROM files WHERE path = ?", (key,))
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """
+        Get index statistics.
+
+        Returns:
+            Dictionary with index statistics
+        """
+        with self._lock:
+            files = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            names = self._conn.execute("SELECT COUNT(*) FROM names").fetchone()[0]
+        return {'path': str(self.db_path), 'files': files, 'names': names}
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+_default_index: Optional[SymbolIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def set_index_dir(index_dir: Optional[Union[str, Path]]) -> None:
+    """
+    Point the process-wide indexes at a directory, overriding MCP_INDEX_DIR.
+
+    Only indexes opened after the call are affected.
+    """
+    global INDEX_DIR
+    INDEX_DIR = str(index_dir) if index_dir is not None else None
+
+
+def get_index_dir() -> Optional[Path]:
+    """Get the directory the process-wide indexes live in, or None if indexing is off."""
+    return Path(INDEX_DIR).expanduser() if INDEX_DIR else None
+
+
+def get_symbol_index() -> Optional[SymbolIndex]:
+    """
+    Get the process-wide symbol index in the configured index directory.
+
+    Returns:
+        SymbolIndex instance, or None if no index directory is configured
+    """
+    global _default_index
+    index_dir = get_index_dir()
+    if index_dir is None:
+        return None
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = SymbolIndex(index_dir / INDEX_FILENAME)
+        return _default_index
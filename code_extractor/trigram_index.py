@@ -0,0 +1,296 @@
+"""Persistent trigram index used to skip files that cannot match a search."""
+
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .symbol_index import get_index_dir
+
+
+# Configuration constants
+TRIGRAM_INDEX_FILENAME = "trigrams.sqlite3"
+TRIGRAM_SCHEMA_VERSION = 1
+_QUERY_BATCH = 500  # Paths per lookup, under SQLite's bound-parameter limit
+_WRITE_BATCH = 64  # Re-indexed files per write transaction
+
+_WORD = re.compile(rb'\w+')
+
+
+def word_trigrams(data: Union[bytes, memoryview]) -> Set[int]:
+    """
+    Get the trigrams of every word in a byte buffer.
+
+    Only trigrams that lie inside a run of word characters are kept, so each
+    distinct identifier is split once however often it occurs. Any word
+    trigram of a search target then lies inside a single word of every file
+    containing the target.
+
+    Args:
+        data: Source bytes
+
+    Returns:
+        Set of trigrams packed into integers
+    """
+    grams = set()
+    for word in set(_WORD.findall(data)):
+        for i in range(len(word) - 2):
+            grams.add(int.from_bytes(word[i:i + 3], 'big'))
+    return grams
+
+
+class TrigramIndex:
+    """
+    SQLite-backed inverted index from word trigrams to files.
+
+    A file only has to be read and parsed by a search if it contains every
+    word trigram of the target. Each file row records the mtime and size it
+    was indexed at; files whose row is missing or stale are read, checked
+    for the target directly and re-indexed on the way.
+    """
+
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != TRIGRAM_SCHEMA_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS postings")
+            self._conn.execute("DROP TABLE IF EXISTS files")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS postings (
+                trigram INTEGER NOT NULL,
+                file_id INTEGER NOT NULL,
+                PRIMARY KEY (trigram, file_id)
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS postings_file ON postings (file_id)")
+        self._conn.execute(f"PRAGMA user_version={TRIGRAM_SCHEMA_VERSION}")
+        self._conn.commit()
+
+    @staticmethod
+    def _key_path(file_path: Union[str, Path]) -> str:
+        return str(Path(file_path).resolve())
+
+    def update(self, file_path: Union[str, Path], data: Optional[bytes] = None) -> None:
+        """
+        Index a file's current on-disk content.
+
+        Args:
+            file_path: Path of the file on disk
+            data: File content if already read, otherwise it is read here.
+                Callers passing data should use store with a stat taken
+                before the read instead, so an edit in between isn't missed.
+        """
+        try:
+            stat = os.stat(file_path)
+            if data is None:
+                data = Path(file_path).read_bytes()
+        except OSError:
+            return
+
+        self.store(file_path, word_trigrams(data), stat)
+
+    def store(self, file_path: Union[str, Path], grams: Set[int], stat: os.stat_result) -> None:
+        """
+        Record trigrams already computed from a file's content.
+
+        Args:
+            file_path: Path of the file on disk
+            grams: word_trigrams of the file's content
+            stat: File status taken before the file was read
+        """
+        with self._lock:
+            self._store(self._key_path(file_path), stat, grams)
+            self._conn.commit()
+
+    def _store(self, key: str, stat: os.stat_result, grams: Set[int]) -> None:
+        """Replace a file's postings; the caller holds the lock and commits."""
+        self._delete(key)
+        cursor = self._conn.execute(
+            "INSERT INTO files (path, mtime_ns, size) VALUES (?, ?, ?)",
+            (key, stat.st_mtime_ns, stat.st_size)
+        )
+        self._conn.executemany(
+            "INSERT INTO postings (trigram, file_id) VALUES (?, ?)",
+            ((gram, cursor.lastrowid) for gram in grams)
+        )
+
+    def _delete(self, key: str) -> None:
+        row = self._conn.execute("SELECT id FROM files WHERE path = ?", (key,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM postings WHERE file_id = ?", row)
+            self._conn.execute("DELETE FROM files WHERE id = ?", row)
+
+    def candidates(self, file_paths: List[Path], needle: bytes) -> List[Path]:
+        """
+        Narrow a list of files down to those that may contain a byte string.
+
+        Indexed files are checked against their trigrams without being read.
+        Files that are not indexed, or changed since, are read, indexed and
+        checked with a direct substring search. Files are read outside the
+        index lock, which is only taken for short lookups and batched writes.
+
+        Args:
+            file_paths: Files to check, in search order
+            needle: Byte string a file must contain to match
+
+        Returns:
+            The files that may contain needle, in their original order
+        """
+        grams = word_trigrams(needle)
+        keys = [self._key_path(file_path) for file_path in file_paths]
+        with self._lock:
+            indexed = self._stamps(keys)
+            matching = self._files_with_trigrams(grams) if grams else None
+
+        result = []
+        pending: List[Tuple[str, os.stat_result, Set[int]]] = []
+        for file_path, key in zip(file_paths, keys):
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                result.append(file_path)  # Let the search report it
+                continue
+
+            entry = indexed.get(key)
+            if entry is not None and entry[1:] == (stat.st_mtime_ns, stat.st_size):
+                if matching is None or entry[0] in matching:
+                    result.append(file_path)
+                continue
+
+            try:
+                data = Path(file_path).read_bytes()
+            except OSError:
+                result.append(file_path)
+                continue
+            pending.append((key, stat, word_trigrams(data)))
+            if needle in data:
+                result.append(file_path)
+            if len(pending) >= _WRITE_BATCH:
+                self._store_batch(pending)
+                pending = []
+
+        self._store_batch(pending)
+        return result
+
+    def _stamps(self, keys: List[str]) -> Dict[str, Tuple[int, int, int]]:
+        """Map of indexed path -> (file id, mtime_ns, size) for the given paths only."""
+        stamps = {}
+        for start in range(0, len(keys), _QUERY_BATCH):
+            batch = keys[start:start + _QUERY_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT path, id, mtime_ns, size FROM files WHERE path IN ({placeholders})", batch
+            )
+            stamps.update((path, (file_id, mtime_ns, size)) for path, file_id, mtime_ns, size in rows)
+        return stamps
+
+    def _store_batch(self, entries: List[Tuple[str, os.stat_result, Set[int]]]) -> None:
+        """Index a batch of freshly read files in one transaction."""
+        if not entries:
+            return
+        with self._lock:
+            for key, stat, grams in entries:
+                self._store(key, stat, grams)
+            self._conn.commit()
+
+    def _files_with_trigrams(self, grams: Set[int]) -> Set[int]:
+        """Ids of the files whose postings include every trigram."""
+        placeholders = ",".join("?" * len(grams))
+        rows = self._conn.execute(
+            f"SELECT file_id FROM postings WHERE trigram IN ({placeholders}) "
+            f"GROUP BY file_id HAVING COUNT(*) = ?",
+            (*grams, len(grams))
+        )
+        return {file_id for (file_id,) in rows}
+
+    def restamp(self, stamps: Iterable[Tuple[str, Tuple[int, int], Tuple[int, int]]]) -> None:
+        """
+        Move entries to a new (mtime_ns, size) without re-reading them.
+
+        Args:
+            stamps: (path, recorded (mtime_ns, size), new (mtime_ns, size)) per file
+        """
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE files SET mtime_ns = ?, size = ? WHERE path = ? AND mtime_ns = ? AND size = ?",
+                ((*new, self._key_path(path), *recorded) for path, recorded, new in stamps)
+            )
+            self._conn.commit()
+
+    def relocate(self, old_root: Union[str, Path], new_root: Union[str, Path]) -> None:
+        """Rewrite the paths of entries under one directory to another, dropping any under new_root."""
+        old_prefix = os.path.join(self._key_path(old_root), '')
+        new_prefix = os.path.join(self._key_path(new_root), '')
+        if old_prefix == new_prefix:
+            return
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM postings WHERE file_id IN (SELECT id FROM files WHERE substr(path, 1, ?) = ?)",
+                (len(new_prefix), new_prefix)
+            )
+            self._conn.execute("DELETE FROM files WHERE substr(path, 1, ?) = ?", (len(new_prefix), new_prefix))
+            self._conn.execute("UPDATE files SET path = ? || substr(path, ?) WHERE substr(path, 1, ?) = ?",
+                               (new_prefix, len(old_prefix) + 1, len(old_prefix), old_prefix))
+            self._conn.commit()
+
+    def remove(self, file_path: Union[str, Path]) -> None:
+        """Drop a file from the index."""
+        with self._lock:
+            self._delete(self._key_path(file_path))
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """
+        Get index statistics.
+
+        Returns:
+            Dictionary with index statistics
+        """
+        with self._lock:
+            files = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            postings = self._conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0]
+        return {'path': str(self.db_path), 'files': files, 'postings': postings}
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+_default_index: Optional[TrigramIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_trigram_index() -> Optional[TrigramIndex]:
+    """
+    Get the process-wide trigram index, stored next to the symbol index.
+
+    Returns:
+        TrigramIndex instance, or None if no index directory is configured
+    """
+    global _default_index
+    index_dir = get_index_dir()
+    if index_dir is None:
+        return None
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = TrigramIndex(index_dir / TRIGRAM_INDEX_FILENAME)
+        return _default_index
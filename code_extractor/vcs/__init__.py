@@ -2,6 +2,7 @@
 
 from abc import ABC, abstractmethod
 from pathlib import Path
+from typing import List, Optional
 
 
 class VCSProvider(ABC):
@@ -15,4 +16,13 @@ class VCSProvider(ABC):
     @abstractmethod
     def find_repo_root(self, file_path: Path) -> Path:
         """Find the repository root for given file path."""
-        pass
\ No newline at end of file
+        pass
+    
+    @abstractmethod
+    def list_files(self, directory: Path, revision: Optional[str] = None) -> List[str]:
+        """List files under a directory, relative to it, as known to the VCS."""
+        pass
+    
+    def resolve_revision(self, file_path: Path, revision: str) -> str:
+        """Resolve a symbolic revision to an immutable identifier, if the VCS has one."""
+        return revision
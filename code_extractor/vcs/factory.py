@@ -1,25 +1,35 @@
 """VCS provider factory for auto-detection."""
 
+import atexit
 import subprocess
 from pathlib import Path
 from typing import Optional
 
 from . import VCSProvider
-from .git import GitProvider
+from .git import GitProvider, find_git_root, nearest_existing_directory
+
+
+# Shared provider so its persistent cat-file processes and caches are reused
+_git_provider = GitProvider(batch=True)
+atexit.register(_git_provider.close)
 
 
 def detect_vcs_provider(file_path: Path) -> Optional[VCSProvider]:
     """Auto-detect VCS type and return appropriate provider."""
-    search_path = file_path if file_path.is_dir() else file_path.parent
+    search_path = nearest_existing_directory(file_path)
+    
+    # Fast path: a .git entry at or above the path, no subprocess needed
+    if find_git_root(search_path) is not None:
+        return _git_provider
     
-    # Check for git repository
+    # Check for git repository (also covers GIT_DIR and similar setups)
     try:
         subprocess.run(
             ['git', '-C', str(search_path), 'rev-parse', '--git-dir'],
             capture_output=True,
             check=True
         )
-        return GitProvider()
+        return _git_provider
     except (subprocess.CalledProcessError, FileNotFoundError):
         pass
     
@@ -1,13 +1,134 @@
 """Git provider implementation for VCS abstraction layer."""
 
+import os
+import re
 import subprocess
+import threading
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from cachetools import LRUCache, TTLCache
 
 from . import VCSProvider
 
 
+# Configuration constants
+DEFAULT_REVISION_TTL = 2  # seconds a symbolic revision (HEAD, branch) stays resolved
+DEFAULT_REVISION_CACHE_SIZE = 256
+DEFAULT_REPO_ROOT_CACHE_SIZE = 4096
+DEFAULT_BLOB_CACHE_BYTES = 32 * 1024 * 1024
+DEFAULT_BLOB_PATH_CACHE_SIZE = 16384
+
+# Environment variable overrides
+REVISION_TTL = float(os.environ.get('MCP_GIT_REVISION_TTL', DEFAULT_REVISION_TTL))
+BLOB_CACHE_BYTES = int(os.environ.get('MCP_GIT_BLOB_CACHE_BYTES', DEFAULT_BLOB_CACHE_BYTES))
+
+_FULL_SHA = re.compile(r'^[0-9a-f]{40}([0-9a-f]{24})?$')
+
+# directory -> work tree root found by walking up to a .git entry
+_git_roots: LRUCache = LRUCache(maxsize=DEFAULT_REPO_ROOT_CACHE_SIZE)
+_git_roots_lock = threading.Lock()
+
+
+def _decode_text(content: bytes) -> str:
+    """Decode blob content the way text-mode subprocess output is decoded."""
+    return content.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+
+class GitCatFileBatch:
+    """
+    A long-lived ``git cat-file --batch`` process for one repository.
+    
+    Object requests are written to its stdin and read back from stdout, so
+    any number of reads costs a single fork/exec.
+    """
+    
+    def __init__(self, repo_root: Path):
+        self.repo_root = repo_root
+        self._lock = threading.Lock()
+        self._process: Optional[subprocess.Popen] = None
+    
+    def _ensure_process(self) -> subprocess.Popen:
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(
+                ['git', '-C', str(self.repo_root), 'cat-file', '--batch'],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+        return self._process
+    
+    def read(self, object_name: str) -> Optional[Tuple[str, str, bytes]]:
+        """
+        Read an object.
+        
+        Args:
+            object_name: Any object name git accepts, e.g. ``<tree>:<path>``
+            
+        Returns:
+            (object SHA, object type, content), or None if the object does not exist
+        """
+        if '\n' in object_name:
+            raise ValueError(f"Object name cannot contain a newline: {object_name!r}")
+        
+        with self._lock:
+            process = self._ensure_process()
+            try:
+                process.stdin.write(object_name.encode('utf-8') + b'\n')
+                process.stdin.flush()
+                header = process.stdout.readline()
+                if not header:
+                    raise OSError("git cat-file exited unexpectedly")
+                # The name is echoed back as given, spaces included
+                header = header.rstrip(b'\n')
+                if header.endswith((b' missing', b' ambiguous')):
+                    return None
+                sha, obj_type, size = header.split(b' ')
+                content = process.stdout.read(int(size))
+                process.stdout.read(1)  # Trailing newline after the content
+            except (OSError, ValueError):
+                self._kill()
+                raise
+        return sha.decode('ascii'), obj_type.decode('ascii'), content
+    
+    def _kill(self) -> None:
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+    
+    def close(self) -> None:
+        """Terminate the git process."""
+        with self._lock:
+            if self._process is not None:
+                self._process.stdin.close()
+                self._process.wait()
+                self._process = None
+
+
 class GitProvider(VCSProvider):
-    """Git implementation of VCSProvider."""
+    """
+    Git implementation of VCSProvider.
+    
+    By default every read runs its own git commands. In batch mode, file
+    reads go through one persistent ``git cat-file --batch`` process per
+    repository, and repository roots and revision-to-tree lookups are cached.
+    Content at a given tree never changes, so batch mode also keeps decoded
+    blobs in a size-bounded cache keyed by blob SHA.
+    """
+    
+    def __init__(self, batch: bool = False):
+        self.batch = batch
+        self._lock = threading.Lock()
+        self._batches: Dict[Path, GitCatFileBatch] = {}
+        self._repo_roots: LRUCache = LRUCache(maxsize=DEFAULT_REPO_ROOT_CACHE_SIZE)
+        # Full SHAs never change meaning; symbolic names move, so expire them quickly
+        self._trees: LRUCache = LRUCache(maxsize=DEFAULT_REVISION_CACHE_SIZE)
+        self._symbolic_trees: TTLCache = TTLCache(maxsize=DEFAULT_REVISION_CACHE_SIZE, ttl=REVISION_TTL)
+        self._commits: LRUCache = LRUCache(maxsize=DEFAULT_REVISION_CACHE_SIZE)
+        self._symbolic_commits: TTLCache = TTLCache(maxsize=DEFAULT_REVISION_CACHE_SIZE, ttl=REVISION_TTL)
+        self._blob_shas: LRUCache = LRUCache(maxsize=DEFAULT_BLOB_PATH_CACHE_SIZE)  # (root, tree, path) -> blob
+        self._blobs: LRUCache = LRUCache(maxsize=BLOB_CACHE_BYTES, getsizeof=len)  # blob -> content
     
     def get_file_content(self, file_path: Path, revision: str) -> str:
         """Get file content at specific git revision."""
@@ -17,6 +138,9 @@ class GitProvider(VCSProvider):
         # Convert to forward slashes for git (works on all platforms)
         git_path = str(relative_path).replace('\\', '/')
         
+        if self.batch:
+            return self._read_batched(repo_root, revision, git_path)
+        
         result = subprocess.run(
             ['git', '-C', str(repo_root), 'show', f'{revision}:{git_path}'],
             capture_output=True,
@@ -25,9 +149,132 @@ class GitProvider(VCSProvider):
         )
         return result.stdout
     
+    def _read_batched(self, repo_root: Path, revision: str, git_path: str) -> str:
+        """Read a file at a revision through the repository's cat-file process."""
+        tree = self.resolve_tree(repo_root, revision)
+        path_key = (repo_root, tree, git_path)
+        with self._lock:
+            blob = self._blob_shas.get(path_key)
+            content = self._blobs.get(blob) if blob is not None else None
+        if content is not None:
+            return content
+        
+        found = self._get_batch(repo_root).read(f'{tree}:{git_path}')
+        if found is None or found[1] != 'blob':
+            raise subprocess.CalledProcessError(
+                128, ['git', 'cat-file', '--batch'],
+                stderr=f"fatal: path '{git_path}' does not exist in '{revision}'"
+            )
+        blob, content = found[0], _decode_text(found[2])
+        
+        with self._lock:
+            self._blob_shas[path_key] = blob
+            try:
+                self._blobs[blob] = content
+            except ValueError:
+                pass  # Larger than the whole cache
+        return content
+    
+    def _get_batch(self, repo_root: Path) -> GitCatFileBatch:
+        with self._lock:
+            batch = self._batches.get(repo_root)
+            if batch is None:
+                batch = GitCatFileBatch(repo_root)
+                self._batches[repo_root] = batch
+            return batch
+    
+    def resolve_revision(self, file_path: Path, revision: str) -> str:
+        """
+        Resolve a revision (HEAD~1, branch, tag, ...) to its commit SHA.
+        
+        Raises:
+            subprocess.CalledProcessError: If the revision does not exist
+        """
+        repo_root = self.find_repo_root(file_path)
+        return self._rev_parse(repo_root, revision, 'commit', self._commits, self._symbolic_commits)
+    
+    def resolve_tree(self, repo_root: Path, revision: str) -> str:
+        """
+        Resolve a revision to the SHA of its root tree.
+        
+        Raises:
+            subprocess.CalledProcessError: If the revision does not exist
+        """
+        return self._rev_parse(repo_root, revision, 'tree', self._trees, self._symbolic_trees)
+    
+    def _rev_parse(self, repo_root: Path, revision: str, object_type: str,
+                   sha_cache: LRUCache, symbolic_cache: TTLCache) -> str:
+        """Peel a revision to an object type, caching by how stable the name is."""
+        cache = sha_cache if _FULL_SHA.match(revision) else symbolic_cache
+        key = (repo_root, revision)
+        with self._lock:
+            sha = cache.get(key)
+        if sha is not None:
+            return sha
+        
+        result = subprocess.run(
+            ['git', '-C', str(repo_root), 'rev-parse', '--verify', '--quiet', f'{revision}^{{{object_type}}}'],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        sha = result.stdout.strip()
+        with self._lock:
+            cache[key] = sha
+        return sha
+    
+    def close(self) -> None:
+        """Terminate any persistent git processes."""
+        with self._lock:
+            batches = list(self._batches.values())
+            self._batches.clear()
+        for batch in batches:
+            batch.close()
+    
+    def list_files(self, directory: Path, revision: Optional[str] = None) -> List[str]:
+        """
+        List files under a directory, relative to it.
+        
+        Without a revision this is the work tree as git sees it: tracked files
+        plus untracked files that are not ignored. With a revision it is the
+        blobs in that revision's tree, whether or not they exist on disk.
+        """
+        if revision is None:
+            result = subprocess.run(
+                ['git', '-C', str(directory), 'ls-files', '-z', '--cached', '--others', '--exclude-standard'],
+                capture_output=True,
+                check=True
+            )
+            paths = result.stdout.decode('utf-8', errors='surrogateescape').split('\0')
+            # Unmerged files are listed once per stage
+            return [p for p in dict.fromkeys(paths) if p]
+        
+        result = subprocess.run(
+            ['git', '-C', str(directory), 'ls-tree', '-r', '-z', revision, '--', '.'],
+            capture_output=True,
+            check=True
+        )
+        paths = []
+        for entry in result.stdout.decode('utf-8', errors='surrogateescape').split('\0'):
+            if not entry:
+                continue
+            info, path = entry.split('\t', 1)
+            if info.split(' ')[1] == 'blob':  # Skip submodule commits
+                paths.append(path)
+        return paths
+    
     def find_repo_root(self, file_path: Path) -> Path:
         """Find git repository root."""
-        search_path = file_path if file_path.is_dir() else file_path.parent
+        search_path = nearest_existing_directory(file_path)
+        
+        if self.batch:
+            repo_root = find_git_root(search_path)
+            if repo_root is not None:
+                return repo_root
+            with self._lock:
+                repo_root = self._repo_roots.get(search_path)
+            if repo_root is not None:
+                return repo_root
         
         result = subprocess.run(
             ['git', '-C', str(search_path), 'rev-parse', '--show-toplevel'],
@@ -35,4 +282,55 @@ class GitProvider(VCSProvider):
             text=True,
             check=True
         )
-        return Path(result.stdout.strip())
\ No newline at end of file
+        repo_root = Path(result.stdout.strip())
+        
+        if self.batch:
+            with self._lock:
+                self._repo_roots[search_path] = repo_root
+        return repo_root
+
+
+def nearest_existing_directory(file_path: Path) -> Path:
+    """Nearest existing directory at or above a path, which may only exist at some revision."""
+    search_path = file_path if file_path.is_dir() else file_path.parent
+    while not search_path.is_dir() and search_path != search_path.parent:
+        search_path = search_path.parent
+    return search_path
+
+
+def find_git_root(path: Path) -> Optional[Path]:
+    """
+    Find the git work tree containing a path without running git.
+    
+    Walks up from the path looking for a ``.git`` directory or file. Results
+    are memoized per directory and re-validated on every hit, so a ``.git``
+    that disappears, or one created in the directory itself, is noticed.
+    
+    Returns:
+        Resolved work tree root, or None if no ``.git`` was found (callers
+        should fall back to asking git, which also understands GIT_DIR etc.)
+    """
+    start = nearest_existing_directory(path)
+    
+    with _git_roots_lock:
+        root = _git_roots.get(start)
+    if (root is not None and (root / '.git').exists() and
+            (start == root or not (start / '.git').exists())):
+        return root
+    
+    resolved = start.resolve()
+    for directory in (resolved, *resolved.parents):
+        if (directory / '.git').exists():
+            with _git_roots_lock:
+                _git_roots[start] = directory
+            return directory
+    
+    with _git_roots_lock:
+        _git_roots.pop(start, None)
+    return None
+
+
+def clear_git_root_cache() -> None:
+    """Forget all memoized repository roots."""
+    with _git_roots_lock:
+        _git_roots.clear()
@@ -0,0 +1,172 @@
+"""Polling watcher that reports changes to source files under watched scopes."""
+
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from .languages import get_language_for_file
+
+
+# Configuration constants
+DEFAULT_POLL_INTERVAL = 2.0  # seconds
+DEFAULT_MAX_WATCHED_FILES = 50000
+IGNORED_DIRS = {'.git', '.hg', '.svn', '__pycache__', 'node_modules'}
+
+# Environment variable overrides
+MAX_WATCHED_FILES = int(os.environ.get('MCP_WATCH_MAX_FILES', DEFAULT_MAX_WATCHED_FILES))
+
+# Called with (changed_or_added, removed) file paths after a poll finds changes
+ChangeCallback = Callable[[List[Path], List[Path]], None]
+
+
+class FileWatcher:
+    """
+    Detects edits to source files by polling their mtime and size.
+
+    Scopes (files or directories) are added as they come up and stay watched
+    for the life of the watcher. The first poll after a scope is added only
+    records its files; later polls report files that were added, changed or
+    removed since the previous one. Only files in a supported language are
+    tracked, so no file content is read while polling.
+
+    Polling uses nothing but stat calls, so it works the same on every
+    platform and filesystem, including network mounts where change
+    notifications are not delivered.
+    """
+
+    def __init__(self, on_change: ChangeCallback, interval: float = DEFAULT_POLL_INTERVAL,
+                 max_files: int = MAX_WATCHED_FILES):
+        self.on_change = on_change
+        self.interval = interval
+        self.max_files = max_files
+        self._scopes: Dict[Path, bool] = {}  # scope -> already snapshotted
+        self._snapshot: Dict[Path, Tuple[int, int]] = {}  # file -> (mtime_ns, size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, scope: Union[str, Path]) -> None:
+        """
+        Start watching a file or directory.
+
+        Scopes inside an already watched directory are ignored; watching a
+        directory replaces any scopes already watched inside it, so no file
+        is scanned twice.
+        """
+        path = Path(scope).resolve()
+        with self._lock:
+            if path in self._scopes or any(parent in self._scopes for parent in path.parents):
+                return
+            for contained in [s for s in self._scopes if path in s.parents]:
+                del self._scopes[contained]
+            self._scopes[path] = False
+
+    def scopes(self) -> List[Path]:
+        """Get the watched scopes."""
+        with self._lock:
+            return list(self._scopes)
+
+    def poll(self) -> Tuple[List[Path], List[Path]]:
+        """
+        Compare every watched file against the previous poll.
+
+        Calls on_change when anything changed.
+
+        Returns:
+            (changed_or_added, removed) file paths
+        """
+        with self._lock:
+            scopes = dict(self._scopes)
+
+        current: Dict[Path, Tuple[int, int]] = {}
+        changed = []
+        for scope, snapshotted in scopes.items():
+            for path, key in self._scan(scope, self.max_files - len(current)):
+                current[path] = key
+                previous = self._snapshot.get(path)
+                if previous != key and (previous is not None or snapshotted):
+                    changed.append(path)
+        removed = [path for path in self._snapshot if path not in current]
+        self._snapshot = current
+
+        with self._lock:
+            for scope in scopes:
+                self._scopes[scope] = True
+
+        if changed or removed:
+            self.on_change(changed, removed)
+        return changed, removed
+
+    def _scan(self, scope: Path, limit: int) -> Iterator[Tuple[Path, Tuple[int, int]]]:
+        """Yield (path, (mtime_ns, size)) for up to limit source files in a scope."""
+        if limit <= 0:
+            return
+        if not scope.is_dir():
+            if get_language_for_file(str(scope)) != 'text':
+                try:
+                    stat = scope.stat()
+                except OSError:
+                    return
+                yield scope, (stat.st_mtime_ns, stat.st_size)
+            return
+
+        stack = [str(scope)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in IGNORED_DIRS:
+                            stack.append(entry.path)
+                        continue
+                    if not entry.is_file(follow_symlinks=False) or get_language_for_file(entry.name) == 'text':
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+
+                yield Path(entry.path), (stat.st_mtime_ns, stat.st_size)
+                limit -= 1
+                if limit <= 0:
+                    return
+
+    def start(self) -> None:
+        """Start polling on a background daemon thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="mcp-watcher", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                # Keep watching; stdout belongs to the MCP transport
+                print(f"Error polling watched files: {e}", file=sys.stderr)
+
+    def stop(self) -> None:
+        """Stop the background thread, waiting for a poll in progress to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        """
+        Get watcher statistics.
+
+        Returns:
+            Dictionary with watcher statistics
+        """
+        with self._lock:
+            scopes = len(self._scopes)
+        return {'scopes': scopes, 'files': len(self._snapshot), 'interval': self.interval}
@@ -0,0 +1,136 @@
+"""Tests for the call-site index."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from code_extractor.call_index import CallIndex, CallSite, callee_matches, normalize_callee
+from code_extractor.file_reader import read_source
+from code_extractor.models import SearchParameters
+from code_extractor.search_engine import SearchEngine
+
+
+@pytest.fixture
+def index(tmp_path):
+    """Create a call index in a temporary directory."""
+    idx = CallIndex(tmp_path / "index" / "calls.sqlite3")
+    yield idx
+    idx.close()
+
+
+def _make_project(tmp_path):
+    (tmp_path / "client.py").write_text(
+        "import requests\n\n"
+        "class Client:\n"
+        "    def fetch(self, url):\n"
+        "        return self.session.get(url)\n\n"
+        "requests.get('https://example.com')\n"
+    )
+    (tmp_path / "app.js").write_text("api\n  .get('/users')\n  .then(render);\nlog(get);\n")
+    (tmp_path / "util.py").write_text("def helper():\n    return compute(1)\n")
+
+
+class TestCalleeMatching:
+    """Test callee normalization and dotted-suffix matching."""
+
+    def test_normalize(self):
+        """Test whitespace and optional chaining are dropped."""
+        assert normalize_callee("api\n  .get") == "api.get"
+        assert normalize_callee("user?.profile.load") == "user.profile.load"
+
+    def test_dotted_suffix(self):
+        """Test a target matches the whole callee or a dotted suffix of it."""
+        assert callee_matches("self.session.get", "get")
+        assert callee_matches("self.session.get", "session.get")
+        assert callee_matches("self.session.get", "self.session.get")
+        assert not callee_matches("self.session.get", "ion.get")
+        assert not callee_matches("self.session.get_all", "get")
+
+
+class TestCallIndex:
+    """Test CallIndex storage and freshness checks."""
+
+    def test_store_and_find(self, index, tmp_path):
+        """Test stored calls are found by name and qualified name."""
+        source = tmp_path / "module.py"
+        source.write_text("requests.get(url)\nsession.get(url)\n")
+        index.store(source, [CallSite("requests.get", 1, 1, 0, 17), CallSite("session.get", 2, 2, 18, 34)])
+
+        assert [c.callee for c in index.find_calls("get")] == ["requests.get", "session.get"]
+        [call] = index.find_calls("requests.get")
+        assert (call.file_path, call.start_line, call.receiver) == (str(source.resolve()), 1, "requests")
+        assert index.find_calls("post") == []
+
+    def test_changed_file_is_stale(self, index, tmp_path):
+        """Test calls from a file edited since indexing are not served."""
+        source = tmp_path / "module.py"
+        source.write_text("run()\n")
+        index.store(source, [CallSite("run", 1, 1, 0, 5)])
+        source.write_text("run()\nrun()\n")
+
+        assert not index.is_current(source)
+        assert index.find_calls("run") == []
+
+    def test_remove(self, index, tmp_path):
+        """Test removed files leave the index."""
+        source = tmp_path / "module.py"
+        source.write_text("run()\n")
+        index.store(source, [CallSite("run", 1, 1, 0, 5)])
+        index.remove(source)
+
+        assert index.stats() == {'path': str(index.db_path), 'files': 0, 'calls': 0}
+
+
+class TestIndexedCallSearch:
+    """Test function-calls searches answered from the call index."""
+
+    def _params(self, tmp_path, target):
+        return SearchParameters(
+            search_type="function-calls",
+            target=target,
+            scope=str(tmp_path),
+            respect_gitignore=False
+        )
+
+    def _summary(self, results):
+        return [(os.path.basename(r.file_path), r.start_line, r.match_text) for r in results]
+
+    def test_matches_scan(self, index, tmp_path):
+        """Test indexed results agree with a parse-everything search."""
+        _make_project(tmp_path)
+
+        for target in ("get", "session.get", "requests.get", "compute", "then"):
+            scanned = SearchEngine().search_directory(str(tmp_path), self._params(tmp_path, target))
+            indexed = SearchEngine(call_index=index).search_directory(str(tmp_path), self._params(tmp_path, target))
+            assert self._summary(indexed) == self._summary(scanned)
+
+    def test_qualified_and_chained_calls(self, index, tmp_path):
+        """Test receivers of any depth and calls split over lines are found."""
+        _make_project(tmp_path)
+
+        results = SearchEngine(call_index=index).search_directory(str(tmp_path), self._params(tmp_path, "get"))
+
+        assert [(name, line) for name, line, _ in self._summary(results)] == [
+            ("app.js", 1), ("client.py", 5), ("client.py", 7)
+        ]
+
+    def test_argument_mentions_ignored(self, tmp_path):
+        """Test a name passed as an argument is not a call of it."""
+        _make_project(tmp_path)
+
+        results = SearchEngine().search_directory(str(tmp_path), self._params(tmp_path, "log"))
+
+        assert self._summary(results) == [("app.js", 4, "log(get)")]
+
+    def test_unchanged_files_not_read(self, index, tmp_path):
+        """Test a repeated search reads only the files holding a match."""
+        _make_project(tmp_path)
+        engine = SearchEngine(call_index=index)
+        engine.search_directory(str(tmp_path), self._params(tmp_path, "helper"))
+
+        with patch('code_extractor.search_engine.read_source', wraps=read_source) as read:
+            results = engine.search_directory(str(tmp_path), self._params(tmp_path, "compute"))
+
+        assert self._summary(results) == [("util.py", 2, "compute(1)")]
+        assert [os.path.basename(call.args[0]) for call in read.call_args_list] == ["util.py"]
@@ -61,6 +61,12 @@ class TestSymbolExtraction:
         # Nested function inside method should NOT appear as separate function
         assert "nested_function" not in function_names
     
+    def test_include_locals(self, python_extractor, nested_classes_code):
+        """Test function-local symbols are returned when asked for."""
+        symbols = python_extractor.extract_symbols(nested_classes_code, include_locals=True)
+        
+        assert "nested_function" in {s.name for s in symbols}
+    
     def test_parameter_extraction_with_types_and_defaults(self, python_extractor, basic_class_code):
         """Test parameter extraction with full context."""
         symbols = python_extractor.extract_symbols(basic_class_code)
@@ -132,6 +138,19 @@ class TestSymbolExtraction:
         # inner_method should have Inner as parent
         assert inner_method.parent == "Inner"
     
+    def test_qualified_names(self, python_extractor, nested_classes_code):
+        """Test names are qualified with every enclosing class and function."""
+        symbols = python_extractor.extract_symbols(nested_classes_code, include_locals=True)
+        
+        qualified = {s.name: s.qualified_name for s in symbols}
+        assert qualified["Outer"] == "Outer"
+        assert qualified["inner_method"] == "Outer.Inner.inner_method"
+        assert qualified["nested_function"] == "Outer.outer_method.nested_function"
+        assert qualified["standalone_function"] == "standalone_function"
+        
+        inner_method = next(s for s in symbols if s.name == "inner_method")
+        assert inner_method.to_dict()["qualified_name"] == "Outer.Inner.inner_method"
+    
     def test_async_method_detection(self, python_extractor, basic_class_code):
         """Test async method detection."""
         symbols = python_extractor.extract_symbols(basic_class_code)
@@ -216,6 +235,34 @@ class TestSymbolExtraction:
         assert symbols == []
 
 
+class TestSymbolHierarchy:
+    """Test parent and depth computation on large files."""
+    
+    def test_depth_filtering(self, python_extractor, nested_classes_code):
+        """Test depth limits count enclosing classes."""
+        top_level = python_extractor.extract_symbols(nested_classes_code, depth=1)
+        with_members = python_extractor.extract_symbols(nested_classes_code, depth=2)
+        
+        assert {s.name for s in top_level} >= {"Outer", "standalone_function"}
+        assert "Inner" not in {s.name for s in top_level}
+        assert {"Inner", "outer_method"} <= {s.name for s in with_members}
+        assert "inner_method" not in {s.name for s in with_members}
+    
+    def test_many_symbols(self, python_extractor):
+        """Test parents and names stay correct across thousands of symbols."""
+        source = "".join(
+            f"class C{i}:\n    def m{i}(self):\n        return {i}\n\ndef f{i}():\n    pass\n\n"
+            for i in range(2500)
+        )
+        
+        symbols = python_extractor.extract_symbols(source)
+        methods = {s.name: s for s in symbols if s.kind == SymbolKind.METHOD}
+        
+        assert len(methods) == 2500
+        assert all(methods[f"m{i}"].parent == f"C{i}" for i in range(2500))
+        assert len(python_extractor.extract_symbols(source, depth=1)) == 5000
+
+
 class TestSpecificExtractionMethods:
     """Test specific extraction methods."""
     
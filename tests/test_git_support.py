@@ -7,9 +7,10 @@ from unittest.mock import Mock, patch
 
 import pytest
 
-from code_extractor.vcs.git import GitProvider
+from code_extractor.vcs.git import GitCatFileBatch, GitProvider, find_git_root, clear_git_root_cache
 from code_extractor.vcs.factory import detect_vcs_provider
 from code_extractor.file_reader import get_file_content
+from code_extractor.source_buffer import SourceBuffer
 
 
 class TestGitProvider:
@@ -156,7 +157,7 @@ class TestFileReader:
 class TestMCPToolsIntegration:
     """Test MCP tools with git revision support."""
     
-    @patch('code_extractor.server.get_file_content')
+    @patch('code_extractor.server.read_source')
     @patch('code_extractor.server.create_extractor')
     def test_get_symbols_with_git_revision(self, mock_create_extractor, mock_get_content):
         """Test get_symbols with git revision parameter."""
@@ -168,7 +169,7 @@ class TestMCPToolsIntegration:
         mock_symbol.to_dict.return_value = {"name": "test_func", "type": "function"}
         mock_extractor.extract_symbols.return_value = [mock_symbol]
         mock_create_extractor.return_value = mock_extractor
-        mock_get_content.return_value = "def test_func(): pass"
+        mock_get_content.return_value = SourceBuffer.from_text("def test_func(): pass")
         
         result = get_symbols("/repo/file.py", "HEAD~1")
         
@@ -176,12 +177,12 @@ class TestMCPToolsIntegration:
         assert result[0]["name"] == "test_func"
         mock_get_content.assert_called_once_with("/repo/file.py", "HEAD~1")
     
-    @patch('code_extractor.server.get_file_content')
+    @patch('code_extractor.server.read_source')
     def test_get_lines_with_git_revision(self, mock_get_content):
         """Test get_lines with git revision parameter."""
         from code_extractor.server import get_lines
         
-        mock_get_content.return_value = "line 1\nline 2\nline 3\n"
+        mock_get_content.return_value = SourceBuffer.from_text("line 1\nline 2\nline 3\n")
         
         result = get_lines("/repo/file.py", 1, 2, "HEAD~1")
         
@@ -214,5 +215,302 @@ class TestErrorHandling:
             get_file_content("/repo/file.py", "invalid-ref")
 
 
+def _git(repo, *args):
+    subprocess.run(
+        ['git', '-C', str(repo), '-c', 'user.name=Test', '-c', 'user.email=test@example.com', *args],
+        capture_output=True,
+        check=True
+    )
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    """Create a git repository with history, an ignored tree and a deleted file."""
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    (repo / "src" / "main.py").write_text("def main():\n    helper()\n")
+    (repo / "src" / "old.py").write_text("def old():\n    helper()\n")
+    try:
+        _git(repo, 'init', '-q')
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        pytest.skip("git not available")
+    _git(repo, 'add', '.')
+    _git(repo, 'commit', '-q', '-m', 'initial')
+    
+    _git(repo, 'rm', '-q', 'src/old.py')
+    (repo / ".gitignore").write_text("build/\n")
+    _git(repo, 'add', '.gitignore')
+    _git(repo, 'commit', '-q', '-m', 'remove old')
+    
+    (repo / "build").mkdir()
+    (repo / "build" / "generated.py").write_text("helper()\n")
+    (repo / "src" / "new.py").write_text("helper()\n")  # untracked, not ignored
+    return repo
+
+
+class TestGitFileEnumeration:
+    """Test listing files from git instead of walking the filesystem."""
+    
+    def test_list_work_tree_files(self, git_repo):
+        """Test work-tree listing includes untracked files and skips ignored ones."""
+        files = GitProvider().list_files(git_repo)
+        
+        assert "src/main.py" in files
+        assert "src/new.py" in files
+        assert "build/generated.py" not in files
+        assert "src/old.py" not in files
+    
+    def test_list_files_at_revision(self, git_repo):
+        """Test revision listing reflects that revision's tree."""
+        files = GitProvider().list_files(git_repo / "src", "HEAD~1")
+        
+        assert files == ["main.py", "old.py"]
+    
+    def test_search_skips_ignored_files(self, git_repo):
+        """Test directory search enumerates from git in a work tree."""
+        from code_extractor.search_engine import SearchEngine
+        from code_extractor.models import SearchParameters
+        
+        params = SearchParameters(search_type="function-calls", target="helper", scope=str(git_repo))
+        files = SearchEngine()._find_matching_files(git_repo, params)
+        rel_paths = {f.relative_to(git_repo).as_posix() for f in files}
+        
+        assert rel_paths == {".gitignore", "src/main.py", "src/new.py"}
+        
+        params.respect_gitignore = False
+        files = SearchEngine()._find_matching_files(git_repo, params)
+        assert "build/generated.py" in {f.relative_to(git_repo).as_posix() for f in files}
+    
+    def test_search_at_revision_uses_revision_tree(self, git_repo):
+        """Test revision searches include files deleted since and skip untracked ones."""
+        from code_extractor.search_engine import SearchEngine
+        from code_extractor.models import SearchParameters
+        
+        params = SearchParameters(
+            search_type="function-calls",
+            target="helper",
+            scope=str(git_repo),
+            git_revision="HEAD~1",
+            file_patterns=["*.py"]
+        )
+        files = SearchEngine()._find_matching_files(git_repo, params)
+        
+        assert {f.relative_to(git_repo).as_posix() for f in files} == {"src/main.py", "src/old.py"}
+    
+    def test_read_file_missing_from_work_tree(self, git_repo):
+        """Test reading a file whose directory only exists at the revision."""
+        (git_repo / "src" / "main.py").unlink()
+        (git_repo / "src" / "new.py").unlink()
+        (git_repo / "src").rmdir()
+        
+        content = get_file_content(str(git_repo / "src" / "old.py"), "HEAD~1")
+        
+        assert content == "def old():\n    helper()\n"
+
+
+class TestGitBatchReads:
+    """Test reading files through a persistent git cat-file process."""
+    
+    def teardown_method(self):
+        if getattr(self, 'provider', None):
+            self.provider.close()
+    
+    def test_batch_matches_git_show(self, git_repo):
+        """Test batch reads return the same content as git show."""
+        (git_repo / "src" / "crlf.py").write_bytes(b"a = 1\r\nb = 'caf\xc3\xa9'\r\n")
+        _git(git_repo, 'add', 'src/crlf.py')
+        _git(git_repo, 'commit', '-q', '-m', 'crlf')
+        self.provider = GitProvider(batch=True)
+        
+        for rel_path in ("src/main.py", "src/crlf.py"):
+            path = git_repo / rel_path
+            assert self.provider.get_file_content(path, "HEAD") == GitProvider().get_file_content(path, "HEAD")
+        assert self.provider.get_file_content(git_repo / "src" / "old.py", "HEAD~2") == "def old():\n    helper()\n"
+    
+    def test_one_process_for_many_reads(self, git_repo):
+        """Test repeated reads reuse one git process and cached lookups."""
+        self.provider = GitProvider(batch=True)
+        path = git_repo / "src" / "main.py"
+        self.provider.get_file_content(path, "HEAD")
+        
+        with patch('subprocess.Popen') as mock_popen, patch('subprocess.run') as mock_run:
+            for _ in range(20):
+                self.provider.get_file_content(path, "HEAD")
+        
+        mock_popen.assert_not_called()
+        mock_run.assert_not_called()
+    
+    def test_missing_file_raises(self, git_repo):
+        """Test reading a path absent from the revision."""
+        self.provider = GitProvider(batch=True)
+        
+        with pytest.raises(subprocess.CalledProcessError):
+            self.provider.get_file_content(git_repo / "src" / "old.py", "HEAD")
+    
+    def test_missing_path_with_spaces(self, git_repo):
+        """Test a missing path with spaces in it doesn't break the batch process."""
+        (git_repo / "src" / "with space.py").write_text("def spaced():\n    pass\n")
+        _git(git_repo, 'add', 'src/with space.py')
+        _git(git_repo, 'commit', '-q', '-m', 'spaced')
+        self.provider = GitProvider(batch=True)
+        
+        with pytest.raises(subprocess.CalledProcessError):
+            self.provider.get_file_content(git_repo / "src" / "other file.py", "HEAD")
+        assert self.provider.get_file_content(git_repo / "src" / "with space.py", "HEAD") == "def spaced():\n    pass\n"
+    
+    def test_invalid_revision_raises(self, git_repo):
+        """Test reading at a revision that does not exist."""
+        self.provider = GitProvider(batch=True)
+        
+        with pytest.raises(subprocess.CalledProcessError):
+            self.provider.get_file_content(git_repo / "src" / "main.py", "no-such-branch")
+    
+    def test_detected_provider_is_shared(self, git_repo):
+        """Test auto-detection hands out the shared batch provider."""
+        first = detect_vcs_provider(git_repo / "src" / "main.py")
+        second = detect_vcs_provider(git_repo)
+        
+        assert first is second
+        assert first.batch
+
+
+class TestRepoRootDetection:
+    """Test memoized, subprocess-free repository detection."""
+    
+    def setup_method(self):
+        clear_git_root_cache()
+    
+    def test_detect_without_subprocess(self, git_repo):
+        """Test a repository with a .git entry is detected without running git."""
+        with patch('subprocess.run') as mock_run:
+            provider = detect_vcs_provider(git_repo / "src" / "main.py")
+            root = provider.find_repo_root(git_repo / "src" / "main.py")
+        
+        assert isinstance(provider, GitProvider)
+        assert root == git_repo.resolve()
+        mock_run.assert_not_called()
+    
+    def test_root_matches_git(self, git_repo):
+        """Test the filesystem walk agrees with git rev-parse --show-toplevel."""
+        assert find_git_root(git_repo / "src" / "new.py") == GitProvider().find_repo_root(git_repo / "src" / "new.py")
+    
+    def test_removed_git_dir_invalidates(self, git_repo):
+        """Test a cached root is dropped when its .git disappears."""
+        assert find_git_root(git_repo / "src") == git_repo.resolve()
+        
+        (git_repo / ".git").rename(git_repo / "not-git")
+        
+        assert find_git_root(git_repo / "src") is None
+    
+    def test_new_git_dir_invalidates(self, git_repo):
+        """Test a repository created inside a cached directory takes over."""
+        nested = git_repo / "src"
+        assert find_git_root(nested) == git_repo.resolve()
+        
+        _git(nested, 'init', '-q')
+        
+        assert find_git_root(nested) == nested.resolve()
+    
+    def test_outside_repository(self, tmp_path):
+        """Test paths outside any repository."""
+        assert find_git_root(tmp_path) is None
+
+
+class TestRevisionResolvedCaching:
+    """Test immutable caching of content read at resolved revisions."""
+    
+    def teardown_method(self):
+        if getattr(self, 'provider', None):
+            self.provider.close()
+    
+    def test_resolve_revision_to_commit(self, git_repo):
+        """Test symbolic revisions resolve to the commit SHA git reports."""
+        from code_extractor.file_reader import resolve_revision
+        
+        expected = subprocess.run(
+            ['git', '-C', str(git_repo), 'rev-parse', 'HEAD~1'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        
+        assert resolve_revision(git_repo / "src" / "main.py", "HEAD~1") == expected
+    
+    def test_repeated_read_served_from_blob_cache(self, git_repo):
+        """Test a (revision, path) read twice only reaches git once."""
+        self.provider = GitProvider(batch=True)
+        path = git_repo / "src" / "main.py"
+        sha = self.provider.resolve_revision(path, "HEAD")
+        
+        first = self.provider.get_file_content(path, sha)
+        with patch.object(GitCatFileBatch, 'read') as mock_read:
+            second = self.provider.get_file_content(path, sha)
+        
+        assert first == second
+        mock_read.assert_not_called()
+    
+    def test_unchanged_file_shares_blob_across_revisions(self, git_repo):
+        """Test identical blobs at different revisions are cached once."""
+        self.provider = GitProvider(batch=True)
+        path = git_repo / "src" / "main.py"
+        
+        self.provider.get_file_content(path, "HEAD")
+        self.provider.get_file_content(path, "HEAD~1")
+        
+        assert len(self.provider._blobs) == 1
+        assert len(self.provider._blob_shas) == 2
+    
+    def test_directory_search_pins_revision(self, git_repo):
+        """Test a revision search resolves the revision once up front."""
+        from code_extractor.search_engine import SearchEngine
+        from code_extractor.models import SearchParameters
+        
+        engine = SearchEngine()
+        params = SearchParameters(
+            search_type="function-calls",
+            target="helper",
+            scope=str(git_repo),
+            git_revision="HEAD~1",
+            file_patterns=["*.py"]
+        )
+        seen_revisions = set()
+        real_search_file = engine.search_file
+        
+        def recording_search_file(file_path, file_params, stats=None):
+            seen_revisions.add(file_params.git_revision)
+            return real_search_file(file_path, file_params, stats)
+        
+        with patch.object(engine, 'search_file', side_effect=recording_search_file):
+            engine.search_directory(str(git_repo), params)
+        
+        assert len(seen_revisions) == 1
+        assert len(seen_revisions.pop()) == 40
+    
+    def test_revision_budget_counts_blobs(self, git_repo):
+        """Test a revision search charges blob sizes, even for files gone from the work tree."""
+        from code_extractor.search_engine import SearchEngine
+        from code_extractor.models import SearchParameters, SearchStats
+        
+        blob_bytes = len("def main():\n    helper()\n") + len("def old():\n    helper()\n")
+        searches = {}
+        for budget in (blob_bytes, blob_bytes - 1):
+            params = SearchParameters(
+                search_type="function-calls",
+                target="helper",
+                scope=str(git_repo),
+                git_revision="HEAD~1",
+                file_patterns=["*.py"],
+                max_bytes=budget
+            )
+            stats = SearchStats()
+            results = SearchEngine().search_directory(str(git_repo), params, stats=stats)
+            searches[budget] = ([Path(r.file_path).name for r in results], stats)
+        
+        names, stats = searches[blob_bytes]
+        assert names == ["main.py", "old.py"]
+        assert (stats.bytes_searched, stats.truncated) == (blob_bytes, None)
+        names, stats = searches[blob_bytes - 1]
+        assert len(names) == 1
+        assert stats.truncated == "max_bytes"
+
+
 if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
+    pytest.main([__file__])
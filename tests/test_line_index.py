@@ -0,0 +1,45 @@
+"""Tests for line/byte offset conversion."""
+
+from code_extractor.line_index import LineIndex
+
+
+class TestLineIndex:
+    """Test LineIndex lookups."""
+
+    def test_line_at_matches_prefix_count(self):
+        """Test line numbers agree with counting newlines in the prefix."""
+        source = "def f():\n    return 'café'\n\nclass C:\n    pass".encode('utf-8')
+        index = LineIndex(source)
+
+        for offset in range(len(source) + 1):
+            assert index.line_at(offset) == source[:offset].count(b'\n') + 1
+
+    def test_line_count(self):
+        """Test line counts ignore the empty line after a trailing newline."""
+        assert LineIndex(b"").line_count == 0
+        assert LineIndex(b"a").line_count == 1
+        assert LineIndex(b"a\nb\n").line_count == 2
+        assert LineIndex(b"a\n\nb").line_count == 3
+
+    def test_get_text_keeps_line_endings(self):
+        """Test extracted text includes the line endings of each line."""
+        index = LineIndex("one\ntwö\nthree\n".encode('utf-8'))
+
+        assert index.get_text(2, 3) == "twö\nthree\n"
+        assert index.get_text(3, 10) == "three\n"
+
+    def test_get_lines_clamps(self):
+        """Test line ranges outside the buffer are clamped."""
+        index = LineIndex(b"a\r\nb\nc\n")
+
+        assert index.get_lines(-5, 2) == ["a", "b"]
+        assert index.get_lines(3, 9) == ["c"]
+        assert index.get_lines(4, 9) == []
+        assert index.get_lines(2, 1) == []
+
+    def test_byte_range(self):
+        """Test byte ranges cover whole lines."""
+        index = LineIndex(b"ab\ncd\nef")
+
+        assert index.byte_range(2, 2) == (3, 6)
+        assert index.byte_range(2, 3) == (3, 8)
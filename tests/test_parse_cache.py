@@ -0,0 +1,194 @@
+"""Tests for the content-addressed parse cache."""
+
+from unittest.mock import Mock
+
+from tree_sitter_language_pack import get_parser
+
+from code_extractor.parse_cache import ParseCache, content_hash
+from code_extractor.search_engine import SearchEngine
+from code_extractor.models import SearchParameters
+
+
+class TestParseCache:
+    """Test ParseCache behaviour."""
+
+    def test_identical_content_parsed_once(self):
+        """Test that identical content reuses the cached tree."""
+        cache = ParseCache()
+        parser = get_parser('python')
+        source = b"def foo():\n    pass\n"
+
+        first = cache.parse(parser, 'python', source)
+        second = cache.parse(parser, 'python', bytes(source))
+
+        assert first is second
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_language_is_part_of_key(self):
+        """Test that the same bytes in different languages are cached separately."""
+        cache = ParseCache()
+        source = b"foo(1)\n"
+
+        python_tree = cache.parse(get_parser('python'), 'python', source)
+        js_tree = cache.parse(get_parser('javascript'), 'javascript', source)
+
+        assert python_tree is not js_tree
+        assert cache.stats()['entries'] == 2
+
+    def test_byte_budget_evicts_least_recently_used(self):
+        """Test that entries are evicted once the byte budget is exceeded."""
+        cache = ParseCache(max_bytes=100)
+        parser = Mock()
+        parser.parse.side_effect = lambda source: object()
+
+        a = b"a" * 40
+        b = b"b" * 40
+        c = b"c" * 40
+
+        cache.parse(parser, 'python', a)
+        cache.parse(parser, 'python', b)
+        cache.parse(parser, 'python', a)  # a is now most recently used
+        cache.parse(parser, 'python', c)  # evicts b
+
+        assert cache.stats()['bytes'] <= 100
+        parser.parse.reset_mock()
+        cache.parse(parser, 'python', a)
+        assert parser.parse.call_count == 0
+        cache.parse(parser, 'python', b)
+        assert parser.parse.call_count == 1
+
+    def test_oversized_source_not_cached(self):
+        """Test that sources larger than the budget are parsed but not stored."""
+        cache = ParseCache(max_bytes=10)
+        parser = Mock()
+        parser.parse.return_value = object()
+
+        cache.parse(parser, 'python', b"x" * 50)
+
+        assert cache.stats()['entries'] == 0
+
+    def test_buffer_sources_are_copied(self):
+        """Test non-bytes buffers are parsed and cached from a private copy."""
+        cache = ParseCache()
+        parser = get_parser('python')
+        buffer = bytearray(b"def foo():\n    pass\n")
+
+        tree = cache.parse(parser, 'python', memoryview(buffer))
+        buffer[:] = b"x" * len(buffer)
+
+        assert cache.parse(parser, 'python', b"def foo():\n    pass\n") is tree
+        assert tree.root_node.children[0].type == 'function_definition'
+
+    def test_content_hash_stable(self):
+        """Test content hashing is deterministic and content-sensitive."""
+        assert content_hash(b"abc") == content_hash(b"abc")
+        assert content_hash(b"abc") != content_hash(b"abd")
+
+
+class TestSearchEngineUsesParseCache:
+    """Test that the search engine consults the parse cache."""
+
+    def test_repeated_search_hits_cache(self, tmp_path):
+        """Test searching the same file twice parses it once."""
+        test_file = tmp_path / "calls.py"
+        test_file.write_text("import os\nos.getcwd()\n")
+
+        cache = ParseCache()
+        engine = SearchEngine(ast_cache=cache)
+        params = SearchParameters(search_type="function-calls", target="os.getcwd", scope=str(test_file))
+
+        engine.search_file(str(test_file), params)
+        engine.search_file(str(test_file), params)
+
+        assert cache.stats()['misses'] == 1
+        assert cache.stats()['hits'] == 1
+
+
+class TestIncrementalReparse:
+    """Test incremental reparsing of changed files."""
+
+    def _fresh_sexp(self, source: bytes) -> str:
+        return str(get_parser('python').parse(source).root_node)
+
+    def test_changed_file_reparsed_incrementally(self):
+        """Test that a changed path reuses the previous tree."""
+        cache = ParseCache()
+        parser = get_parser('python')
+        old = b"".join(b"def f%d():\n    return %d\n\n" % (i, i) for i in range(200))
+        new = old.replace(b"return 100\n", b"x = 'caf\xc3\xa9'\n    return 100 + 1\n")
+
+        cache.parse(parser, 'python', old, path='/repo/big.py')
+        tree = cache.parse(parser, 'python', new, path='/repo/big.py')
+
+        assert cache.stats()['incremental'] == 1
+        assert str(tree.root_node) == self._fresh_sexp(new)
+        assert tree.root_node.end_byte == len(new)
+
+    def test_edits_at_boundaries(self):
+        """Test insertions and deletions at the start and end of the file."""
+        cache = ParseCache()
+        parser = get_parser('python')
+        versions = [
+            b"a = 1\nb = 2\n",
+            b"import os\na = 1\nb = 2\n",
+            b"import os\na = 1\nb = 2\nc = 3\n",
+            b"a = 1\n",
+            b"",
+            b"def g():\n    pass\n",
+        ]
+
+        for source in versions:
+            tree = cache.parse(parser, 'python', source, path='/repo/edit.py')
+            assert str(tree.root_node) == self._fresh_sexp(source)
+
+        assert cache.stats()['incremental'] == len(versions) - 1
+
+    def test_edit_base_stays_cached(self):
+        """Test that the tree used as an edit base is still served, unedited, for its old content."""
+        cache = ParseCache()
+        parser = get_parser('python')
+        old = b"a = 1\n"
+        new = b"a = 1\nb = 2\n"
+
+        cache.parse(parser, 'python', old, path='/repo/x.py')
+        cache.parse(parser, 'python', new, path='/repo/x.py')
+        tree = cache.parse(parser, 'python', old)
+
+        assert str(tree.root_node) == self._fresh_sexp(old)
+        assert cache.stats()['entries'] == 2
+        assert cache.stats()['hits'] == 1
+
+    def test_alternating_versions_hit_cache(self):
+        """Test switching a path between two contents reuses both cached trees."""
+        cache = ParseCache()
+        parser = get_parser('python')
+        versions = [b"a = 1\n", b"a = 1\nb = 2\n"]
+
+        for i in range(8):
+            cache.parse(parser, 'python', versions[i % 2], path='/repo/x.py')
+
+        assert cache.stats()['misses'] == 2
+        assert cache.stats()['hits'] == 6
+
+    def test_incremental_parse_leaves_cached_tree_intact(self):
+        """Test a tree handed out earlier is not edited by a later incremental parse."""
+        cache = ParseCache()
+        parser = get_parser('python')
+        old = b"a = 1\nb = 2\n"
+
+        first = cache.parse(parser, 'python', old, path='/repo/x.py')
+        cache.parse(parser, 'python', b"import os\n" + old, path='/repo/x.py')
+
+        assert str(first.root_node) == self._fresh_sexp(old)
+        assert first.root_node.children[1].start_byte == 6
+
+    def test_no_path_means_full_parse(self):
+        """Test that calls without a path never reparse incrementally."""
+        cache = ParseCache()
+        parser = get_parser('python')
+
+        cache.parse(parser, 'python', b"a = 1\n")
+        cache.parse(parser, 'python', b"a = 2\n")
+
+        assert cache.stats()['incremental'] == 0
@@ -0,0 +1,260 @@
+"""Tests for building indexes ahead of time and adopting them at startup."""
+
+import json
+import os
+import shutil
+import sys
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from code_extractor import server
+from code_extractor.call_index import CALL_INDEX_FILENAME, CallIndex
+from code_extractor.prebuilt_index import MANIFEST_FILENAME, adopt_index, build_index, load_index
+from code_extractor.search_engine import SearchEngine
+from code_extractor.symbol_index import INDEX_FILENAME, SymbolIndex, get_index_dir, set_index_dir
+from code_extractor.trigram_index import TRIGRAM_INDEX_FILENAME, TrigramIndex
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """Create a small source tree."""
+    root = tmp_path / "repo"
+    (root / "pkg").mkdir(parents=True)
+    (root / "pkg" / "service.py").write_text(
+        "class Service:\n"
+        "    def run(self):\n"
+        "        return helper()\n"
+    )
+    (root / "pkg" / "helpers.py").write_text("def helper():\n    return 1\n")
+    (root / "app.js").write_text("function main() {\n  helper();\n}\n")
+    (root / "notes.txt").write_text("helper\n")
+    return root
+
+
+def _shift_mtimes(root, seconds=100):
+    """Move every file's mtime, as a fresh checkout of the same content would."""
+    for path in root.rglob("*"):
+        if path.is_file():
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 1_000_000_000))
+
+
+class _Indexes:
+    """The three indexes in one directory, opened for inspection."""
+
+    def __init__(self, index_dir):
+        self.symbols = SymbolIndex(index_dir / INDEX_FILENAME)
+        self.calls = CallIndex(index_dir / CALL_INDEX_FILENAME)
+        self.trigrams = TrigramIndex(index_dir / TRIGRAM_INDEX_FILENAME)
+
+    def close(self):
+        for index in (self.symbols, self.calls, self.trigrams):
+            index.close()
+
+
+@pytest.fixture
+def open_indexes():
+    opened = []
+
+    def _open(index_dir):
+        indexes = _Indexes(index_dir)
+        opened.append(indexes)
+        return indexes
+
+    yield _open
+    for indexes in opened:
+        indexes.close()
+
+
+class TestBuildIndex:
+    """Test building the indexes for a whole tree."""
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_build_writes_every_index(self, tree, tmp_path, open_indexes, workers):
+        """Test every source file lands in all three indexes, serially or on the pool."""
+        stats = build_index(tree, tmp_path / "index", workers=workers)
+
+        assert stats['files'] == 3
+        assert stats['errors'] == 0
+        indexes = open_indexes(tmp_path / "index")
+        # app.js has calls and trigrams but no symbol entry: there's no JavaScript symbol query
+        assert indexes.symbols.stats()['files'] == 2
+        assert indexes.calls.stats()['files'] == 3
+        assert indexes.trigrams.stats()['files'] == 3
+        assert [loc.start_line for loc in indexes.symbols.find_definitions("run")] == [2]
+        assert len(indexes.calls.find_calls("helper")) == 2
+
+    def test_errors_reported_on_stderr(self, tree, tmp_path, capsys, open_indexes):
+        """Test a file that fails to index is counted and reported off stdout."""
+        indexes = open_indexes(tmp_path / "index")
+        engine = SearchEngine(symbol_index=indexes.symbols)
+
+        with patch.object(engine, "extract_file", side_effect=OSError("unreadable")):
+            totals = engine.index_directory(str(tree), workers=1)
+
+        assert totals['errors'] == 3
+        output = capsys.readouterr()
+        assert output.out == ""
+        assert output.err.count("unreadable") == 3
+
+    def test_manifest_records_root(self, tree, tmp_path):
+        """Test the manifest names the tree the index was built from."""
+        build_index(tree, tmp_path / "index", workers=1)
+
+        manifest = json.loads((tmp_path / "index" / MANIFEST_FILENAME).read_text())
+        assert manifest['root'] == str(tree.resolve())
+
+    def test_entries_current_after_build(self, tree, tmp_path, open_indexes):
+        """Test built entries are served without re-parsing."""
+        build_index(tree, tmp_path / "index", workers=1)
+
+        indexes = open_indexes(tmp_path / "index")
+        assert indexes.symbols.is_current(tree / "pkg" / "service.py")
+        for path in (tree / "pkg" / "service.py", tree / "app.js"):
+            assert indexes.calls.is_current(path)
+
+    def test_extract_file_leaves_engine_indexes_alone(self, tree, tmp_path, open_indexes):
+        """Test extraction for a build doesn't write the engine's own indexes."""
+        indexes = open_indexes(tmp_path / "index")
+        engine = SearchEngine(symbol_index=indexes.symbols, call_index=indexes.calls)
+
+        entry = engine.extract_file(tree / "pkg" / "service.py")
+
+        assert [s.name for s in entry.symbols] == ["Service", "run"]
+        assert [c.callee for c in entry.calls] == ["helper"]
+        assert indexes.symbols.stats()['files'] == 0
+        assert engine.extract_file(tree / "app.js").symbols is None
+        assert engine.extract_file(tree / "notes.txt") is None
+
+
+class TestLoadIndex:
+    """Test adopting a prebuilt index for the tree on disk."""
+
+    def test_without_manifest(self, tmp_path):
+        """Test an index directory the server filled itself is left alone."""
+        assert load_index(tmp_path / "index") == {}
+
+    def test_unchanged_tree_is_current(self, tree, tmp_path):
+        """Test loading where the index was built finds every entry current."""
+        build_index(tree, tmp_path / "index", workers=1)
+
+        assert load_index(tmp_path / "index") == {
+            'current': 2, 'adopted': 0, 'stale': 0, 'root': str(tree.resolve())
+        }
+
+    def test_new_mtimes_adopted(self, tree, tmp_path, open_indexes):
+        """Test files with new mtimes but the same content are re-stamped, not re-parsed."""
+        build_index(tree, tmp_path / "index", workers=1)
+        _shift_mtimes(tree)
+
+        stats = load_index(tmp_path / "index")
+
+        assert (stats['adopted'], stats['stale']) == (2, 0)
+        indexes = open_indexes(tmp_path / "index")
+        path = tree / "pkg" / "service.py"
+        assert indexes.symbols.is_current(path)
+        assert indexes.calls.is_current(path)
+        assert indexes.trigrams.candidates([path], b"helper") == [path]
+
+    def test_changed_file_stays_stale(self, tree, tmp_path, open_indexes):
+        """Test files whose content changed are left to be re-parsed."""
+        build_index(tree, tmp_path / "index", workers=1)
+        _shift_mtimes(tree)
+        (tree / "pkg" / "helpers.py").write_text("def helper():\n    return 2\n")
+
+        stats = load_index(tmp_path / "index")
+
+        assert (stats['adopted'], stats['stale']) == (1, 1)
+        indexes = open_indexes(tmp_path / "index")
+        assert not indexes.symbols.is_current(tree / "pkg" / "helpers.py")
+        assert not indexes.calls.is_current(tree / "pkg" / "helpers.py")
+
+    def test_relocated_checkout(self, tree, tmp_path, open_indexes):
+        """Test an index built at one path serves a copy of the tree at another."""
+        build_index(tree, tmp_path / "index", workers=1)
+        moved = tmp_path / "elsewhere"
+        shutil.copytree(tree, moved)
+        _shift_mtimes(moved)
+
+        stats = load_index(tmp_path / "index", root=moved)
+
+        assert stats == {'current': 0, 'adopted': 2, 'stale': 0, 'root': str(moved.resolve())}
+        indexes = open_indexes(tmp_path / "index")
+        locations = indexes.symbols.find_definitions("Service")
+        assert [loc.file_path for loc in locations] == [str((moved / "pkg" / "service.py").resolve())]
+        calls = indexes.calls.find_calls("helper")
+        assert {c.file_path for c in calls} == {str((moved / "pkg" / "service.py").resolve())}
+        # No symbol entry vouches for app.js's content, so it waits to be re-parsed
+        assert not indexes.calls.is_current(moved / "app.js")
+        manifest = json.loads((tmp_path / "index" / MANIFEST_FILENAME).read_text())
+        assert manifest['root'] == str(moved.resolve())
+
+
+class TestIndexCommand:
+    """Test the index subcommand and prebuilt index options of the entry point."""
+
+    def teardown_method(self):
+        set_index_dir(os.environ.get('MCP_INDEX_DIR'))
+        server.clear_registries()
+
+    def test_index_build(self, tree, tmp_path, capsys, open_indexes):
+        """Test index build writes the indexes to --index-dir."""
+        argv = ["mcp-server-code-extractor", "index", "build", str(tree),
+                "--index-dir", str(tmp_path / "index"), "--workers", "1"]
+        with patch.object(sys, "argv", argv):
+            server.main()
+
+        assert "Indexed 3 files" in capsys.readouterr().out
+        assert open_indexes(tmp_path / "index").symbols.stats()['files'] == 2
+
+    def test_index_build_needs_index_dir(self, tree):
+        """Test index build refuses to run without an index directory."""
+        set_index_dir(None)
+        with patch.object(sys, "argv", ["mcp-server-code-extractor", "index", "build", str(tree)]):
+            with pytest.raises(SystemExit):
+                server.main()
+
+    def test_server_loads_prebuilt_index(self, tree, tmp_path, capsys):
+        """Test the server adopts a prebuilt index before it starts serving."""
+        build_index(tree, tmp_path / "index", workers=1)
+        moved = tmp_path / "elsewhere"
+        shutil.copytree(tree, moved)
+
+        argv = ["mcp-server-code-extractor", "--index-dir", str(tmp_path / "index"), "--index-root", str(moved)]
+        with patch.object(sys, "argv", argv), \
+                patch.object(server, "FastMCP") as fast_mcp, \
+                patch.object(server, "get_search_engine"):
+            server.main()
+
+        fast_mcp.return_value.run.assert_called_once()
+        assert get_index_dir() == tmp_path / "index"
+        server.get_tool_executor().shutdown(wait=True)
+        assert "2 files current, 0 to re-parse" in capsys.readouterr().err
+
+    def test_server_adopts_in_background(self, tree, tmp_path):
+        """Test the server starts serving while a prebuilt index is still being adopted."""
+        build_index(tree, tmp_path / "index", workers=1)
+        moved = tmp_path / "elsewhere"
+        shutil.copytree(tree, moved)
+        release = threading.Event()
+
+        def slow_adopt(index_dir, root):
+            release.wait(5)
+            return adopt_index(index_dir, root)
+
+        argv = ["mcp-server-code-extractor", "--index-dir", str(tmp_path / "index"), "--index-root", str(moved)]
+        with patch.object(sys, "argv", argv), \
+                patch.object(server, "FastMCP") as fast_mcp, \
+                patch.object(server, "get_search_engine"), \
+                patch.object(server, "adopt_index", side_effect=slow_adopt) as adopt:
+            server.main()
+            fast_mcp.return_value.run.assert_called_once()
+            # Relocation is done up front, so entries already point at the checkout
+            manifest = json.loads((tmp_path / "index" / MANIFEST_FILENAME).read_text())
+            assert manifest['root'] == str(moved.resolve())
+
+            release.set()
+            server.get_tool_executor().shutdown(wait=True)
+        adopt.assert_called_once_with(get_index_dir(), str(moved.resolve()))
@@ -0,0 +1,64 @@
+"""Tests for the shared query registry."""
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from code_extractor import CodeExtractor
+from code_extractor.languages import get_tree_sitter_language
+from code_extractor.query_registry import QueryRegistry, SYMBOLS_QUERY, query_registry
+
+
+class TestQueryRegistry:
+    """Test QueryRegistry loading and caching."""
+
+    def test_compiles_once(self):
+        """Test each query file is read and compiled once."""
+        registry = QueryRegistry()
+
+        with patch('code_extractor.query_registry.get_tree_sitter_language',
+                   wraps=get_tree_sitter_language) as load:
+            first = registry.get('python', 'function-calls')
+            second = registry.get('python', 'function-calls')
+
+        assert first is not None
+        assert first is second
+        assert load.call_count == 1
+
+    def test_query_types_have_separate_files(self):
+        """Test symbol and search queries for a language are distinct."""
+        registry = QueryRegistry()
+
+        assert registry.query_path('python').name == 'python.scm'
+        assert registry.query_path('python', 'symbol-definitions').parent.name == 'symbol-definitions'
+        assert registry.get('python', SYMBOLS_QUERY) is not registry.get('python', 'symbol-definitions')
+
+    def test_missing_query_is_cached_as_none(self, tmp_path):
+        """Test languages without a query file return None without rechecking."""
+        registry = QueryRegistry(query_dir=tmp_path)
+
+        assert registry.get('python', 'function-calls') is None
+        (tmp_path / 'function-calls').mkdir()
+        (tmp_path / 'function-calls' / 'python.scm').write_text("(call) @call")
+        assert registry.get('python', 'function-calls') is None
+        assert registry.stats() == {'queries': 1, 'compiled': 0}
+
+    def test_invalid_query_returns_none(self, tmp_path):
+        """Test a query that doesn't compile is treated as missing."""
+        (tmp_path / 'python.scm').write_text("(not_a_node_type) @x")
+
+        assert QueryRegistry(query_dir=tmp_path).get('python') is None
+
+    def test_queries_are_per_thread(self):
+        """Test each thread compiles its own copy of a query."""
+        registry = QueryRegistry()
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            other = pool.submit(registry.get, 'python').result()
+
+        assert other is not None
+        assert registry.get('python') is not other
+
+    def test_extractors_share_queries(self):
+        """Test extractors for the same language share one compiled query."""
+        assert CodeExtractor('python').query is CodeExtractor('python').query
+        assert CodeExtractor('python').query is query_registry.get('python')
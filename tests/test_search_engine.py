@@ -8,12 +8,14 @@ and result processing functionality.
 import pytest
 import tempfile
 import os
+import threading
+from dataclasses import replace
 from pathlib import Path
 from unittest.mock import patch, mock_open
 from typing import List
 
 from code_extractor.search_engine import SearchEngine
-from code_extractor.models import SearchParameters, SearchResult
+from code_extractor.models import SearchParameters, SearchResult, SearchStats
 
 
 class TestSearchEngineDirectorySearch:
@@ -86,6 +88,52 @@ class TestSearchEngineDirectorySearch:
         assert "__pycache__/test.pyc" not in file_paths
         assert "node_modules/lib.js" not in file_paths
     
+    def test_excluded_directories_not_descended(self, tmp_path):
+        """Test that fully excluded directories are pruned before walking them."""
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "main.py").write_text("print('main')")
+        (tmp_path / "node_modules" / "pkg").mkdir(parents=True)
+        (tmp_path / "node_modules" / "pkg" / "index.js").write_text("module")
+        
+        params = SearchParameters(
+            search_type="function-calls",
+            target="test",
+            scope=str(tmp_path),
+            exclude_patterns=["node_modules/*"]
+        )
+        
+        visited = []
+        real_scandir = os.scandir
+        
+        def recording_scandir(path):
+            visited.append(os.path.basename(path))
+            return real_scandir(path)
+        
+        with patch('os.scandir', side_effect=recording_scandir):
+            files = self.engine._find_matching_files(tmp_path, params)
+        
+        assert [f.name for f in files] == ["main.py"]
+        assert "node_modules" not in visited
+        assert "pkg" not in visited
+    
+    def test_walk_stops_at_max_files(self, tmp_path):
+        """Test that directory search stops walking once max_files is reached."""
+        for i in range(50):
+            (tmp_path / f"file_{i:02d}.py").write_text(f"print({i})")
+        
+        params = SearchParameters(
+            search_type="function-calls",
+            target="print",
+            scope=str(tmp_path),
+            max_files=5
+        )
+        
+        with patch.object(self.engine, '_is_binary_file', return_value=False) as sniff:
+            with patch('builtins.print'):
+                self.engine.search_directory(str(tmp_path), params)
+        
+        assert sniff.call_count == 6  # max_files plus one to detect truncation
+    
     def test_binary_file_detection(self, tmp_path):
         """Test binary file detection."""
         # Create text file
@@ -152,7 +200,7 @@ class TestSearchEngineDirectorySearch:
         
         with patch('builtins.print') as mock_print:
             self.engine.search_directory(str(tmp_path), params)
-            mock_print.assert_any_call(f"Found 15 files, limiting to 10")
+            mock_print.assert_any_call(f"Found more than 10 files, limiting to 10")
     
     def test_max_results_limit(self, tmp_path):
         """Test max_results limit functionality."""
@@ -219,7 +267,7 @@ class TestSearchEngineDirectorySearch:
         )
         
         # Mock permission error during file reading
-        with patch('pathlib.Path.rglob', side_effect=PermissionError("Access denied")):
+        with patch('os.scandir', side_effect=PermissionError("Access denied")):
             with patch('builtins.print') as mock_print:
                 files = self.engine._find_matching_files(tmp_path, params)
                 assert files == []
@@ -338,7 +386,7 @@ class TestSearchEngineErrorHandling:
         )
         
         # Mock file read error - use the correct import path from search_engine module
-        with patch('code_extractor.search_engine.get_file_content', side_effect=Exception("Read error")):
+        with patch('code_extractor.search_engine.read_source', side_effect=Exception("Read error")):
             with patch('builtins.print') as mock_print:
                 results = self.engine.search_file(str(test_file), params)
                 # Error is caught and empty list returned
@@ -361,4 +409,318 @@ class TestSearchEngineErrorHandling:
             with patch('builtins.print') as mock_print:
                 results = self.engine.search_directory(str(tmp_path), params)
                 # Should continue processing despite individual file errors
-                mock_print.assert_any_call(f"Error searching file {test_file}: Search error")
\ No newline at end of file
+                mock_print.assert_any_call(f"Error searching file {test_file}: Search error")
+
+class TestSearchEngineCancellation:
+    """Test cooperative cancellation of directory searches."""
+    
+    def test_cancel_stops_between_files(self, tmp_path):
+        """Test files after the cancel point are not searched and earlier results are kept."""
+        for i in range(5):
+            (tmp_path / f"module_{i}.py").write_text("process_data(1)\n")
+        engine = SearchEngine()
+        cancel_event = threading.Event()
+        searched = []
+        original = engine.search_file
+        
+        def search_and_cancel(file_path, params, stats=None):
+            searched.append(file_path)
+            cancel_event.set()
+            return original(file_path, params, stats)
+        
+        params = SearchParameters(
+            search_type="function-calls",
+            target="process_data",
+            scope=str(tmp_path),
+            respect_gitignore=False
+        )
+        with patch.object(engine, 'search_file', side_effect=search_and_cancel):
+            results = engine.search_directory(str(tmp_path), params, cancel_event=cancel_event)
+        
+        assert len(searched) == 1
+        assert len(results) == 1
+
+
+class TestSearchEngineStreaming:
+    """Test results and progress streamed from directory searches."""
+    
+    def setup_method(self):
+        """Set up test environment."""
+        self.engine = SearchEngine()
+    
+    def teardown_method(self):
+        """Stop worker processes."""
+        self.engine.shutdown()
+    
+    def _params(self, tmp_path, **kwargs):
+        return SearchParameters(
+            search_type="function-calls",
+            target="process_data",
+            scope=str(tmp_path),
+            respect_gitignore=False,
+            **kwargs
+        )
+    
+    def test_iter_yields_before_search_finishes(self, tmp_path):
+        """Test the first result arrives before later files are searched."""
+        for i in range(3):
+            (tmp_path / f"module_{i}.py").write_text("process_data(1)\n")
+        searched = []
+        original = self.engine.search_file
+        
+        def record_search(file_path, params, stats=None):
+            searched.append(file_path)
+            return original(file_path, params, stats)
+        
+        with patch.object(self.engine, 'search_file', side_effect=record_search):
+            results = self.engine.iter_search_directory(str(tmp_path), self._params(tmp_path))
+            first = next(results)
+            assert len(searched) == 1
+            assert first.file_path == searched[0]
+            assert len(list(results)) == 2
+    
+    def test_progress_reports_each_file(self, tmp_path):
+        """Test the progress callback counts files and matches."""
+        for i in range(3):
+            (tmp_path / f"module_{i}.py").write_text("process_data(1)\nprocess_data(2)\n")
+        (tmp_path / "empty.py").write_text("x = 1\n")
+        calls = []
+        
+        results = self.engine.search_directory(str(tmp_path), self._params(tmp_path),
+                                               progress=lambda *args: calls.append(args))
+        
+        assert len(results) == 6
+        assert [done for done, _, _ in calls] == [1, 2, 3, 4]
+        assert all(total == 4 for _, total, _ in calls)
+        assert calls[-1][2] == 6
+    
+    def test_progress_stops_at_max_results(self, tmp_path):
+        """Test no files are reported past the one that filled max_results."""
+        for i in range(5):
+            (tmp_path / f"module_{i}.py").write_text("process_data(1)\nprocess_data(2)\n")
+        calls = []
+        
+        results = self.engine.search_directory(str(tmp_path), self._params(tmp_path, max_results=3),
+                                               progress=lambda *args: calls.append(args))
+        
+        assert len(results) == 3
+        assert calls[-1] == (2, 5, 3)
+    
+    def test_parallel_truncates_like_serial(self, tmp_path):
+        """Test a limited parallel search returns the same results as a serial one."""
+        for i in range(6):
+            (tmp_path / f"module_{i}.py").write_text("process_data(1)\n" * (i + 1))
+        
+        serial = self.engine.search_directory(str(tmp_path), self._params(tmp_path, max_results=8))
+        parallel = self.engine.search_directory(str(tmp_path), self._params(tmp_path, max_results=8, workers=2))
+        
+        assert len(serial) == 8
+        assert [(r.file_path, r.start_line) for r in parallel] == [(r.file_path, r.start_line) for r in serial]
+
+
+class TestSearchEngineBudget:
+    """Test deadline and byte budgets on directory searches."""
+    
+    def setup_method(self):
+        """Set up test environment."""
+        self.engine = SearchEngine()
+    
+    def teardown_method(self):
+        """Stop worker processes."""
+        self.engine.shutdown()
+    
+    def _make_project(self, tmp_path, files=5):
+        for i in range(files):
+            (tmp_path / f"module_{i}.py").write_text("process_data(1)\n")
+    
+    def _params(self, tmp_path, **kwargs):
+        return SearchParameters(
+            search_type="function-calls",
+            target="process_data",
+            scope=str(tmp_path),
+            respect_gitignore=False,
+            **kwargs
+        )
+    
+    def test_expired_deadline_searches_nothing(self, tmp_path):
+        """Test a deadline in the past stops the search before the first file."""
+        self._make_project(tmp_path)
+        stats = SearchStats()
+        
+        results = self.engine.search_directory(str(tmp_path), self._params(tmp_path, deadline=0.0), stats=stats)
+        
+        assert results == []
+        assert stats.truncated == "deadline"
+        assert stats.files_searched == 0
+        assert stats.files_total == 5
+    
+    def test_deadline_keeps_results_so_far(self, tmp_path):
+        """Test files searched before the deadline keep their results."""
+        self._make_project(tmp_path)
+        clock = [1000.0]
+        original = self.engine.search_file
+        
+        def slow_search(file_path, params, stats=None):
+            clock[0] += 10
+            return original(file_path, replace(params, deadline=None), stats)
+        
+        stats = SearchStats()
+        with patch('code_extractor.search_engine.time.time', side_effect=lambda: clock[0]), \
+                patch.object(self.engine, 'search_file', side_effect=slow_search):
+            results = self.engine.search_directory(str(tmp_path), self._params(tmp_path, deadline=1015.0),
+                                                   stats=stats)
+        
+        assert len(results) == 2
+        assert stats.truncated == "deadline"
+        assert stats.files_searched == 2
+    
+    def test_max_bytes_limits_files(self, tmp_path):
+        """Test only the files that fit the byte budget are searched."""
+        self._make_project(tmp_path)
+        (tmp_path / "notes.txt").write_text("process_data(1)\n" * 100)
+        size = len("process_data(1)\n")
+        stats = SearchStats()
+        
+        results = self.engine.search_directory(str(tmp_path), self._params(tmp_path, max_bytes=size * 3 + 1),
+                                               stats=stats)
+        
+        assert len(results) == 3
+        assert stats.truncated == "max_bytes"
+        assert stats.bytes_searched == size * 3
+    
+    def test_max_bytes_same_on_pool(self, tmp_path):
+        """Test the byte budget picks the same files serially and on the pool."""
+        self._make_project(tmp_path)
+        budget = len("process_data(1)\n") * 2
+        
+        serial = self.engine.search_directory(str(tmp_path), self._params(tmp_path, max_bytes=budget))
+        parallel = self.engine.search_directory(str(tmp_path), self._params(tmp_path, max_bytes=budget, workers=2))
+        
+        assert len(serial) == 2
+        assert [r.file_path for r in parallel] == [r.file_path for r in serial]
+    
+    def test_prefiltered_files_not_charged(self, tmp_path):
+        """Test files dropped without parsing don't spend the byte budget."""
+        for i in range(3):
+            (tmp_path / f"big_{i}.py").write_text("unrelated = 1\n" * 100)
+        self._make_project(tmp_path, files=2)
+        size = len("process_data(1)\n")
+        stats = SearchStats()
+        
+        results = self.engine.search_directory(str(tmp_path), self._params(tmp_path, max_bytes=size * 2),
+                                               stats=stats)
+        
+        assert len(results) == 2
+        assert stats.truncated is None
+        assert stats.bytes_searched == size * 2
+    
+    def test_file_over_budget_skipped(self, tmp_path):
+        """Test search_file skips a file larger than the whole byte budget."""
+        test_file = tmp_path / "big.py"
+        test_file.write_text("process_data(1)\n" * 10)
+        
+        assert self.engine.search_file(str(test_file), self._params(tmp_path, max_bytes=10)) == []
+        assert len(self.engine.search_file(str(test_file), self._params(tmp_path, max_bytes=1000))) == 10
+    
+    def test_untruncated_search_stats(self, tmp_path):
+        """Test a complete search reports its counters and no truncation."""
+        self._make_project(tmp_path, files=3)
+        stats = SearchStats()
+        
+        self.engine.search_directory(str(tmp_path), self._params(tmp_path), stats=stats)
+        
+        assert stats.truncated is None
+        assert (stats.files_searched, stats.files_total, stats.matches) == (3, 3, 3)
+
+
+class TestSearchEngineParallelSearch:
+    """Test process-pool directory search."""
+    
+    def setup_method(self):
+        """Set up test environment."""
+        self.engine = SearchEngine()
+    
+    def teardown_method(self):
+        """Stop worker processes."""
+        self.engine.shutdown()
+    
+    def _make_project(self, tmp_path, files=8, calls_per_file=5):
+        for i in range(files):
+            content = "\n".join(f"process_data({j})" for j in range(calls_per_file))
+            (tmp_path / f"module_{i}.py").write_text(content + "\n")
+    
+    def test_parallel_matches_serial(self, tmp_path):
+        """Test parallel search returns the same results as serial search."""
+        self._make_project(tmp_path)
+        serial = SearchParameters(
+            search_type="function-calls",
+            target="process_data",
+            scope=str(tmp_path),
+            workers=1
+        )
+        parallel = SearchParameters(
+            search_type="function-calls",
+            target="process_data",
+            scope=str(tmp_path),
+            workers=4
+        )
+        
+        serial_results = self.engine.search_directory(str(tmp_path), serial)
+        parallel_results = self.engine.search_directory(str(tmp_path), parallel)
+        
+        assert [r.to_dict() for r in parallel_results] == [r.to_dict() for r in serial_results]
+    
+    def test_workers_not_forked(self):
+        """Test worker processes start fresh instead of forking a multi-threaded server."""
+        executor = self.engine._get_executor(2)
+        
+        assert executor._mp_context.get_start_method() != "fork"
+    
+    def test_parallel_honors_max_results(self, tmp_path):
+        """Test parallel search stops at max_results."""
+        self._make_project(tmp_path, files=10, calls_per_file=10)
+        params = SearchParameters(
+            search_type="function-calls",
+            target="process_data",
+            scope=str(tmp_path),
+            max_results=15,
+            workers=2
+        )
+        
+        results = self.engine.search_directory(str(tmp_path), params)
+        
+        assert len(results) <= 15
+    
+    def test_pool_reused_between_searches(self, tmp_path):
+        """Test the worker pool survives across searches of the same size."""
+        self._make_project(tmp_path, files=3)
+        params = SearchParameters(
+            search_type="function-calls",
+            target="process_data",
+            scope=str(tmp_path),
+            workers=2
+        )
+        
+        self.engine.search_directory(str(tmp_path), params)
+        executor = self.engine._executor
+        self.engine.search_directory(str(tmp_path), params)
+        
+        assert executor is not None
+        assert self.engine._executor is executor
+        
+        self.engine.shutdown()
+        assert self.engine._executor is None
+    
+    def test_single_file_stays_serial(self, tmp_path):
+        """Test a one-file directory does not start a worker pool."""
+        self._make_project(tmp_path, files=1)
+        params = SearchParameters(
+            search_type="function-calls",
+            target="process_data",
+            scope=str(tmp_path),
+            workers=4
+        )
+        
+        self.engine.search_directory(str(tmp_path), params)
+        
+        assert self.engine._executor is None
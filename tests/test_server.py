@@ -0,0 +1,344 @@
+"""Tests for MCP server tool implementations and shared state."""
+
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from code_extractor import server
+from code_extractor.server import (
+    clear_registries,
+    find_class,
+    find_function,
+    get_cached_extractor,
+    get_cached_parser,
+    get_search_engine,
+    get_symbols,
+    get_symbols_code,
+    make_progress_reporter,
+    run_tool,
+    search_code,
+)
+from code_extractor.source_buffer import SourceBuffer
+
+
+class TestServerRegistries:
+    """Test process-lifetime parser/extractor/search engine registries."""
+
+    def setup_method(self):
+        clear_registries()
+
+    def teardown_method(self):
+        clear_registries()
+
+    def test_extractor_reused_per_language(self):
+        """Test that files of the same language share one extractor."""
+        first = get_cached_extractor("/repo/a.py")
+        second = get_cached_extractor("/repo/pkg/b.py")
+
+        assert first is second
+        assert first.language == "python"
+
+    def test_extractor_created_once_across_tool_calls(self, tmp_path):
+        """Test that repeated get_symbols calls don't rebuild the extractor."""
+        test_file = tmp_path / "module.py"
+        test_file.write_text("def foo():\n    pass\n")
+
+        with patch.object(server, "create_extractor", wraps=server.create_extractor) as factory:
+            get_symbols(str(test_file))
+            get_symbols(str(test_file))
+
+        assert factory.call_count == 1
+
+    def test_parser_reused_across_function_lookups(self, tmp_path):
+        """Test that function lookups share one parser per language."""
+        test_file = tmp_path / "module.py"
+        test_file.write_text("def foo():\n    pass\n")
+
+        with patch.object(server, "get_parser", wraps=server.get_parser) as factory:
+            assert find_function(None)(str(test_file), "foo")["start_line"] == 1
+            assert find_function(None)(str(test_file), "foo")["start_line"] == 1
+
+        assert factory.call_count == 1
+        assert get_cached_parser("python") is get_cached_parser("python")
+
+    def test_search_engine_singleton(self):
+        """Test that the search engine is shared until cleared."""
+        engine = get_search_engine()
+
+        assert get_search_engine() is engine
+        clear_registries()
+        assert get_search_engine() is not engine
+
+
+class TestGetSymbolsCode:
+    """Test batch extraction of several symbols from one file."""
+
+    def setup_method(self):
+        clear_registries()
+
+    def test_returns_each_requested_symbol(self, tmp_path):
+        """Test functions, classes and misses are reported in request order."""
+        test_file = tmp_path / "module.py"
+        test_file.write_text(
+            "class Greeter:\n"
+            "    def greet(self):\n"
+            "        return 'héllo'\n"
+            "\n"
+            "def main():\n"
+            "    Greeter().greet()\n"
+        )
+
+        result = get_symbols_code(str(test_file), ["main", "Greeter", "missing", "greet"])
+
+        assert result["language"] == "python"
+        main, greeter, missing, greet = result["symbols"]
+        assert main == {
+            "name": "main", "kind": "function",
+            "code": "def main():\n    Greeter().greet()",
+            "start_line": 5, "end_line": 6, "lines": "5-6",
+        }
+        assert greeter["kind"] == "class"
+        assert greeter["start_line"] == 1 and greeter["end_line"] == 3
+        assert missing["name"] == "missing" and "error" in missing
+        assert greet["code"] == "def greet(self):\n        return 'héllo'"
+
+    def test_single_parse(self, tmp_path):
+        """Test the file is parsed once regardless of how many names are requested."""
+        test_file = tmp_path / "module.py"
+        test_file.write_text("def a():\n    pass\n\ndef b():\n    pass\n")
+
+        with patch.object(server.parse_cache, "parse", wraps=server.parse_cache.parse) as parse:
+            result = get_symbols_code(str(test_file), ["a", "b"])
+
+        assert parse.call_count == 1
+        assert [s["start_line"] for s in result["symbols"]] == [1, 4]
+
+    def test_revision_read_not_tracked_by_path(self, tmp_path):
+        """Test content read at a revision doesn't take the work-tree file's incremental slot."""
+        test_file = tmp_path / "module.py"
+        test_file.write_text("def a():\n    pass\n")
+
+        with patch.object(server, "read_source", return_value=SourceBuffer(b"def a():\n    return 1\n")), \
+                patch.object(server.parse_cache, "parse", wraps=server.parse_cache.parse) as parse:
+            get_symbols_code(str(test_file), ["a"], git_revision="HEAD~1")
+
+        assert parse.call_args.kwargs['path'] is None
+
+    def test_unsupported_file(self, tmp_path):
+        """Test errors are returned rather than raised."""
+        result = get_symbols_code(str(tmp_path / "missing.py"), ["foo"])
+
+        assert "error" in result
+
+
+class TestDefinitionLookup:
+    """Test function/class lookup on large and deeply nested sources."""
+
+    def setup_method(self):
+        clear_registries()
+
+    def test_deeply_nested_source(self, tmp_path):
+        """Test lookups don't hit the recursion limit on deeply nested code."""
+        test_file = tmp_path / "generated.py"
+        test_file.write_text("x = " + "[" * 3000 + "]" * 3000 + "\n\nclass Target:\n    def run(self):\n        pass\n")
+
+        assert find_function(None)(str(test_file), "run")["start_line"] == 4
+        assert find_class(None)(str(test_file), "Target")["start_line"] == 3
+
+    def test_absent_name_skips_walk(self, tmp_path):
+        """Test a name that doesn't occur in the file is rejected without walking the tree."""
+        test_file = tmp_path / "module.py"
+        test_file.write_text("def foo():\n    pass\n")
+
+        with patch.object(server, "walk_tree") as walk:
+            result = find_function(None)(str(test_file), "bar")
+
+        walk.assert_not_called()
+        assert "error" in result
+
+    def test_non_ascii_source(self, tmp_path):
+        """Test byte offsets are not used to slice decoded text."""
+        test_file = tmp_path / "module.py"
+        test_file.write_text("GREETING = 'héllo wörld'\n\ndef foo():\n    return GREETING\n", encoding='utf-8')
+
+        result = find_function(None)(str(test_file), "foo")
+
+        assert result["code"] == "def foo():\n    return GREETING"
+        assert result["start_line"] == 3
+
+
+class TestAsyncToolExecution:
+    """Test tool calls run off the event loop on the tool executor."""
+
+    def setup_method(self):
+        clear_registries()
+
+    def teardown_method(self):
+        clear_registries()
+
+    def test_calls_run_concurrently(self):
+        """Test two blocking tool calls overlap instead of queueing."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def blocking_tool(value):
+            barrier.wait()
+            return value, threading.current_thread().name
+
+        async def call_both():
+            return await asyncio.gather(run_tool(blocking_tool, 1), run_tool(blocking_tool, 2))
+
+        (first, first_thread), (second, second_thread) = asyncio.run(call_both())
+
+        assert (first, second) == (1, 2)
+        assert first_thread != second_thread
+        assert first_thread.startswith("mcp-tool")
+
+    def test_parsers_are_per_thread(self):
+        """Test executor threads never share a tree-sitter parser."""
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            other = pool.submit(get_cached_parser, "python").result()
+
+        assert get_cached_parser("python") is not other
+        assert get_cached_parser("python") is get_cached_parser("python")
+
+    def test_cancelled_search_stops(self, tmp_path):
+        """Test a set cancel event stops a directory search before it reads files."""
+        for i in range(5):
+            (tmp_path / f"mod{i}.py").write_text("import os\nos.getcwd()\n")
+        cancel_event = threading.Event()
+        cancel_event.set()
+
+        with patch.object(server.SearchEngine, "search_file") as search_file:
+            results = search_code("function-calls", "os.getcwd", str(tmp_path), respect_gitignore=False,
+                                  cancel_event=cancel_event)
+
+        search_file.assert_not_called()
+        assert results == []
+
+
+class TestSearchBudget:
+    """Test search budgets surface as a truncation marker."""
+
+    def setup_method(self):
+        clear_registries()
+
+    def teardown_method(self):
+        clear_registries()
+
+    def test_max_bytes_appends_marker(self, tmp_path):
+        """Test a budget-limited search ends with its counters."""
+        for i in range(4):
+            (tmp_path / f"mod{i}.py").write_text("import os\nos.getcwd()\n")
+        size = len("import os\nos.getcwd()\n")
+
+        results = search_code("function-calls", "os.getcwd", str(tmp_path), respect_gitignore=False,
+                              max_bytes=size * 2)
+
+        assert len(results) == 3
+        assert results[-1] == {"truncated": "max_bytes", "files_total": 4, "files_searched": 2,
+                               "bytes_searched": size * 2, "matches": 2}
+
+    def test_single_file_over_budget_has_marker(self, tmp_path):
+        """Test a file scope skipped for its budget is told apart from a file without matches."""
+        test_file = tmp_path / "mod.py"
+        test_file.write_text("import os\nos.getcwd()\n")
+
+        results = search_code("function-calls", "os.getcwd", str(test_file), max_bytes=10)
+
+        assert results == [{"truncated": "max_bytes", "files_total": 1, "files_searched": 0,
+                            "bytes_searched": 0, "matches": 0}]
+
+    def test_single_file_past_deadline_has_marker(self, tmp_path):
+        """Test a file scope searched after its deadline reports the deadline."""
+        test_file = tmp_path / "mod.py"
+        test_file.write_text("import os\nos.getcwd()\n")
+
+        results = search_code("function-calls", "os.getcwd", str(test_file), timeout=-1)
+
+        assert [r["truncated"] for r in results] == ["deadline"]
+
+    def test_complete_search_has_no_marker(self, tmp_path):
+        """Test a search within budget returns only results."""
+        (tmp_path / "mod.py").write_text("import os\nos.getcwd()\n")
+
+        results = search_code("function-calls", "os.getcwd", str(tmp_path), respect_gitignore=False,
+                              timeout=60, max_bytes=10_000)
+        file_results = search_code("function-calls", "os.getcwd", str(tmp_path / "mod.py"),
+                                   timeout=60, max_bytes=10_000)
+
+        assert [r["match_text"] for r in results] == ["os.getcwd()"]
+        assert file_results == results
+
+
+class FakeContext:
+    """Records progress notifications sent through a tool's request context."""
+
+    def __init__(self):
+        self.reports = []
+
+    async def report_progress(self, progress, total=None, message=None):
+        self.reports.append((progress, total, message))
+
+
+class TestSearchProgress:
+    """Test search progress is forwarded as MCP progress notifications."""
+
+    def test_context_not_a_tool_argument(self):
+        """Test FastMCP injects the request context instead of asking the client for it."""
+        fast_mcp, created = server.FastMCP, []
+
+        def make_server(*args, **kwargs):
+            created.append(fast_mcp(*args, **kwargs))
+            return created[-1]
+
+        with patch.object(sys, "argv", ["mcp-server-code-extractor"]), \
+                patch.object(fast_mcp, "run"), \
+                patch.object(server, "FastMCP", side_effect=make_server), \
+                patch.object(server, "get_search_engine"):
+            server.main()
+
+        tools = {tool.name: tool for tool in asyncio.run(created[0].list_tools())}
+        assert "ctx" not in tools["search_code_tool"].inputSchema["properties"]
+
+    def setup_method(self):
+        clear_registries()
+
+    def teardown_method(self):
+        clear_registries()
+
+    def _search_with_progress(self, tmp_path):
+        ctx = FakeContext()
+
+        async def search():
+            progress = make_progress_reporter(ctx, asyncio.get_running_loop())
+            results = await run_tool(search_code, "function-calls", "os.getcwd", str(tmp_path),
+                                     respect_gitignore=False, progress=progress)
+            # Let the scheduled notifications run
+            await asyncio.sleep(0.05)
+            return results
+
+        return asyncio.run(search()), ctx.reports
+
+    def test_reports_every_file(self, tmp_path):
+        """Test each searched file is reported when throttling is off."""
+        for i in range(3):
+            (tmp_path / f"mod{i}.py").write_text("import os\nos.getcwd()\n")
+
+        with patch.object(server, "PROGRESS_INTERVAL", 0):
+            results, reports = self._search_with_progress(tmp_path)
+
+        assert len(results) == 3
+        assert [(done, total) for done, total, _ in reports] == [(1, 3), (2, 3), (3, 3)]
+        assert reports[-1][2] == "Searched 3/3 files, 3 matches"
+
+    def test_throttled_reports_keep_final(self, tmp_path):
+        """Test throttling drops intermediate reports but always sends the last one."""
+        for i in range(5):
+            (tmp_path / f"mod{i}.py").write_text("import os\nos.getcwd()\n")
+
+        with patch.object(server, "PROGRESS_INTERVAL", 3600):
+            _, reports = self._search_with_progress(tmp_path)
+
+        assert [(done, total) for done, total, _ in reports] == [(1, 5), (5, 5)]
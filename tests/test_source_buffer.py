@@ -0,0 +1,93 @@
+"""Tests for the bytes-first source buffer."""
+
+from code_extractor.file_reader import read_source
+from code_extractor.models import SearchParameters
+from code_extractor.search_engine import SearchEngine
+from code_extractor.source_buffer import SourceBuffer
+
+
+class TestSourceBuffer:
+    """Test SourceBuffer span decoding."""
+
+    def test_spans_use_byte_offsets(self):
+        """Test spans are decoded from byte offsets, not character offsets."""
+        source = SourceBuffer.from_text("s = 'ünïcödé'\nfoo()\n")
+        start = source.data.index(b"foo")
+
+        assert source.text(start, start + 5) == "foo()"
+        assert source.lines.line_at(start) == 2
+
+    def test_invalid_utf8_is_replaced(self):
+        """Test undecodable bytes don't make a span unreadable."""
+        assert SourceBuffer(b"a\xffb").text() == "a�b"
+
+    def test_is_blank(self):
+        """Test whitespace-only detection."""
+        assert SourceBuffer(b"").is_blank()
+        assert SourceBuffer(b" \n\t\n").is_blank()
+        assert not SourceBuffer(b"\n x").is_blank()
+
+    def test_contains(self):
+        """Test byte substring checks."""
+        source = SourceBuffer(b"def foo(): pass")
+
+        assert b"foo" in source
+        assert b"bar" not in source
+
+
+class TestReadSource:
+    """Test reading local files into a SourceBuffer."""
+
+    def test_reads_bytes(self, tmp_path):
+        """Test local content is read without decoding."""
+        test_file = tmp_path / "module.py"
+        test_file.write_bytes("x = 'é'\n".encode('utf-8'))
+
+        assert read_source(test_file).data == "x = 'é'\n".encode('utf-8')
+
+    def test_normalizes_line_endings(self, tmp_path):
+        """Test CRLF and CR line endings read as LF, as with get_file_content."""
+        test_file = tmp_path / "module.py"
+        test_file.write_bytes(b"a = 1\r\nb = 2\rc = 3\n")
+
+        assert read_source(test_file).data == b"a = 1\nb = 2\nc = 3\n"
+
+    def test_local_files_read_as_bytes(self, tmp_path):
+        """Test local files are read into bytes rather than mapped, so truncation can't fault."""
+        test_file = tmp_path / "generated.py"
+        test_file.write_bytes("A = 'ü'\n".encode('utf-8') * 100 + b"def foo():\n    pass\n")
+
+        source = read_source(test_file)
+        test_file.write_bytes(b"")
+
+        assert isinstance(source.data, bytes)
+        assert source.lines.line_count == 102
+        assert source.lines.get_lines(101, 102) == ["def foo():", "    pass"]
+
+    def test_non_ascii_file_extraction(self, tmp_path):
+        """Test the server tools report lines and code after multi-byte characters."""
+        from code_extractor.server import find_function, get_lines
+
+        test_file = tmp_path / "generated.py"
+        test_file.write_text("# ünïcode\n" * 50 + "def foo():\n    return 1\n", encoding='utf-8')
+
+        function = find_function(None)(str(test_file), "foo")
+        lines = get_lines(str(test_file), 51, 52)
+
+        assert function["code"] == "def foo():\n    return 1"
+        assert function["start_line"] == 51
+        assert lines["code"] == "def foo():\n    return 1\n"
+
+
+class TestSearchNonAscii:
+    """Test search results after non-ASCII text."""
+
+    def test_match_text_aligned(self, tmp_path):
+        """Test match text isn't shifted by multi-byte characters earlier in the file."""
+        test_file = tmp_path / "module.py"
+        test_file.write_text("# ñoño ümlaut\nimport os\nos.getcwd()\n", encoding='utf-8')
+        params = SearchParameters(search_type="function-calls", target="getcwd", scope=str(test_file))
+
+        results = SearchEngine().search_file(str(test_file), params)
+
+        assert [r.match_text for r in results] == ["os.getcwd()"]
@@ -0,0 +1,360 @@
+"""Tests for the persistent on-disk symbol index."""
+
+import os
+import sqlite3
+from dataclasses import replace
+from unittest.mock import patch
+
+import pytest
+
+from code_extractor import CodeExtractor
+from code_extractor.models import CodeSymbol, Parameter, SearchParameters, SearchStats, SymbolKind
+from code_extractor.parse_cache import content_hash
+from code_extractor.file_reader import read_source
+from code_extractor.search_engine import SearchEngine
+from code_extractor.symbol_index import SCHEMA_VERSION, SymbolIndex, symbol_from_record, symbol_to_record
+
+
+@pytest.fixture
+def index(tmp_path):
+    """Create a symbol index in a temporary directory."""
+    idx = SymbolIndex(tmp_path / "index" / "symbols.sqlite3")
+    yield idx
+    idx.close()
+
+
+def _sample_symbols():
+    return [
+        CodeSymbol(name="Service", kind=SymbolKind.CLASS, start_line=1, end_line=5,
+                   start_byte=0, end_byte=80, docstring="A service."),
+        CodeSymbol(name="run", kind=SymbolKind.METHOD, start_line=2, end_line=5,
+                   start_byte=20, end_byte=80, parent="Service", is_async=True,
+                   parameters=[Parameter("self"), Parameter("n", "int", "1")], return_type="None"),
+    ]
+
+
+class TestSymbolRecords:
+    """Test CodeSymbol serialization."""
+
+    def test_round_trip(self):
+        """Test records rebuild identical symbols."""
+        for symbol in _sample_symbols():
+            assert symbol_from_record(symbol_to_record(symbol)) == symbol
+
+
+class TestSymbolIndex:
+    """Test SymbolIndex storage and freshness checks."""
+
+    def test_store_and_lookup(self, index, tmp_path):
+        """Test symbols are returned for unchanged files."""
+        source = tmp_path / "service.py"
+        source.write_text("class Service: pass\n")
+        digest = content_hash(source.read_bytes())
+
+        index.store(source, "python", digest, _sample_symbols())
+
+        assert index.lookup(source, "python", digest) == _sample_symbols()
+        assert index.stats()['files'] == 1
+
+    def test_changed_content_is_stale(self, index, tmp_path):
+        """Test a different content hash misses."""
+        source = tmp_path / "service.py"
+        source.write_text("class Service: pass\n")
+        index.store(source, "python", content_hash(b"old"), _sample_symbols())
+
+        assert index.lookup(source, "python", content_hash(b"new")) is None
+
+    def test_changed_mtime_is_stale(self, index, tmp_path):
+        """Test a touched file misses even with the same hash."""
+        source = tmp_path / "service.py"
+        source.write_text("class Service: pass\n")
+        digest = content_hash(source.read_bytes())
+        index.store(source, "python", digest, _sample_symbols())
+
+        stat = source.stat()
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        assert index.lookup(source, "python", digest) is None
+
+    def test_missing_file(self, index, tmp_path):
+        """Test lookups for files that no longer exist."""
+        assert index.lookup(tmp_path / "gone.py", "python", "0") is None
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test a reopened index serves entries written earlier."""
+        db = tmp_path / "symbols.sqlite3"
+        source = tmp_path / "service.py"
+        source.write_text("class Service: pass\n")
+        digest = content_hash(source.read_bytes())
+
+        first = SymbolIndex(db)
+        first.store(source, "python", digest, _sample_symbols())
+        first.close()
+
+        second = SymbolIndex(db)
+        assert second.lookup(source, "python", digest) == _sample_symbols()
+        second.close()
+
+
+class TestNameIndex:
+    """Test the inverted symbol name index."""
+
+    def test_find_definitions(self, index, tmp_path):
+        """Test a name resolves to its file and position."""
+        source = tmp_path / "service.py"
+        source.write_text("class Service: pass\n")
+        index.store(source, "python", "0", _sample_symbols())
+
+        [location] = index.find_definitions("run")
+
+        assert location.file_path == str(source.resolve())
+        assert location.kind == SymbolKind.METHOD
+        assert location.parent == "Service"
+        assert (location.start_line, location.start_byte, location.end_byte) == (2, 20, 80)
+        assert index.find_definitions("missing") == []
+        assert index.stats()['names'] == 2
+
+    def test_restore_replaces_names(self, index, tmp_path):
+        """Test storing a file again drops its old names."""
+        source = tmp_path / "service.py"
+        source.write_text("class Service: pass\n")
+        index.store(source, "python", "0", _sample_symbols())
+        index.store(source, "python", "1", _sample_symbols()[:1])
+
+        assert index.find_definitions("run") == []
+        assert len(index.find_definitions("Service")) == 1
+
+    def test_stale_file_names_hidden(self, index, tmp_path):
+        """Test names from a file changed since indexing are not served."""
+        source = tmp_path / "service.py"
+        source.write_text("class Service: pass\n")
+        index.store(source, "python", "0", _sample_symbols())
+        source.write_text("class Other: pass\n")
+
+        assert not index.is_current(source)
+        assert index.find_definitions("Service") == []
+
+    def test_restrict_to_files(self, index, tmp_path):
+        """Test lookups can be limited to a set of files."""
+        first, second = tmp_path / "a.py", tmp_path / "b.py"
+        for source in (first, second):
+            source.write_text("class Service: pass\n")
+            index.store(source, "python", "0", _sample_symbols())
+
+        assert [loc.file_path for loc in index.find_definitions("Service", [second])] == [str(second.resolve())]
+
+    def test_remove_drops_names(self, index, tmp_path):
+        """Test removed files leave the name index."""
+        source = tmp_path / "service.py"
+        source.write_text("class Service: pass\n")
+        index.store(source, "python", "0", _sample_symbols())
+        index.remove(source)
+
+        assert index.stats()['names'] == 0
+
+    def test_old_schema_rebuilt(self, tmp_path):
+        """Test an index written by an older schema is dropped on open."""
+        db = tmp_path / "symbols.sqlite3"
+        conn = sqlite3.connect(str(db))
+        conn.execute("CREATE TABLE files (path TEXT PRIMARY KEY, symbols TEXT)")
+        conn.execute("INSERT INTO files VALUES ('x', '[]')")
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION - 1}")
+        conn.commit()
+        conn.close()
+
+        index = SymbolIndex(db)
+        assert index.stats()['files'] == 0
+        index.close()
+
+
+class TestIndexedDefinitionSearch:
+    """Test symbol-definitions searches answered from the name index."""
+
+    def _make_project(self, tmp_path):
+        (tmp_path / "service.py").write_text(
+            "class UserService:\n    def get_user(self):\n        return UserService()\n"
+        )
+        (tmp_path / "app.py").write_text("from service import UserService\n\nsvc = UserService()\n")
+        (tmp_path / "util.py").write_text("def helper():\n    pass\n")
+
+    def _params(self, tmp_path, target):
+        return SearchParameters(
+            search_type="symbol-definitions",
+            target=target,
+            scope=str(tmp_path),
+            respect_gitignore=False
+        )
+
+    def _summary(self, results):
+        return [(os.path.basename(r.file_path), r.start_line, r.metadata["symbol_type"]) for r in results]
+
+    def test_matches_scan(self, index, tmp_path):
+        """Test indexed results agree with a parse-everything search."""
+        self._make_project(tmp_path)
+
+        for target in ("UserService", "get_user", "svc"):
+            scanned = SearchEngine().search_directory(str(tmp_path), self._params(tmp_path, target))
+            indexed = SearchEngine(symbol_index=index).search_directory(str(tmp_path), self._params(tmp_path, target))
+            assert self._summary(indexed) == self._summary(scanned)
+
+        assert self._summary(indexed) == [("app.py", 3, "variable")]
+
+    def test_function_locals_indexed(self, index, tmp_path):
+        """Test nested functions and locals, left out of symbol listings, are still found."""
+        (tmp_path / "jobs.py").write_text(
+            "def run():\n    def step():\n        pass\n    count = 1\n    return step\n"
+        )
+
+        for target in ("step", "count"):
+            scanned = SearchEngine().search_directory(str(tmp_path), self._params(tmp_path, target))
+            indexed = SearchEngine(symbol_index=index).search_directory(str(tmp_path), self._params(tmp_path, target))
+            assert self._summary(indexed) == self._summary(scanned)
+            assert len(indexed) == 1
+
+    def test_annotation_only_fields_match_scan(self, index, tmp_path):
+        """Test annotated names without a value, like dataclass fields, are indexed."""
+        self._make_project(tmp_path)
+        (tmp_path / "models.py").write_text(
+            "from dataclasses import dataclass\n\n@dataclass\nclass User:\n    name: str\n    age: int = 0\n"
+        )
+
+        for target in ("name", "age", "User", "svc"):
+            scanned = SearchEngine().search_directory(str(tmp_path), self._params(tmp_path, target))
+            indexed = SearchEngine(symbol_index=index).search_directory(str(tmp_path), self._params(tmp_path, target))
+            assert self._summary(indexed) == self._summary(scanned)
+            assert len(indexed) == 1
+        assert self._summary(indexed) == [("app.py", 3, "variable")]
+
+    def test_language_without_extractor_scanned(self, index, tmp_path):
+        """Test JavaScript definitions, which the extractor can't index, are still found."""
+        self._make_project(tmp_path)
+        (tmp_path / "b.js").write_text(
+            "class Foo {}\nconst lam = () => 1;\nfunction foo() {}\nlet Z = 1;\nvar y = 2;\n"
+        )
+
+        for target in ("Foo", "lam", "foo", "Z", "y", "UserService"):
+            scanned = SearchEngine().search_directory(str(tmp_path), self._params(tmp_path, target))
+            indexed = SearchEngine(symbol_index=index).search_directory(str(tmp_path), self._params(tmp_path, target))
+            assert self._summary(indexed) == self._summary(scanned)
+            assert len(indexed) == 1
+        assert not index.is_current(tmp_path / "b.js")
+
+    def test_definition_not_usage(self, index, tmp_path):
+        """Test only the definition is found, not code that mentions the name."""
+        self._make_project(tmp_path)
+
+        results = SearchEngine(symbol_index=index).search_directory(str(tmp_path), self._params(tmp_path, "UserService"))
+
+        assert self._summary(results) == [("service.py", 1, "class")]
+        assert results[0].match_text.startswith("class UserService:")
+
+    def test_unchanged_files_not_read(self, index, tmp_path):
+        """Test a repeated search reads only the file holding the definition."""
+        self._make_project(tmp_path)
+        engine = SearchEngine(symbol_index=index)
+        engine.search_directory(str(tmp_path), self._params(tmp_path, "helper"))
+
+        with patch('code_extractor.search_engine.read_source', wraps=read_source) as read:
+            results = engine.search_directory(str(tmp_path), self._params(tmp_path, "UserService"))
+
+        assert self._summary(results) == [("service.py", 1, "class")]
+        assert [os.path.basename(call.args[0]) for call in read.call_args_list] == ["service.py"]
+
+    def test_byte_budget_charges_reindexing_only(self, index, tmp_path):
+        """Test files answered from the index don't spend the byte budget."""
+        self._make_project(tmp_path)
+        engine = SearchEngine(symbol_index=index)
+        params = replace(self._params(tmp_path, "helper"), max_bytes=10)
+
+        stats = SearchStats()
+        engine.search_directory(str(tmp_path), params, stats=stats)
+        assert stats.truncated == "max_bytes"
+
+        engine.search_directory(str(tmp_path), self._params(tmp_path, "helper"))
+        stats = SearchStats()
+        results = engine.search_directory(str(tmp_path), params, stats=stats)
+        assert self._summary(results) == [("util.py", 1, "function")]
+        assert (stats.truncated, stats.bytes_searched) == (None, 0)
+
+    def test_edited_file_reindexed(self, index, tmp_path):
+        """Test a definition added after indexing is found."""
+        self._make_project(tmp_path)
+        engine = SearchEngine(symbol_index=index)
+        engine.search_directory(str(tmp_path), self._params(tmp_path, "helper"))
+
+        target = tmp_path / "util.py"
+        target.write_text("def helper():\n    pass\n\ndef added():\n    pass\n")
+        stat = target.stat()
+        os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        results = engine.search_directory(str(tmp_path), self._params(tmp_path, "added"))
+        assert self._summary(results) == [("util.py", 4, "function")]
+
+
+class TestExtractorUsesIndex:
+    """Test CodeExtractor consults the index before parsing."""
+
+    def test_second_extraction_skips_parsing(self, index, tmp_path):
+        """Test an indexed file is not parsed again."""
+        source = tmp_path / "module.py"
+        source.write_text("class Service:\n    def run(self):\n        pass\n")
+        extractor = CodeExtractor('python', symbol_index=index)
+
+        first = extractor.extract_symbols(source.read_text(), file_path=str(source))
+        with patch('code_extractor.extractor.parse_cache') as cache:
+            second = extractor.extract_symbols(source.read_text(), file_path=str(source))
+
+        cache.parse.assert_not_called()
+        assert [s.name for s in first] == ["Service", "run"]
+        assert second == first
+        assert index.stats()['files'] == 1
+
+    def test_depth_applied_to_indexed_symbols(self, index, tmp_path):
+        """Test depth filtering works on symbols served from the index."""
+        source = tmp_path / "module.py"
+        source.write_text("class Service:\n    def run(self):\n        pass\n")
+        extractor = CodeExtractor('python', symbol_index=index)
+
+        extractor.extract_symbols(source.read_text(), file_path=str(source))
+        top_level = extractor.extract_symbols(source.read_text(), depth=1, file_path=str(source))
+
+        assert [s.name for s in top_level] == ["Service"]
+
+    def test_revision_content_bypasses_index(self, index, tmp_path):
+        """Test content read at a VCS revision is neither looked up nor stored."""
+        source = tmp_path / "module.py"
+        source.write_text("def foo():\n    pass\n")
+        extractor = CodeExtractor('python', symbol_index=index)
+
+        extractor.extract_symbols("def bar():\n    pass\n", file_path=str(source), revision="HEAD~1")
+
+        assert index.stats()['files'] == 0
+
+    def test_edit_after_read_leaves_entry_stale(self, index, tmp_path):
+        """Test an edit between reading and storing isn't stamped onto the old symbols."""
+        source = tmp_path / "module.py"
+        source.write_text("def foo():\n    pass\n")
+        stat = source.stat()
+        content = source.read_text()
+        source.write_text("def bar():\n    pass\n\n")
+        extractor = CodeExtractor('python', symbol_index=index)
+
+        extractor.extract_symbols(content, file_path=str(source), stat=stat)
+
+        assert not index.is_current(source)
+        assert index.find_definitions("foo") == []
+
+    def test_store_error_keeps_symbols(self, index, tmp_path, capsys):
+        """Test a failure writing the index still returns the parsed symbols."""
+        source = tmp_path / "module.py"
+        source.write_text("def foo():\n    pass\n")
+        extractor = CodeExtractor('python', symbol_index=index)
+
+        with patch.object(index, 'store', side_effect=sqlite3.OperationalError("database is locked")):
+            symbols = extractor.extract_symbols(source.read_text(), file_path=str(source))
+
+        assert [s.name for s in symbols] == ["foo"]
+        # stdout belongs to the MCP transport
+        output = capsys.readouterr()
+        assert output.out == ""
+        assert "database is locked" in output.err
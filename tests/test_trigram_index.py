@@ -0,0 +1,145 @@
+"""Tests for the trigram prefilter index."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from code_extractor.models import SearchParameters
+from code_extractor.search_engine import SearchEngine
+from code_extractor.trigram_index import TrigramIndex, word_trigrams
+
+
+@pytest.fixture
+def index(tmp_path):
+    """Create a trigram index in a temporary directory."""
+    idx = TrigramIndex(tmp_path / "index" / "trigrams.sqlite3")
+    yield idx
+    idx.close()
+
+
+def _make_files(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.py").write_text("import requests\nrequests.get(url)\n")
+    (src / "b.py").write_text("def process_data(x):\n    return x\n")
+    (src / "c.py").write_text("print('hello')\n")
+    return [src / "a.py", src / "b.py", src / "c.py"]
+
+
+class TestWordTrigrams:
+    """Test trigram extraction."""
+
+    def test_trigrams_stay_inside_words(self):
+        """Test trigrams never span a non-word byte."""
+        grams = {gram.to_bytes(3, 'big') for gram in word_trigrams(b"ab.cde fgh")}
+        assert grams == {b"cde", b"fgh"}
+
+    def test_short_needle_has_no_trigrams(self):
+        """Test words under three bytes give nothing to filter on."""
+        assert word_trigrams(b"a.b") == set()
+
+
+class TestTrigramIndex:
+    """Test TrigramIndex filtering and freshness checks."""
+
+    def test_unindexed_files_checked_directly(self, index, tmp_path):
+        """Test files are read, indexed and filtered on first use."""
+        files = _make_files(tmp_path)
+
+        assert index.candidates(files, b"requests.get") == [files[0]]
+        assert index.stats()['files'] == 3
+
+    def test_indexed_files_not_read(self, index, tmp_path, monkeypatch):
+        """Test fresh index entries answer without reading files."""
+        files = _make_files(tmp_path)
+        index.candidates(files, b"requests.get")
+
+        def fail_read(self):
+            raise AssertionError(f"read {self}")
+
+        monkeypatch.setattr("pathlib.Path.read_bytes", fail_read)
+        assert index.candidates(files, b"process_data") == [files[1]]
+
+    def test_changed_file_reindexed(self, index, tmp_path):
+        """Test a file edited after indexing is checked against its new content."""
+        files = _make_files(tmp_path)
+        index.candidates(files, b"process_data")
+
+        files[2].write_text("process_data(1)\n")
+        stat = os.stat(files[2])
+        os.utime(files[2], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert index.candidates(files, b"process_data") == [files[1], files[2]]
+
+    def test_short_needle_keeps_indexed_files(self, index, tmp_path):
+        """Test a needle without trigrams filters nothing out of the index."""
+        files = _make_files(tmp_path)
+        index.candidates(files, b"requests")
+
+        assert index.candidates(files, b"x") == files
+
+    def test_files_read_outside_lock(self, index, tmp_path, monkeypatch):
+        """Test stale files are read without holding the index lock."""
+        files = _make_files(tmp_path)
+        read_bytes = type(files[0]).read_bytes
+
+        def checked_read(self):
+            assert not index._lock.locked()
+            return read_bytes(self)
+
+        monkeypatch.setattr("pathlib.Path.read_bytes", checked_read)
+        assert index.candidates(files, b"requests.get") == [files[0]]
+
+    def test_lookup_limited_to_candidates(self, index, tmp_path):
+        """Test entries for other files don't affect the result."""
+        files = _make_files(tmp_path)
+        index.candidates(files, b"requests")
+
+        assert index.candidates(files[1:], b"process_data") == [files[1]]
+        assert index.candidates(files[:1], b"process_data") == []
+
+    def test_remove(self, index, tmp_path):
+        """Test removed files leave the index."""
+        files = _make_files(tmp_path)
+        index.update(files[0])
+        index.remove(files[0])
+
+        assert index.stats() == {'path': str(index.db_path), 'files': 0, 'postings': 0}
+
+
+class TestSearchPrefilter:
+    """Test files without the target are skipped before parsing."""
+
+    def _params(self, tmp_path, target):
+        return SearchParameters(
+            search_type="function-calls",
+            target=target,
+            scope=str(tmp_path),
+            respect_gitignore=False
+        )
+
+    def test_file_without_target_not_parsed(self, tmp_path):
+        """Test search_file doesn't parse a file lacking the target bytes."""
+        files = _make_files(tmp_path)
+        engine = SearchEngine()
+        params = self._params(tmp_path, "requests.get")
+
+        with patch.object(engine._ast_cache, 'parse', wraps=engine._ast_cache.parse) as parse:
+            assert engine.search_file(str(files[2]), params) == []
+            assert len(engine.search_file(str(files[0]), params)) == 1
+
+        assert parse.call_count == 1
+
+    def test_indexed_search_matches_unindexed(self, index, tmp_path):
+        """Test a search through the trigram index finds the same calls."""
+        _make_files(tmp_path)
+        params = self._params(tmp_path / "src", "requests.get")
+
+        plain = SearchEngine().search_directory(str(tmp_path / "src"), params)
+        indexed_engine = SearchEngine(trigram_index=index)
+        first = indexed_engine.search_directory(str(tmp_path / "src"), params)
+        second = indexed_engine.search_directory(str(tmp_path / "src"), params)
+
+        assert [r.file_path for r in plain] == [r.file_path for r in first] == [r.file_path for r in second]
+        assert len(plain) == 1
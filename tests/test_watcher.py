@@ -0,0 +1,195 @@
+"""Tests for the polling file watcher and cache refresh."""
+
+import os
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from code_extractor import server
+from code_extractor.call_index import CallIndex
+from code_extractor.parse_cache import ParseCache
+from code_extractor.search_engine import SearchEngine
+from code_extractor.symbol_index import SymbolIndex
+from code_extractor.watcher import FileWatcher
+
+
+def _touch(path, text):
+    """Rewrite a file and move its mtime forward so the change is visible."""
+    stat = path.stat()
+    path.write_text(text)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+class TestFileWatcher:
+    """Test change detection by polling."""
+
+    def _watcher(self, tmp_path):
+        changes = []
+        watcher = FileWatcher(lambda changed, removed: changes.append((sorted(changed), sorted(removed))))
+        watcher.watch(tmp_path)
+        return watcher, changes
+
+    def test_first_poll_records_only(self, tmp_path):
+        """Test files present when a scope is added are not reported."""
+        (tmp_path / "a.py").write_text("x = 1\n")
+        watcher, changes = self._watcher(tmp_path)
+
+        assert watcher.poll() == ([], [])
+        assert changes == []
+        assert watcher.stats()['files'] == 1
+
+    def test_reports_changes(self, tmp_path):
+        """Test edited, added and removed files are reported once."""
+        edited, removed = tmp_path / "edited.py", tmp_path / "removed.py"
+        edited.write_text("x = 1\n")
+        removed.write_text("y = 1\n")
+        watcher, changes = self._watcher(tmp_path)
+        watcher.poll()
+
+        _touch(edited, "x = 2\n")
+        (tmp_path / "pkg").mkdir()
+        (tmp_path / "pkg" / "added.js").write_text("f();\n")
+        removed.unlink()
+        watcher.poll()
+        watcher.poll()
+
+        assert changes == [([edited, tmp_path / "pkg" / "added.js"], [removed])]
+
+    def test_ignores_non_source_and_vcs_files(self, tmp_path):
+        """Test only source files outside ignored directories are tracked."""
+        (tmp_path / "notes.txt").write_text("notes\n")
+        (tmp_path / "node_modules").mkdir()
+        (tmp_path / "node_modules" / "lib.js").write_text("f();\n")
+        watcher, _ = self._watcher(tmp_path)
+
+        watcher.poll()
+
+        assert watcher.stats()['files'] == 0
+
+    def test_nested_scope_not_added(self, tmp_path):
+        """Test a file inside a watched directory doesn't become its own scope."""
+        (tmp_path / "a.py").write_text("x = 1\n")
+        watcher, _ = self._watcher(tmp_path)
+        watcher.watch(tmp_path / "a.py")
+
+        assert watcher.scopes() == [tmp_path.resolve()]
+
+    def test_parent_scope_replaces_children(self, tmp_path):
+        """Test watching a directory drops scopes inside it, so files are tracked once."""
+        (tmp_path / "pkg").mkdir()
+        (tmp_path / "pkg" / "a.py").write_text("x = 1\n")
+        (tmp_path / "b.py").write_text("y = 1\n")
+        watcher = FileWatcher(lambda changed, removed: None, max_files=2)
+        watcher.watch(tmp_path / "pkg")
+        watcher.watch(tmp_path / "b.py")
+        watcher.poll()
+
+        watcher.watch(tmp_path)
+        watcher.poll()
+
+        assert watcher.scopes() == [tmp_path.resolve()]
+        assert watcher.stats()['files'] == 2
+
+    def test_background_thread_polls(self, tmp_path):
+        """Test a started watcher reports changes on its own."""
+        source = tmp_path / "a.py"
+        source.write_text("x = 1\n")
+        seen = threading.Event()
+        watcher = FileWatcher(lambda changed, removed: seen.set(), interval=0.01)
+        watcher.watch(tmp_path)
+        watcher.poll()
+
+        watcher.start()
+        try:
+            _touch(source, "x = 2\n")
+            assert seen.wait(5)
+        finally:
+            watcher.stop()
+
+
+class TestRefreshFile:
+    """Test the search engine's refresh of changed and deleted files."""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        symbols = SymbolIndex(tmp_path / "index" / "symbols.sqlite3")
+        calls = CallIndex(tmp_path / "index" / "calls.sqlite3")
+        yield SearchEngine(ast_cache=ParseCache(), symbol_index=symbols, call_index=calls)
+        symbols.close()
+        calls.close()
+
+    def test_refresh_warms_cache_and_indexes(self, engine, tmp_path):
+        """Test a refreshed file is parsed and current in every index."""
+        source = tmp_path / "module.py"
+        source.write_text("def run():\n    helper()\n")
+
+        engine.refresh_file(source)
+
+        assert engine._ast_cache.stats()['entries'] == 1
+        assert engine.symbol_index.is_current(source)
+        assert [s.start_line for s in engine.symbol_index.find_definitions("run")] == [1]
+        assert [c.start_line for c in engine.call_index.find_calls("helper")] == [2]
+
+    def test_forget_removes_entries(self, engine, tmp_path):
+        """Test a deleted file leaves the cache and indexes."""
+        source = tmp_path / "module.py"
+        source.write_text("def run():\n    helper()\n")
+        engine.refresh_file(source)
+
+        engine.forget_file(source)
+
+        assert str(source) not in engine._ast_cache._paths
+        assert engine.symbol_index.stats()['files'] == 0
+        assert engine.call_index.stats()['files'] == 0
+
+    def test_forget_keeps_shared_content(self, engine, tmp_path):
+        """Test forgetting one file keeps the tree another file with the same content uses."""
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        kept, deleted = tmp_path / "a" / "__init__.py", tmp_path / "b" / "__init__.py"
+        kept.write_text("")
+        deleted.write_text("")
+        engine.refresh_file(kept)
+        engine.refresh_file(deleted)
+
+        engine.forget_file(deleted)
+        engine.refresh_file(kept)
+
+        assert engine._ast_cache.stats()['entries'] == 1
+        assert engine._ast_cache.stats()['misses'] == 1
+
+
+class TestServerWatcher:
+    """Test the server watches the scopes tools are asked about."""
+
+    def setup_method(self):
+        server.clear_registries()
+
+    def teardown_method(self):
+        server.clear_registries()
+
+    def test_disabled_by_default(self, tmp_path):
+        """Test no watcher runs unless an interval is configured."""
+        server.watch_scope(str(tmp_path))
+
+        assert server.get_watcher() is None
+
+    def test_tool_scopes_watched(self, tmp_path):
+        """Test local scopes are watched and URLs and revisions are not."""
+        (tmp_path / "a.py").write_text("x = 1\n")
+        with patch.object(server, "WATCH_INTERVAL", 60):
+            server.watch_scope(str(tmp_path))
+            server.watch_scope("https://example.com/a.py")
+            server.watch_scope(str(tmp_path / "b.py"), git_revision="HEAD")
+
+            assert server.get_watcher().scopes() == [tmp_path.resolve()]
+
+    def test_refresh_paths_updates_engine(self, tmp_path):
+        """Test the watcher callback refreshes changed files and forgets removed ones."""
+        engine = server.get_search_engine()
+        with patch.object(engine, "refresh_file") as refresh, patch.object(engine, "forget_file") as forget:
+            server.refresh_paths([tmp_path / "a.py"], [tmp_path / "b.py"])
+
+        refresh.assert_called_once_with(tmp_path / "a.py")
+        forget.assert_called_once_with(tmp_path / "b.py")